@@ -1,218 +1,71 @@
 # app.py
-import io
-import pandas as pd
-import matplotlib.pyplot as plt
 import streamlit as st
 
-# ---- bring in your static data from a separate file ----
-from criteria_data import (
-    CATEGORY_OPTIONS,
-    weights_dict,
-    Criteria_Scores_Frame_Material,
-    Criteria_Scores_MIL_STD,
-    Criteria_Scores_Flight_Control_Board,
-)
+from profiling import start_run, stage
+from warmup import start_warm_up
+
+# Heavy modules (pandas, scoring, matplotlib) are imported after the upload below; load
+# them in the background while the upload prompt is shown.
+start_warm_up()
 
 # ---------------- Page setup ----------------
 st.set_page_config(page_title="Drone Selection Tool", layout="wide")
 st.title("🛩️ Drone Selection Tool")
 st.write("Upload an Excel file with drone data, apply filters, and rank drones by criteria.")
 
-# ---------------- Helpers: scoring & utilities ----------------
-def add_scores_by_category(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Compute a 'Score' for each row using the weights of its own Category (row-wise).
-    Adds *_Score helper columns when a weighted feature exists.
-    Also adds a 'Rating' (stars) derived from the Score.
-    Returns a new DataFrame.
-    """
-    out = df.copy()
-
-    # Normalize Category for matching
-    if "Category" not in out.columns:
-        return out
-    out["Category"] = (
-        out["Category"].astype(str).str.replace("_", " ").str.strip().str.lower()
-    )
+# Per-stage timings for this rerun (None unless DRONE_PROFILE=1). Their panel is reserved
+# here so it is filled in however the run ends, st.stop() included.
+profiler = start_run()
+perf_panel = st.empty() if profiler is not None else None
 
-    # Ensure Score column exists
-    if "Score" not in out.columns:
-        out["Score"] = 0.0
-
-    # Iterate each category group and score with that category's weights
-    for cat, weights in weights_dict.items():
-        mask = out["Category"] == cat
-        if not mask.any():
-            continue
-
-        # Clear any previous score columns for this subset
-        for col in weights.keys():
-            out.loc[mask, f"{col}_Score"] = 0.0
-
-        sub = out.loc[mask].copy()
-        for col, w in weights.items():
-            if col not in sub.columns:
-                continue
-
-            # categorical mappings
-            if col == "Frame_Material":
-                sc = sub[col].map(Criteria_Scores_Frame_Material).fillna(0) * w
-            elif col == "Flight_Control_Board":
-                sc = sub[col].map(Criteria_Scores_Flight_Control_Board).fillna(0) * w
-            elif col == "MIL-STD-810G/MIL-STD-810H":
-                sc = sub[col].map(Criteria_Scores_MIL_STD).fillna(0) * w
-            else:
-                # numeric normalization within this category subset
-                s = pd.to_numeric(sub[col], errors="coerce")
-                mn, mx = s.min(), s.max()
-                if pd.isna(mn) or pd.isna(mx) or mx <= mn:
-                    norm = pd.Series(0, index=sub.index, dtype=float)
-                else:
-                    norm = (s - mn) / (mx - mn)
-                sc = norm.fillna(0) * w
-
-            out.loc[mask, f"{col}_Score"] = sc
-
-        score_cols = [f"{c}_Score" for c in weights.keys() if f"{c}_Score" in out.columns]
-        if score_cols:
-            out.loc[mask, "Score"] = out.loc[mask, score_cols].sum(axis=1).round(2)
-
-    # Optional human-readable rating from Score
-    def to_rating(x: float) -> str:
-        if pd.isna(x):
-            return ""
-        if x >= 0.85: return "★★★★★"
-        if x >= 0.70: return "★★★★"
-        if x >= 0.55: return "★★★"
-        if x >= 0.40: return "★★"
-        return "★"
-
-    out["Rating"] = out["Score"].apply(to_rating)
-    return out
-
-
-def filter_subset(data: pd.DataFrame, cat: str, bat: str, frm: str, fcb: str) -> pd.DataFrame:
-    """Apply categorical filters."""
-    sub = data.copy()
-    if "Category" in sub.columns:
-        sub["Category"] = sub["Category"].astype(str).str.replace("_", " ").str.strip().str.lower()
-
-    if cat != "All Drones" and "Category" in sub.columns:
-        sub = sub[sub["Category"] == cat.lower()]
-    if bat != "All" and "Battery_Type" in sub.columns:
-        sub = sub[sub["Battery_Type"] == bat]
-    if frm != "All" and "Frame_Material" in sub.columns:
-        sub = sub[sub["Frame_Material"] == frm]
-    if fcb != "All" and "Flight_Control_Board" in sub.columns:
-        sub = sub[sub["Flight_Control_Board"] == fcb]
-    return sub
-
-
-def dynamic_options(sub: pd.DataFrame):
-    """Return dropdown value lists (FCB, Battery, Frame) with 'All' first."""
-    fcb = ["All"]
-    bat = ["All"]
-    frm = ["All"]
-    if "Flight_Control_Board" in sub.columns:
-        fcb += sorted(sub["Flight_Control_Board"].dropna().astype(str).unique().tolist())
-    if "Battery_Type" in sub.columns:
-        bat += sorted(sub["Battery_Type"].dropna().astype(str).unique().tolist())
-    if "Frame_Material" in sub.columns:
-        frm += sorted(sub["Frame_Material"].dropna().astype(str).unique().tolist())
-    return fcb, bat, frm
-
-
-def apply_numeric_thresholds(data: pd.DataFrame, thresholds: dict) -> pd.DataFrame:
-    """Keep rows where each numeric column is >= its threshold (if threshold > 0)."""
-    out = data.copy()
-    for col, val in thresholds.items():
-        if col in out.columns and float(val) > 0:
-            s = pd.to_numeric(out[col], errors="coerce").fillna(0)
-            out = out[s >= float(val)]
-    return out
-
-
-def score_dataframe_for_selected_category(data: pd.DataFrame, category_key: str) -> pd.DataFrame:
-    """
-    Score the current filtered result using weights of the **selected** category.
-    This is independent of the global row-wise add_scores_by_category().
-    """
-    if category_key not in weights_dict:
-        return data
-
-    tmp = data.copy()
-    w = weights_dict[category_key]
-
-    for col, weight in w.items():
-        if col not in tmp.columns:
-            continue
-
-        # categorical
-        if col == "Frame_Material":
-            tmp[f"{col}_Score"] = tmp[col].map(Criteria_Scores_Frame_Material).fillna(0) * weight
-            continue
-        if col == "Flight_Control_Board":
-            tmp[f"{col}_Score"] = tmp[col].map(Criteria_Scores_Flight_Control_Board).fillna(0) * weight
-            continue
-        if col == "MIL-STD-810G/MIL-STD-810H":
-            tmp[f"{col}_Score"] = tmp[col].map(Criteria_Scores_MIL_STD).fillna(0) * weight
-            continue
-
-        # numeric
-        s = pd.to_numeric(tmp[col], errors="coerce").fillna(0)
-        mn, mx = s.min(), s.max()
-        norm = (s - mn) / (mx - mn) if mx > mn else 0
-        tmp[f"{col}_Score"] = norm * weight
-
-    score_cols = [c for c in tmp.columns if c.endswith("_Score")]
-    if score_cols:
-        tmp["Score"] = tmp[score_cols].sum(axis=1).round(2)
-        tmp = tmp.sort_values("Score", ascending=False)
-    return tmp
-
-
-def excel_download_button(df_to_export: pd.DataFrame, label="📥 Export to Excel", filename="filtered_drones.xlsx"):
-    """Render a download button for a DataFrame."""
+# ---------------- Helpers: UI utilities ----------------
+def excel_download_button(df_to_export: "pd.DataFrame", label=None, filename="filtered_drones", fmt="xlsx",
+                          cache_key=None, key=None):
+    """Render a download button for a DataFrame; the file is only built (and cached) when clicked."""
     if df_to_export is None or df_to_export.empty:
         return
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as w:
-        df_to_export.to_excel(w, index=False, sheet_name="Results")
+    spec = FORMATS[fmt]
     st.download_button(
-        label,
-        buf.getvalue(),
-        file_name=filename,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        label or f"📥 Export to {spec.name}",
+        lambda: export_bytes(df_to_export, fmt, key=cache_key),
+        file_name=f"{filename}.{spec.extension}",
+        mime=spec.mime,
+        key=key,
     )
 
 
-def plot_weights(category_key: str):
-    """Draw pie + horizontal bar charts with a shared, consistent color palette."""
-    if category_key not in weights_dict:
-        return
-
-    labels = list(weights_dict[category_key].keys())
-    values = list(weights_dict[category_key].values())
-
-    # --- consistent colors for both plots ---
-    cmap = plt.get_cmap("tab10")
-    colors = [cmap(i % cmap.N) for i in range(len(labels))]
+def plot_weights(category_key: str, weights: dict):
+    """Show the pie + horizontal bar charts (rendered once per weight vector, then cached)."""
+    png = weights_chart_png(category_key, weights)
+    if png is not None:
+        st.image(png)
 
-    fig, axs = plt.subplots(1, 2, figsize=(10, 4), dpi=110)
-    fig.suptitle(f"Influence Weights – {category_key.title()}", fontsize=13, weight="bold")
 
-    # Pie (use same colors)
-    axs[0].pie(values, autopct="%1.1f%%", startangle=90, colors=colors)
-    axs[0].set_title("Pie")
-
-    # Bar (use same colors, one per bar)
-    axs[1].barh(labels, values, color=colors)
-    axs[1].invert_yaxis()
-    axs[1].set_title("Bar")
-    axs[1].set_xlabel("Weight")
+def _render_perf_panel():
+    """Collapsible per-stage timing table for this rerun (only when profiling is on)."""
+    if profiler is None:
+        return
+    with perf_panel.container(), st.expander(f"⏱️ Performance ({profiler.total_ms():.0f} ms profiled)"):
+        st.dataframe(
+            pd.DataFrame(profiler.records, columns=["stage", "ms", "rss_delta_mb", "rss_mb"]),
+            use_container_width=True,
+        )
+        st.caption(
+            f"Ingest cache: {ingest_cache_stats()} · Query cache: {query_cache_stats()}"
+            f" · Shared datasets: {dataset_store_stats()}"
+        )
+
+
+def _stop():
+    """st.stop(), after filling in the performance panel with this rerun's stages."""
+    _render_perf_panel()
+    st.stop()
 
-    st.pyplot(fig)
 
+def _session_catalog():
+    """This session's catalog (with its updates applied), or None before an upload."""
+    handle = st.session_state.get("dataset_update") or st.session_state.get("dataset")
+    return handle.dataset if handle is not None else None
 
 
 def _update_min_inputs_from_subset():
@@ -220,21 +73,18 @@ def _update_min_inputs_from_subset():
     Auto-fill min numeric inputs based on the selected category subset.
     Called on category change and once after upload.
     """
-    if "df_scored" not in st.session_state:
+    catalog = _session_catalog()
+    if catalog is None:
         return
-    base = st.session_state.df_scored.copy()
-
-    cat = st.session_state.get("selected_category", "All Drones")
-    if cat != "All Drones" and "Category" in base.columns:
-        sub = base[base["Category"] == cat.lower()]
-    else:
-        sub = base
+    # The catalog is shared with other sessions: read the category's rows in place.
+    base = catalog.scored
+    rows = catalog.index.query(st.session_state.get("selected_category", "All Drones"))
 
-    if sub.empty:
+    if len(rows) == 0:
         return
 
     def smin(col):
-        return float(pd.to_numeric(sub[col], errors="coerce").min()) if col in sub.columns else 0.0
+        return float(pd.to_numeric(base[col].iloc[rows], errors="coerce").min()) if col in base.columns else 0.0
 
     st.session_state["min_flight_time"] = smin("Flight_Time_(min)")
     st.session_state["min_wind_resistance"] = smin("Wind_Resistance_(km/h)")
@@ -251,17 +101,63 @@ if not uploaded:
     st.info("Please upload an Excel file to continue.")
     st.stop()
 
-df_raw = pd.read_excel(uploaded)
-
-# Normalize Category for consistent matching
-if "Category" in df_raw.columns:
-    df_raw["Category"] = (
-        df_raw["Category"].astype(str).str.replace("_", " ").str.strip().str.lower()
+# ---------------- Data stack (first needed here; usually already warmed up) ----------------
+import pandas as pd  # noqa: E402
+
+from criteria_config import catalog_warnings, criteria_status, refresh_criteria  # noqa: E402
+from ingest import dataset_store_stats, open_catalog, open_updated_catalog, ingest_cache_stats  # noqa: E402
+from query import run_query, run_skyline, query_cache_stats  # noqa: E402
+from export import FORMATS, available_formats, export_bytes  # noqa: E402
+from charts import weights_chart_png  # noqa: E402
+from sensitivity import DEFAULT_SAMPLES, DEFAULT_SPREAD, analyze_sensitivity  # noqa: E402
+from skyline import default_criteria, numeric_criteria  # noqa: E402
+from similarity import MAX_LISTED_DRONES, drone_names, search_drones, similar_drones  # noqa: E402
+
+# Weights + categorical score tables: picks up edits to the DRONE_CRITERIA_FILE file.
+refresh_criteria()
+
+# Parse + compute a global score for each drone within its own category (row-wise),
+# and build the filter index. Cached by file contents and criteria, so reruns on the
+# same upload skip all of it (after a criteria edit, only changed categories are rescored).
+# Sessions uploading the same file share one catalog through their handles.
+with stage("load_catalog"):
+    st.session_state.dataset = open_catalog(uploaded.getvalue(), st.session_state.get("dataset"))
+catalog = st.session_state.dataset.dataset
+
+# Optional delta workbook (rows keyed by Manufacturer + Model; Action = "remove" drops a
+# row). Only the categories it touches are rescored; the rest keep their cached results.
+delta = st.file_uploader(
+    "🩹 Apply catalog updates (.xlsx, optional)", type=["xlsx"],
+    help="Added or changed rows replace the drone with the same Manufacturer and Model; "
+         "rows with Action = remove delete it.",
+)
+if delta:
+    with stage("update_catalog"):
+        st.session_state.dataset_update = open_updated_catalog(
+            catalog, delta.getvalue(), st.session_state.get("dataset_update")
+        )
+    catalog = st.session_state.dataset_update.dataset
+    u = catalog.update
+    st.caption(
+        f"Updates: {u.added} added, {u.changed} changed, {u.removed} removed"
+        + (f", {u.not_found} not found" if u.not_found else "")
+        + (f" · rescored: {', '.join(u.rescored)}" if u.rescored else "")
     )
-
-# Compute a global score for each drone within its own category (row-wise)
-df_scored = add_scores_by_category(df_raw)
-st.session_state.df_scored = df_scored  # keep in session for quick access
+elif st.session_state.get("dataset_update") is not None:
+    st.session_state.pop("dataset_update").release()
+df_scored = catalog.scored  # shared with other sessions: read-only
+plan = catalog.plan  # the criteria these scores were computed with
+category_options = list(plan.categories)
+
+criteria = criteria_status()
+if criteria["error"]:
+    st.error(f"Criteria file rejected, still using version {plan.version}: {criteria['error']}")
+elif criteria["source"] != "built-in":
+    st.caption(f"Criteria: {criteria['source']} · version {plan.version} (revision {criteria['revision']})")
+mismatches = catalog_warnings(catalog)
+if mismatches:
+    with st.expander(f"⚠️ Criteria vs. data: {len(mismatches)} mismatches"):
+        st.markdown("\n".join(f"- {m}" for m in mismatches))
 
 # ---------------- Init default state ----------------
 for k, v in {
@@ -294,10 +190,10 @@ c1, c2, c3, c4, c5, c6 = st.columns(6)
 with c1:
     selected_category = st.selectbox(
         "Drone Category",
-        ["All Drones"] + CATEGORY_OPTIONS,
+        ["All Drones"] + category_options,
         index=(0 if st.session_state.selected_category == "All Drones"
-               else 1 + CATEGORY_OPTIONS.index(st.session_state.selected_category)
-               if st.session_state.selected_category in CATEGORY_OPTIONS else 0),
+               else 1 + category_options.index(st.session_state.selected_category)
+               if st.session_state.selected_category in category_options else 0),
         key="selected_category",
         on_change=_update_min_inputs_from_subset,
     )
@@ -309,13 +205,9 @@ with c1:
         key="number_of_drones",
     )
 
-# Build dynamic dropdown options using category-only subset
-subset_for_opts = filter_subset(
-    df_scored,
-    st.session_state.selected_category,
-    "All", "All", "All",
-)
-fcb_opts, bat_opts, frm_opts = dynamic_options(subset_for_opts)
+# Build dynamic dropdown options using category-only subset (read from the index)
+with stage("dynamic_options"):
+    fcb_opts, bat_opts, frm_opts = catalog.index.dynamic_options(st.session_state.selected_category)
 
 with c2:
     st.number_input("Min flight time (min)", min_value=0.0, value=float(st.session_state.min_flight_time), key="min_flight_time")
@@ -374,22 +266,53 @@ if st.button("Reset Filters"):
     _update_min_inputs_from_subset()
     st.rerun()
 
+# Export format: picked before Calculate, since changing any widget reruns the script
+# and results are only rendered on the Calculate click.
+export_fmt = st.radio(
+    "Export format", available_formats(), format_func=lambda f: FORMATS[f].name,
+    horizontal=True, key="export_format",
+)
+
+# Ranking mode: weighted Score (top N) or every drone on the Pareto front of chosen criteria
+ranking_mode = st.radio("Ranking", ["Weighted score", "Pareto front"], horizontal=True, key="ranking_mode")
+if ranking_mode == "Pareto front":
+    skyline_criteria = st.multiselect(
+        "Pareto criteria (higher is better)",
+        options=numeric_criteria(plan),
+        default=default_criteria(st.session_state.selected_category, plan),
+    )
+
+# Closest alternatives to one drone (e.g. when it is out of stock), within its own category
+# (names are cached per catalog; large categories are searched instead of listed in full).
+with st.expander("🔎 Find similar drones"):
+    names = drone_names(catalog, st.session_state.selected_category)
+    if len(names) <= MAX_LISTED_DRONES:
+        drone_options = list(zip(names["Manufacturer"], names["Model"]))
+    else:
+        search = st.text_input(f"Search {len(names):,} drones (manufacturer or model)", key="similar_search")
+        drone_options = search_drones(catalog, st.session_state.selected_category, search) if search.strip() else []
+    picked = st.selectbox(
+        "Drone", drone_options, index=None, format_func=lambda mm: f"{mm[0]} {mm[1]}",
+        placeholder="Choose a drone", key="similar_to",
+    )
+    k_similar = st.number_input("How many alternatives?", min_value=1, max_value=50, value=5, key="similar_k")
+    if picked is not None:
+        with stage("similar_drones"):
+            alternatives = similar_drones(catalog, *picked, k=int(k_similar), category=st.session_state.selected_category)
+        sim_cols = [c for c in selected_columns if c in alternatives.columns] + ["Distance"]
+        st.dataframe(alternatives.loc[:, sim_cols], use_container_width=True)
+
+# Optional Monte Carlo check of how stable the top-N is under weight changes.
+with st.expander("🎲 Weight sensitivity"):
+    st.checkbox("Run with Calculate", value=False, key="run_sensitivity")
+    st.number_input("Weight samples", min_value=100, max_value=100_000, value=DEFAULT_SAMPLES, step=100, key="sensitivity_samples")
+    st.slider("Weight noise (±)", min_value=0.05, max_value=0.5, value=DEFAULT_SPREAD, step=0.05, key="sensitivity_spread")
+
 # ---------------- Calculate & Display ----------------
 st.subheader("Results")
 if st.button("Calculate"):
-    # 1) Apply categorical filters
-    sub = filter_subset(
-        df_scored,
-        st.session_state.selected_category,
-        st.session_state.selected_battery_type,
-        st.session_state.selected_frame_material,
-        st.session_state.selected_flight_control_board,
-    )
-    if sub.empty:
-        st.info("No drones for the selected categorical filters.")
-        st.stop()
-
-    # 2) Apply numeric thresholds
+    # 1-4) Categorical filters -> numeric thresholds -> rescore with the **selected
+    # category's** weights -> Top-N. Memoized per dataset + filter state (see query.py).
     thresholds = {
         "Flight_Time_(min)": st.session_state.min_flight_time,
         "Wind_Resistance_(km/h)": st.session_state.min_wind_resistance,
@@ -400,32 +323,84 @@ if st.button("Calculate"):
         "Battery_(mAh)": st.session_state.min_battery_mah,
         "Weight_(kg)": st.session_state.min_weight_kg,
     }
-    sub = apply_numeric_thresholds(sub, thresholds)
-    if sub.empty:
-        st.info("No drones meet the current numeric criteria.")
-        st.stop()
-
-    # 3) Score the filtered set using the **selected category's** weights
     cat_key = st.session_state.selected_category
-    scored = score_dataframe_for_selected_category(sub, cat_key) if cat_key in weights_dict else sub.copy()
-
-    # 4) Top-N
-    n = max(int(st.session_state.number_of_drones), 1)
-    top = scored.head(n)
+    filters = (
+        cat_key,
+        st.session_state.selected_battery_type,
+        st.session_state.selected_frame_material,
+        st.session_state.selected_flight_control_board,
+        thresholds,
+    )
+    with stage("query"):
+        if ranking_mode == "Pareto front":
+            result = run_skyline(catalog, *filters, criteria=skyline_criteria)
+        else:
+            result = run_query(catalog, *filters, max(int(st.session_state.number_of_drones), 1))
+    if result.empty_reason == "categorical":
+        st.info("No drones for the selected categorical filters.")
+        _stop()
+    if result.empty_reason == "numeric":
+        st.info("No drones meet the current numeric criteria.")
+        _stop()
+    top = result.top
+    if ranking_mode == "Pareto front":
+        st.caption(
+            f"{len(top)} drones on the Pareto front of {', '.join(skyline_criteria or default_criteria(cat_key, plan))}: "
+            "no other drone is at least as good on all of them and better on one."
+        )
 
     # 5) Display selected columns
     show_cols = [c for c in selected_columns if c in top.columns]
     view = top.loc[:, show_cols] if show_cols else top
-    st.dataframe(view, use_container_width=True)
+    with stage("render_dataframe"):
+        st.dataframe(view, use_container_width=True)
 
     # 6) Export button
-    excel_download_button(view)
+    with stage("excel_export"):
+        excel_download_button(view, fmt=export_fmt, key="export_top")
 
     # 7) Full Excel (global per-row score within each drone's own category)
     with st.expander("View full Excel (scored by own category)"):
-        st.dataframe(df_scored, use_container_width=True)
+        with stage("render_full_table"):
+            st.dataframe(df_scored, use_container_width=True)
+        excel_download_button(
+            df_scored, label=f"📥 Export full catalog ({FORMATS[export_fmt].name})", filename="scored_drones",
+            fmt=export_fmt, cache_key=(catalog.key, "scored"), key="export_full",
+        )
 
     # 8) Weight charts
-    if cat_key in weights_dict:
+    if cat_key in plan.categories:
         st.subheader("Influence Charts")
-        plot_weights(cat_key)
+        with stage("charts"):
+            plot_weights(cat_key, plan.weights_for(cat_key))
+
+    # 9) Weight sensitivity over every drone that passed the filters
+    if st.session_state.run_sensitivity and cat_key in plan.categories:
+        rows = catalog.index.apply_thresholds(
+            catalog.index.query(
+                cat_key,
+                st.session_state.selected_battery_type,
+                st.session_state.selected_frame_material,
+                st.session_state.selected_flight_control_board,
+            ),
+            thresholds,
+        )
+        with stage("sensitivity"):
+            sens = analyze_sensitivity(
+                catalog.scored.iloc[rows],
+                cat_key,
+                top_n=max(int(st.session_state.number_of_drones), 1),
+                n_samples=int(st.session_state.sensitivity_samples),
+                spread=float(st.session_state.sensitivity_spread),
+                plan=plan,
+            )
+        st.subheader("Weight Sensitivity")
+        st.caption(
+            f"{sens.n_samples:,} weight vectors, each weight ±{st.session_state.sensitivity_spread:.0%}: "
+            f"chance of staying in the top {sens.top_n} and rank spread."
+        )
+        st.dataframe(sens.drones.head(max(2 * sens.top_n, 10)), use_container_width=True)
+        st.caption("Weight range (others fixed) that keeps the same top set:")
+        st.dataframe(sens.thresholds, use_container_width=True, hide_index=True)
+
+_render_perf_panel()
@@ -0,0 +1,2 @@
+# Performance benchmarks for the scoring pipeline (run from the repo root:
+#   python -m benchmarks.run_benchmarks --help).
@@ -0,0 +1,107 @@
+# benchmarks/import_budget.py
+# ---------------- Cold-start (import time) budget check ----------------
+"""
+Time each entry point's startup in a fresh interpreter and fail when it is over budget
+or imports a heavy dependency it should load lazily.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget app=0.5 --repeats 5 -o startup.json
+
+"app" runs Drone_Selection_Tool_Code.py up to the upload prompt (what every new
+session pays for before a file arrives; background warm-up off). The other entry
+points are plain imports. Each is run --repeats times and the fastest run counts, to
+keep scheduler noise out. Exits 1 on any failure.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily (on first use) everywhere.
+LAZY = ["matplotlib", "openpyxl", "scipy", "pyarrow.parquet"]
+
+# name: (startup code, seconds, modules that must not be loaded by it)
+ENTRY_POINTS = {
+    "app": (
+        "import streamlit as st\n"
+        "class _Stop(Exception): pass\n"
+        "def _stop(): raise _Stop\n"
+        "st.stop = _stop\n"
+        "try:\n"
+        "    import Drone_Selection_Tool_Code\n"
+        "except _Stop:\n"
+        "    pass\n",
+        1.0,
+        ["pandas", "numpy", "pyarrow", *LAZY],
+    ),
+    "server": ("import server\n", 1.5, ["streamlit", *LAZY]),
+    "score_catalogs": ("import score_catalogs\n", 1.5, ["streamlit", *LAZY]),
+    "scoring": ("import scoring\n", 1.5, ["streamlit", *LAZY]),
+}
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+{code}
+print(json.dumps({{"seconds": time.perf_counter() - t0, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(code: str) -> dict:
+    env = dict(os.environ, DRONE_WARM_UP="0", DRONE_PROFILE="0")
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=code)],
+        cwd=REPO, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def check(name: str, code: str, budget: float, forbidden: list, repeats: int) -> dict:
+    runs = [measure(code) for _ in range(repeats)]
+    seconds = min(r["seconds"] for r in runs)
+    loaded = set(runs[0]["modules"])
+    eager = [m for m in forbidden if m in loaded]
+    return {
+        "entry_point": name,
+        "seconds": round(seconds, 4),
+        "budget": budget,
+        "eager_imports": eager,
+        "ok": seconds <= budget and not eager,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Fail when startup import time regresses.")
+    ap.add_argument("--budget", action="append", default=[], metavar="NAME=SECONDS",
+                    help=f"Override a budget ({', '.join(f'{k}={v[1]}' for k, v in ENTRY_POINTS.items())})")
+    ap.add_argument("--only", nargs="+", choices=list(ENTRY_POINTS), help="Check only these entry points")
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    budgets = {name: spec[1] for name, spec in ENTRY_POINTS.items()}
+    for item in args.budget:
+        name, _, value = item.partition("=")
+        if name not in budgets:
+            ap.error(f"unknown entry point {name!r}")
+        budgets[name] = float(value)
+
+    results = []
+    for name in args.only or ENTRY_POINTS:
+        code, _, forbidden = ENTRY_POINTS[name]
+        r = check(name, code, budgets[name], forbidden, args.repeats)
+        results.append(r)
+        status = "ok" if r["ok"] else "FAIL"
+        eager = f"  eager: {', '.join(r['eager_imports'])}" if r["eager_imports"] else ""
+        print(f"{name:<16} {r['seconds'] * 1000:8.1f} ms  (budget {r['budget'] * 1000:.0f} ms)  {status}{eager}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"python": sys.version.split()[0], "results": results}, fh, indent=2)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# benchmarks/load_test.py
+# ---------------- Load test for the HTTP scoring API ----------------
+"""
+Fire concurrent /query requests at server.py and report throughput and latency.
+
+    python -m benchmarks.load_test --catalog Drones_All_Together.xlsx --requests 5000 --concurrency 16
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --requests 20000
+
+Without --url an instance is started in-process on a free port. Queries are drawn
+from a fixed pool (categories x minimums); --pool controls how many distinct ones
+there are, i.e. how often the server's caches hit.
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from criteria_data import CATEGORY_OPTIONS
+
+MINIMUMS = {
+    "Flight_Time_(min)": [0, 10, 20, 30],
+    "Battery_(mAh)": [0, 2000, 5000],
+    "Weight_(kg)": [0, 0.5, 2],
+}
+
+
+def query_pool(size: int, seed: int) -> list:
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(size):
+        pool.append({
+            "category": rng.choice(CATEGORY_OPTIONS + ["All Drones"]),
+            "n": rng.choice([5, 10, 20]),
+            "thresholds": {col: rng.choice(vals) for col, vals in MINIMUMS.items()},
+        })
+    return pool
+
+
+def _worker(host: str, port: int, bodies: list, latencies: list, errors: list):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for body in bodies:
+        payload = json.dumps(body)
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/query", payload, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(type(exc).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def run_load(host: str, port: int, n_requests: int, concurrency: int, pool: list, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    bodies = [rng.choice(pool) for _ in range(n_requests)]
+    shards = [bodies[i::concurrency] for i in range(concurrency)]
+    latencies, errors = [], []
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for fut in [ex.submit(_worker, host, port, shard, latencies, errors) for shard in shards]:
+            fut.result()
+    elapsed = time.perf_counter() - t0
+    lat = sorted(latencies)
+
+    def pct(q):
+        return lat[min(int(q * len(lat)), len(lat) - 1)] * 1000
+
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(n_requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(lat) * 1000, 2),
+        "p50_ms": round(pct(0.50), 2),
+        "p95_ms": round(pct(0.95), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "max_ms": round(lat[-1] * 1000, 2),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Load-test the HTTP scoring API.")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Running server, e.g. http://127.0.0.1:8000")
+    target.add_argument("--catalog", nargs="+", help="Start a local server on these workbooks")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--pool", type=int, default=200, help="Distinct queries to draw from")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    server = None
+    if args.catalog:
+        from server import make_server
+
+        server = make_server(args.catalog, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = "127.0.0.1", server.server_port
+    else:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+
+    try:
+        report = run_load(host, port, args.requests, args.concurrency, query_pool(args.pool, args.seed), args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# benchmarks/run_benchmarks.py
+# ---------------- Per-stage time / peak-memory benchmarks ----------------
+"""
+Time each pipeline stage on synthetic catalogs of increasing size and save JSON.
+
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 1000000 -o bench.json
+    python -m benchmarks.run_benchmarks --compare bench_main.json --tolerance 0.25
+    python -m benchmarks.run_benchmarks --sizes 1000000 --workers 2 4 8
+
+With --compare, exits 1 when any stage is slower than the baseline by more than
+the tolerance (median seconds; rows/stage pairs missing from either side are skipped).
+Peak memory comes from one extra run under tracemalloc, which sees NumPy/pandas
+buffers but not Arrow-backed allocations.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_catalog
+from export import available_formats, render_export
+from filter_index import THRESHOLD_COLUMNS, FilterIndex
+from ingest import canonicalize
+from parallel_scoring import score_by_category_parallel
+from skyline import pareto_front
+from scoring import (
+    add_scores_by_category,
+    apply_numeric_thresholds,
+    filter_subset,
+    score_dataframe_for_selected_category,
+)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# A typical Calculate: one category, one dropdown filter, a couple of minimums.
+QUERY = dict(cat="agricultural", bat="Li-Po", frm="All", fcb="All")
+# "Not dominated on flight time, range, payload and wind resistance".
+SKYLINE_CRITERIA = ["Flight_Time_(min)", "Transmitter_Range_(km)", "Weight-Lifting_Capacity_(kg)", "Wind_Resistance_(km/h)"]
+THRESHOLDS = {col: 0.0 for col in THRESHOLD_COLUMNS} | {"Flight_Time_(min)": 20.0, "Battery_(mAh)": 5000.0}
+
+
+def measure(fn, repeats: int):
+    """(median seconds, peak traced MiB, result): timed runs plus one traced run for memory."""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    # tracemalloc slows Python-heavy code (openpyxl) a lot, so it never overlaps timing.
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak / 2**20, result
+
+
+def bench_size(n_rows: int, repeats: int, export_max_rows: int, seed: int, workers=()) -> list:
+    tidy = generate_catalog(n_rows, seed=seed)
+    results = []
+
+    def record(stage, fn, rows=n_rows):
+        seconds, peak_mb, out = measure(fn, repeats)
+        results.append({"stage": stage, "rows": rows, "seconds": seconds, "peak_mb": round(peak_mb, 2)})
+        print(f"{n_rows:>10,} {stage:<44} {seconds * 1000:10.1f} ms {peak_mb:10.1f} MiB", flush=True)
+        return out
+
+    # Later stages run on the compact frame, as load_catalog() hands it to the app.
+    raw = record("canonicalize", lambda: canonicalize(tidy.copy()))
+    scored = canonicalize(record("add_scores_by_category", lambda: add_scores_by_category(raw, workers=0)))
+    for w in workers:
+        # Pool start-up happens once per process, outside the timed runs.
+        score_by_category_parallel(raw.head(1000), w)
+        record(f"add_scores_by_category_parallel_w{w}", lambda: score_by_category_parallel(raw, w))
+    sub = record("filter_subset", lambda: filter_subset(scored, **QUERY))
+    sub = record("apply_numeric_thresholds", lambda: apply_numeric_thresholds(sub, THRESHOLDS))
+    record("score_dataframe_for_selected_category",
+           lambda: score_dataframe_for_selected_category(sub, QUERY["cat"]))
+    record("score_dataframe_for_selected_category_top5",
+           lambda: score_dataframe_for_selected_category(sub, QUERY["cat"], top=5))
+    index = record("filter_index_build", lambda: FilterIndex(scored))
+    record("filter_index_query",
+           lambda: index.apply_thresholds(index.query(**QUERY), THRESHOLDS))
+    record("pareto_front_4d", lambda: pareto_front(scored, SKYLINE_CRITERIA))
+    # What excel_download_button() builds on click (uncached).
+    if n_rows <= export_max_rows:
+        record("excel_download_button", lambda: render_export(scored, "xlsx"))
+    for fmt in available_formats():
+        if fmt != "xlsx":
+            record(f"export_{fmt}", lambda: render_export(scored, fmt))
+    return results
+
+
+def compare(current: list, baseline_path: str, tolerance: float) -> list:
+    """Stages slower than baseline * (1 + tolerance)."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {(r["stage"], r["rows"]): r for r in json.load(fh)["results"]}
+    regressions = []
+    for r in current:
+        base = baseline.get((r["stage"], r["rows"]))
+        if base and r["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append({**r, "baseline_seconds": base["seconds"]})
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the drone scoring pipeline.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes (rows)")
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--export-max-rows", type=int, default=20_000,
+                    help="Skip the (slow) XLSX export stage above this size")
+    ap.add_argument("--workers", type=int, nargs="*", default=[],
+                    help="Also time process-pool scoring with these worker counts")
+    ap.add_argument("-o", "--output", default="bench_results.json")
+    ap.add_argument("--compare", help="Baseline JSON to check for regressions")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = ap.parse_args(argv)
+
+    results = []
+    for n in args.sizes:
+        results += bench_size(n, args.repeats, args.export_max_rows, args.seed, args.workers)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"saved {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} @ {r['rows']:,} rows: "
+                  f"{r['seconds']:.4f}s vs {r['baseline_seconds']:.4f}s", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
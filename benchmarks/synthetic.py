@@ -0,0 +1,91 @@
+# benchmarks/synthetic.py
+# ---------------- Synthetic catalogs following the Drones_All_Together.xlsx schema ----------------
+"""
+Generate catalogs of any size by bootstrapping the shipped workbook per category:
+category mix, types, battery types, frame materials and flight control boards keep
+the observed frequencies, numeric specs are jittered (log-normal) around real drones.
+
+    python -m benchmarks.synthetic --rows 100000 -o synthetic_100k.parquet
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SEED_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Drones_All_Together.xlsx")
+
+NUMERIC_COLUMNS = {
+    # column: decimals kept after jitter
+    "Flight_Time_(min)": 0,
+    "Wind_Resistance_(km/h)": 1,
+    "Weight-Lifting_Capacity_(kg)": 2,
+    "Max_Speed_(km/h)": 1,
+    "Transmitter_Range_(km)": 1,
+    "Camera_Resolution_(MP)": 0,
+    "Battery_(mAh)": 0,
+    "Weight_(kg)": 2,
+}
+# Columns re-drawn from the whole catalog for a share of rows, so combinations
+# beyond the seed rows appear (frames/FCBs that no real drone of a category uses).
+REMIX_COLUMNS = ["Battery_Type", "Frame_Material", "Flight_Control_Board"]
+
+_seed_cache = {}
+
+
+def _seed(path: str) -> pd.DataFrame:
+    if path not in _seed_cache:
+        _seed_cache[path] = pd.read_excel(path)
+    return _seed_cache[path]
+
+
+def generate_catalog(
+    n_rows: int, seed: int = 0, jitter: float = 0.15, remix: float = 0.05, seed_catalog: str = SEED_CATALOG
+) -> pd.DataFrame:
+    """A synthetic catalog of `n_rows` drones with the seed workbook's columns and raw labels."""
+    rng = np.random.default_rng(seed)
+    base = _seed(seed_catalog)
+
+    # Category mix as observed, then bootstrap rows within each category.
+    cats = base["Category"].to_numpy()
+    uniq, counts = np.unique(cats, return_counts=True)
+    chosen = rng.choice(len(uniq), size=n_rows, p=counts / counts.sum())
+    members = [np.flatnonzero(cats == c) for c in uniq]
+    rows = np.empty(n_rows, dtype=np.intp)
+    for k, idx in enumerate(members):
+        sel = chosen == k
+        rows[sel] = rng.choice(idx, size=int(sel.sum()))
+
+    out = base.iloc[rows].reset_index(drop=True)
+    out["Model"] = out["Model"].astype(str) + "-" + pd.Series(np.arange(n_rows)).astype(str)
+    for col, decimals in NUMERIC_COLUMNS.items():
+        vals = out[col].to_numpy(dtype=float) * rng.lognormal(0.0, jitter, n_rows)
+        out[col] = np.round(vals, decimals).astype(int) if decimals == 0 else np.round(vals, decimals)
+    for col in REMIX_COLUMNS:
+        swap = rng.random(n_rows) < remix
+        out.loc[swap, col] = rng.choice(base[col].to_numpy(), size=int(swap.sum()))
+    return out
+
+
+def write_catalog(df: pd.DataFrame, path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        df.to_parquet(path, index=False)
+    elif ext == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate a synthetic drone catalog.")
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", required=True, help=".xlsx, .csv or .parquet")
+    args = ap.parse_args(argv)
+    write_catalog(generate_catalog(args.rows, seed=args.seed), args.output)
+    print(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# caching.py
+# ---------------- Small in-process caches shared across Streamlit reruns ----------------
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used mapping.
+    Bounded by entry count and, optionally, by total size in bytes as reported by `sizeof`.
+    Keeps hit/miss/eviction counters so callers can surface cache effectiveness.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int | None = None, sizeof=None):
+        self.max_entries = max(int(max_entries), 1)
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        """Return the cached value (marking it most recently used) or `default`."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Insert/replace a value and evict least-recently-used entries past the bounds."""
+        size = int(self._sizeof(value))
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._sizes.pop(key)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            self._evict()
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, compute())
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self.total_bytes -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self):
+        # Never evict the entry that was just inserted, even if it alone exceeds max_bytes.
+        while len(self._data) > 1 and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            old_key, _ = self._data.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(old_key)
+            self.evictions += 1
+
+
+# ---------------- Hashing helpers ----------------
+def content_hash(*parts) -> str:
+    """SHA-256 over the given bytes/str parts (str parts are UTF-8 encoded)."""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode("utf-8") if isinstance(p, str) else bytes(p))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def frame_nbytes(*frames) -> int:
+    """Deep memory footprint of one or more DataFrames (None entries are ignored)."""
+    return int(sum(f.memory_usage(deep=True).sum() for f in frames if f is not None))
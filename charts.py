@@ -0,0 +1,73 @@
+# charts.py
+# ---------------- Memoized influence-weight charts ----------------
+"""
+The weight charts only depend on a category's weight vector, so each one is rendered
+once to PNG bytes and served from an LRU afterwards. Figures are built with the
+object-oriented matplotlib API (never registered with pyplot) and cleared right after
+rendering, so long-running servers do not accumulate figures.
+"""
+import io
+import json
+import os
+
+from caching import LRUCache, content_hash
+from scoring import active_plan
+
+_chart_cache = LRUCache(max_entries=64, sizeof=len)
+
+
+def _render_weights_png(category_key: str, labels: list, values: list) -> bytes:
+    from matplotlib import colormaps
+    from matplotlib.figure import Figure
+
+    # --- consistent colors for both plots ---
+    cmap = colormaps["tab10"]
+    colors = [cmap(i % cmap.N) for i in range(len(labels))]
+
+    fig = Figure(figsize=(10, 4), dpi=110)
+    try:
+        axs = fig.subplots(1, 2)
+        fig.suptitle(f"Influence Weights – {category_key.title()}", fontsize=13, weight="bold")
+
+        # Pie (use same colors)
+        axs[0].pie(values, autopct="%1.1f%%", startangle=90, colors=colors)
+        axs[0].set_title("Pie")
+
+        # Bar (use same colors, one per bar)
+        axs[1].barh(labels, values, color=colors)
+        axs[1].invert_yaxis()
+        axs[1].set_title("Bar")
+        axs[1].set_xlabel("Weight")
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+def weights_chart_png(category_key: str, weights: dict | None = None) -> bytes | None:
+    """Pie + horizontal bar PNG for a category's weights (default: active criteria; None for unknown categories)."""
+    weights = active_plan().weights_for(category_key) if weights is None else weights
+    if not weights:
+        return None
+    key = (category_key, content_hash(json.dumps(weights))[:16])
+    return _chart_cache.get_or_compute(
+        key, lambda: _render_weights_png(category_key, list(weights.keys()), list(weights.values()))
+    )
+
+
+def chart_cache_stats() -> dict:
+    return _chart_cache.stats()
+
+
+def warm_up():
+    """
+    Import matplotlib, load (on a fresh machine: build) its font cache and render one
+    throwaway chart, so the first real chart doesn't pay for any of it.
+    """
+    os.environ.setdefault("MPLBACKEND", "Agg")  # never probe for GUI backends
+    from matplotlib import font_manager
+
+    font_manager.findfont(font_manager.FontProperties())
+    _render_weights_png("warm-up", ["a", "b"], [0.5, 0.5])
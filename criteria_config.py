@@ -0,0 +1,318 @@
+# criteria_config.py
+# ---------------- External criteria file: validated, compiled, hot-reloaded ----------------
+"""
+Weights and categorical score tables from a JSON, TOML or YAML file instead of
+criteria_data.py, so they can change without a redeploy:
+
+    {"weights": {"fpv": {"Flight_Time_(min)": 0.15, "Frame_Material": 0.05, ...}, ...},
+     "scores":  {"Frame_Material": {"Carbon Fiber": 1.0, ...}, ...}}
+
+"scores" may be left out to keep the built-in tables. A file is validated (each
+category's weights sum to 1, weights and scores lie in [0, 1]), compiled once into an
+immutable ScoringPlan and swapped in whole with scoring.set_active_plan(). With
+DRONE_CRITERIA_FILE set, refresh_criteria() re-checks the file at most every
+DRONE_CRITERIA_POLL_SECONDS and reloads it when it changed; a file that fails
+validation is reported and the current plan stays active.
+
+Caches are keyed on the plan's versions: a content hash of the whole plan and one per
+category, so an edit to one category's weights only invalidates that category.
+
+    python criteria_config.py criteria.toml --check Drones_All_Together.xlsx
+    python criteria_config.py --dump criteria.json    # the built-in criteria, to start from
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from caching import LRUCache
+from criteria_data import weights_dict
+from scoring import (
+    CATEGORICAL_SCORES,
+    ScoringPlan,
+    active_plan,
+    compile_scoring_plan,
+    normalize_category,
+    set_active_plan,
+)
+
+CRITERIA_FILE = os.environ.get("DRONE_CRITERIA_FILE") or None
+CRITERIA_POLL_SECONDS = float(os.environ.get("DRONE_CRITERIA_POLL_SECONDS", "2"))
+WEIGHT_TOLERANCE = 1e-6
+MAX_LISTED = 10  # values named per check_dataset() warning
+
+log = logging.getLogger("drone_selection.criteria")
+
+
+class CriteriaError(ValueError):
+    """A criteria file that cannot be parsed or fails validation; `problems` lists why."""
+
+    def __init__(self, source: str, problems: list):
+        super().__init__(f"{source}: " + "; ".join(problems))
+        self.problems = problems
+
+
+# ---------------- Parsing + validation ----------------
+def parse_criteria(text: str, fmt: str) -> dict:
+    """The document in a criteria file ("json", "toml", "yaml" or "yml")."""
+    if fmt == "json":
+        return json.loads(text)
+    if fmt == "toml":
+        import tomllib
+
+        return tomllib.loads(text)
+    if fmt in ("yaml", "yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise CriteriaError(fmt, ["YAML criteria files need PyYAML (pip install pyyaml)"]) from None
+        return yaml.safe_load(text)
+    raise CriteriaError(fmt, [f"unsupported format {fmt!r}; use .json, .toml or .yaml"])
+
+
+def _number(value) -> float | None:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(value)
+
+
+def validate_criteria(doc, source: str = "criteria") -> tuple:
+    """(weights, tables) from a parsed criteria document; CriteriaError listing every problem."""
+    if not isinstance(doc, dict) or not isinstance(doc.get("weights"), dict) or not doc["weights"]:
+        raise CriteriaError(source, ['expected a "weights" table of {category: {criterion: weight}}'])
+    problems = []
+    weights = {}
+    # Keys are matched against the data's normalized Category, so they go through the
+    # same normalization ("Surveillance_And_Security" -> "surveillance and security").
+    names = normalize_category(pd.Series([str(c) for c in doc["weights"]], dtype=object))
+    spelled = {}
+    for category, name in zip(doc["weights"], names):
+        spelled.setdefault(name, []).append(str(category))
+    for name, keys in spelled.items():
+        if len(keys) > 1:
+            problems.append(f"weights: {', '.join(map(repr, keys))} are the same category {name!r}")
+    for (category, w), name in zip(doc["weights"].items(), names):
+        if not isinstance(w, dict) or not w:
+            problems.append(f"weights.{category}: expected a non-empty table of {{criterion: weight}}")
+            continue
+        values = {col: _number(val) for col, val in w.items()}
+        bad = [col for col, val in values.items() if val is None or not 0 <= val <= 1]
+        if bad:
+            problems.append(f"weights.{category}: {', '.join(bad)} must be numbers between 0 and 1")
+            continue
+        total = math.fsum(values.values())
+        if abs(total - 1) > WEIGHT_TOLERANCE:
+            problems.append(f"weights.{category}: weights sum to {total:g}, not 1")
+        weights[name] = values
+
+    tables = dict(CATEGORICAL_SCORES)
+    scores = doc.get("scores", {})
+    if not isinstance(scores, dict):
+        problems.append('"scores" must be a table of {criterion: {value: score}}')
+        scores = {}
+    for col, table in scores.items():
+        if not isinstance(table, dict) or not table:
+            problems.append(f"scores.{col}: expected a non-empty table of {{value: score}}")
+            continue
+        values = {str(v): _number(s) for v, s in table.items()}
+        bad = [v for v, s in values.items() if s is None or not 0 <= s <= 1]
+        if bad:
+            problems.append(f"scores.{col}: {', '.join(map(repr, bad))} must be numbers between 0 and 1")
+            continue
+        tables[col] = values
+
+    unknown = sorted(set(doc) - {"weights", "scores"})
+    if unknown:
+        problems.append(f"unknown top-level keys {unknown}")
+    if problems:
+        raise CriteriaError(source, problems)
+    return weights, tables
+
+
+def load_criteria(path: str) -> ScoringPlan:
+    """Parse, validate and compile a criteria file (format from its extension)."""
+    fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, "r", encoding="utf-8") as fh:
+        text = fh.read()
+    try:
+        doc = parse_criteria(text, fmt)
+    except CriteriaError:
+        raise
+    except Exception as exc:  # json/toml/yaml syntax errors
+        raise CriteriaError(path, [f"cannot parse {fmt.upper()}: {exc}"]) from None
+    return compile_scoring_plan(*validate_criteria(doc, path))
+
+
+def check_dataset(df, plan: ScoringPlan | None = None) -> list:
+    """
+    Mismatches between a plan and a catalog frame, as readable warnings: categories with
+    no weights, weighted criteria missing from the columns, and categorical values with
+    no score (they score 0).
+    """
+    plan = plan or active_plan()
+    warnings = []
+    if "Category" in df.columns:
+        counts = normalize_category(df["Category"].dropna()).value_counts()
+        for category, rows in counts.items():
+            if category not in plan.categories:
+                warnings.append(f"Category {category!r} ({rows} rows) has no weights; its drones are not scored")
+    for category in plan.categories:
+        missing = [col for col in plan.weights_for(category) if col not in df.columns]
+        if missing:
+            warnings.append(f"{category}: criteria {', '.join(missing)} are not in the dataset")
+    used = {plan.criteria[j] for j in range(len(plan.criteria)) if plan.uses[:, j].any()}
+    for col, table in plan.lookup_tables.items():
+        if col not in used or col not in df.columns:
+            continue
+        counts = df[col].dropna().astype(str).value_counts()
+        unscored = counts[~counts.index.isin(list(table))]
+        if len(unscored):
+            shown = ", ".join(map(repr, unscored.index[:MAX_LISTED]))
+            more = f" and {len(unscored) - MAX_LISTED} more" if len(unscored) > MAX_LISTED else ""
+            warnings.append(
+                f"{col}: {len(unscored)} values in {unscored.sum()} rows have no score (counted as 0): {shown}{more}"
+            )
+    return warnings
+
+
+_warnings_cache = LRUCache(max_entries=32)
+
+
+def catalog_warnings(catalog) -> list:
+    """check_dataset() for an ingest.Catalog against its own criteria, cached per version."""
+    plan = catalog.plan or active_plan()
+    return _warnings_cache.get_or_compute(
+        (catalog.key, plan.version), lambda: check_dataset(catalog.scored, plan)
+    )
+
+
+# ---------------- Hot reload ----------------
+class CriteriaWatcher:
+    """
+    Tracks one criteria file and keeps the active plan in sync with it.
+    refresh() is cheap enough to call on every request: it stats the file at most
+    every `poll_seconds` and only re-reads it when its mtime or size changed.
+    """
+
+    def __init__(self, path: str | None, poll_seconds: float = CRITERIA_POLL_SECONDS):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.revision = 0  # bumped each time a different plan is swapped in
+        self.error = None
+        self.loaded_at = None
+        self._stamp = None
+        self._checked_at = -math.inf
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> ScoringPlan:
+        """The active plan, after reloading the file if it changed (or `force`)."""
+        if self.path is None:
+            return active_plan()
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.poll_seconds:
+            return active_plan()
+        with self._lock:
+            if not force and now - self._checked_at < self.poll_seconds:
+                return active_plan()
+            self._checked_at = now
+            try:
+                st = os.stat(self.path)
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError as exc:
+                stamp = None
+                self.error = f"{self.path}: {exc.strerror or exc}"
+            if stamp is not None and (force or stamp != self._stamp):
+                self._stamp = stamp
+                self._load()
+            return active_plan()
+
+    def _load(self):
+        try:
+            plan = load_criteria(self.path)
+        except (OSError, CriteriaError) as exc:
+            self.error = str(exc)
+            log.warning("criteria file rejected, keeping version %s: %s", active_plan().version, exc)
+            return
+        self.error = None
+        self.loaded_at = time.time()
+        if plan.version != active_plan().version:
+            set_active_plan(plan)
+            self.revision += 1
+            log.info("criteria version %s active (revision %d, %s)", plan.version, self.revision, self.path)
+
+    def status(self) -> dict:
+        plan = active_plan()
+        return {
+            "source": self.path or "built-in",
+            "version": plan.version,
+            "revision": self.revision,
+            "loaded_at": self.loaded_at,
+            "error": self.error,
+            "categories": dict(zip(plan.categories, plan.category_versions)),
+        }
+
+
+_watcher = CriteriaWatcher(CRITERIA_FILE)
+
+
+def watch_criteria(path: str | None, poll_seconds: float = CRITERIA_POLL_SECONDS) -> ScoringPlan:
+    """Track `path` instead of DRONE_CRITERIA_FILE (None: back to the built-in criteria)."""
+    global _watcher
+    _watcher = CriteriaWatcher(path, poll_seconds)
+    if path is None:
+        set_active_plan(compile_scoring_plan())
+        return active_plan()
+    plan = refresh_criteria(force=True)
+    if _watcher.error:
+        raise CriteriaError(path, [_watcher.error])
+    return plan
+
+
+def refresh_criteria(force: bool = False) -> ScoringPlan:
+    """The active plan, reloading the watched criteria file first if it changed."""
+    return _watcher.refresh(force)
+
+
+def criteria_status() -> dict:
+    """Source, version, revision and last error of the active criteria."""
+    return _watcher.status()
+
+
+# ---------------- CLI ----------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Validate a criteria file, or write out the built-in one.")
+    ap.add_argument("path", nargs="?", help="Criteria file (.json, .toml, .yaml)")
+    ap.add_argument("--check", metavar="WORKBOOK", help="Also check the criteria against a catalog workbook")
+    ap.add_argument("--dump", metavar="OUT.json", help="Write the built-in criteria as JSON and exit")
+    args = ap.parse_args(argv)
+
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as fh:
+            json.dump({"weights": weights_dict, "scores": CATEGORICAL_SCORES}, fh, indent=2, ensure_ascii=False)
+        print(f"wrote {args.dump}")
+        return 0
+    try:
+        plan = load_criteria(args.path) if args.path else compile_scoring_plan()
+    except CriteriaError as exc:
+        for problem in exc.problems:
+            print(f"error: {problem}", file=sys.stderr)
+        return 1
+    print(f"version {plan.version}")
+    for category, version in zip(plan.categories, plan.category_versions):
+        print(f"  {category:<30} {version}")
+    if args.check:
+        from ingest import read_catalog_file
+
+        for warning in check_dataset(read_catalog_file(args.check), plan):
+            print(f"warning: {warning}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
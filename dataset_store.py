@@ -0,0 +1,181 @@
+# dataset_store.py
+# ---------------- Shared, reference-counted datasets across sessions ----------------
+"""
+One copy of each dataset (an ingest.Catalog) per process, however many sessions use it.
+
+Sessions hold DatasetHandles, not frames: acquire() pins the entry for `key` (building
+it once if missing, even when many sessions ask at the same time), and a handle is
+released by release() or when it is garbage-collected, e.g. together with the
+Streamlit session that kept it. Unpinned entries stay for DRONE_DATASET_IDLE_SECONDS
+in case they are reopened, and go earlier, least recently used first, while the store
+is over DRONE_DATASET_STORE_MB. Pinned entries are never evicted.
+
+The datasets are shared: treat them as read-only (derive new frames instead of
+writing into them). A store built with `view` hands each handle view(dataset) rather
+than the dataset itself; ingest uses it to give sessions shallow copies of a catalog's
+frames, so under pandas copy-on-write their writes never reach the shared frames.
+stats() reports how much memory sharing saves compared with one
+copy per handle.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+DATASET_STORE_MB = int(os.environ.get("DRONE_DATASET_STORE_MB", "1024"))
+DATASET_IDLE_SECONDS = float(os.environ.get("DRONE_DATASET_IDLE_SECONDS", "600"))
+
+
+class DatasetHandle:
+    """A session's reference to a shared dataset; `dataset` is valid until release()."""
+
+    def __init__(self, store: "DatasetStore", key, dataset):
+        self.key = key
+        self.dataset = dataset
+        self._store = store
+        # Finalizers may run inside garbage collection, even while the store's lock is
+        # held, so they only queue the release; the store applies it under its lock.
+        self._finalizer = weakref.finalize(self, store._released.append, key)
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+    def release(self):
+        """Drop this reference (idempotent); the store may then evict the dataset."""
+        if self._finalizer.alive:
+            self._finalizer()
+            self._store.evict_idle()
+
+
+@dataclass
+class _Entry:
+    dataset: object
+    nbytes: int
+    refs: int = 0
+    last_used: float = 0.0
+
+
+class DatasetStore:
+    """
+    Reference-counted datasets by key. `sizeof(dataset)` gives the bytes counted
+    against `max_bytes` (a `nbytes` attribute by default); `view(dataset)` is what a
+    handle gets (the dataset itself by default).
+    """
+
+    def __init__(self, max_bytes: int | None = DATASET_STORE_MB * 1024 * 1024,
+                 idle_seconds: float = DATASET_IDLE_SECONDS, sizeof=None, clock=time.monotonic,
+                 view=None):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._sizeof = sizeof or (lambda dataset: dataset.nbytes)
+        self._clock = clock
+        self._view = view or (lambda dataset: dataset)
+        self._entries: OrderedDict = OrderedDict()  # least recently used first
+        self._building: dict = {}
+        self._released = deque()  # keys of released handles, applied by _apply_releases()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, key, build) -> DatasetHandle:
+        """A handle on the dataset for `key`, calling build() only if no one has it yet."""
+        handle = self._pin(key)
+        if handle is not None:
+            return handle
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        try:
+            with build_lock:  # concurrent first requests for a key wait for one build
+                handle = self._pin(key)
+                if handle is None:
+                    dataset = build()
+                    with self._lock:
+                        self.misses += 1
+                        self._entries[key] = _Entry(dataset, int(self._sizeof(dataset)))
+                        self.total_bytes += self._entries[key].nbytes
+                        handle = self._pin_locked(key)
+                        self._evict()
+        finally:
+            with self._lock:
+                self._building.pop(key, None)
+        return handle
+
+    def reacquire(self, handle: DatasetHandle | None, key, build) -> DatasetHandle:
+        """`handle` if it still holds `key`; otherwise a handle on `key`, releasing `handle`."""
+        if handle is not None and handle.key == key and not handle.released:
+            with self._lock:
+                self._entries[key].last_used = self._clock()
+            return handle
+        new = self.acquire(key, build)
+        if handle is not None:
+            handle.release()
+        return new
+
+    def _pin(self, key) -> DatasetHandle | None:
+        with self._lock:
+            self._apply_releases()
+            if key not in self._entries:
+                return None
+            self.hits += 1
+            return self._pin_locked(key)
+
+    def _pin_locked(self, key) -> DatasetHandle:
+        entry = self._entries[key]
+        entry.refs += 1
+        entry.last_used = self._clock()
+        self._entries.move_to_end(key)
+        return DatasetHandle(self, key, self._view(entry.dataset))
+
+    def _apply_releases(self):
+        now = self._clock()
+        while self._released:
+            entry = self._entries.get(self._released.popleft())
+            if entry is not None:
+                entry.refs -= 1
+                entry.last_used = now
+
+    def _evict(self):
+        # Only unpinned entries go: idle ones first, then LRU ones while over budget.
+        self._apply_releases()
+        now = self._clock()
+        idle = [k for k, e in self._entries.items() if e.refs <= 0 and now - e.last_used >= self.idle_seconds]
+        unpinned = (k for k, e in list(self._entries.items()) if e.refs <= 0 and k not in idle)
+        for key in idle:
+            self._drop(key)
+        while self.max_bytes is not None and self.total_bytes > self.max_bytes:
+            key = next(unpinned, None)
+            if key is None:
+                break
+            self._drop(key)
+
+    def _drop(self, key):
+        self.total_bytes -= self._entries.pop(key).nbytes
+        self.evictions += 1
+
+    def evict_idle(self):
+        """Apply releases and evict idle entries now (otherwise done on the next acquire)."""
+        with self._lock:
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._evict()
+            entries = list(self._entries.values())
+            handles = sum(e.refs for e in entries)
+            saved = sum(e.nbytes * (e.refs - 1) for e in entries if e.refs > 1)
+            return {
+                "entries": len(entries),
+                "pinned": sum(e.refs > 0 for e in entries),
+                "handles": handles,
+                "bytes": self.total_bytes,
+                # Memory one copy per handle would need on top of what the store holds.
+                "saved_bytes": saved,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,131 @@
+# export.py
+# ---------------- Lazy, cached table exports (XLSX / CSV / Parquet) ----------------
+"""
+Bytes for the download buttons are built only when asked for and cached by
+(content, format), so reruns that never download cost nothing and repeated
+downloads of the same table are free.
+
+Writers walk the frame in row slices instead of materializing an object copy of
+the whole table: XLSX goes through openpyxl's write-only (streaming) workbook,
+CSV is appended slice by slice and Parquet is written one row group per slice, so
+only a slice is ever converted to Arrow at a time.
+"""
+import importlib.util
+import io
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from caching import LRUCache, content_hash
+
+EXPORT_CACHE_ENTRIES = int(os.environ.get("DRONE_EXPORT_CACHE_ENTRIES", "16"))
+EXPORT_CACHE_MB = int(os.environ.get("DRONE_EXPORT_CACHE_MB", "256"))
+EXPORT_CHUNK_ROWS = 10_000
+
+# Parquet export is optional; pyarrow.parquet is only imported when a Parquet file is built.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    name: str
+    extension: str
+    mime: str
+
+
+FORMATS = {
+    "xlsx": ExportFormat("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ExportFormat("CSV", "csv", "text/csv"),
+    "parquet": ExportFormat("Parquet", "parquet", "application/vnd.apache.parquet"),
+}
+
+_export_cache = LRUCache(
+    max_entries=EXPORT_CACHE_ENTRIES,
+    max_bytes=EXPORT_CACHE_MB * 1024 * 1024,
+    sizeof=len,
+)
+
+
+def available_formats() -> list:
+    """Format keys usable in this environment (Parquet needs pyarrow)."""
+    return [fmt for fmt in FORMATS if fmt != "parquet" or HAS_PYARROW]
+
+
+def _chunks(df: pd.DataFrame, chunksize: int):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def _write_xlsx(df: pd.DataFrame, buf, chunksize: int):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Results")
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+    for chunk in _chunks(df, chunksize):
+        # Missing values become empty cells, as with DataFrame.to_excel.
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(buf)
+
+
+def _write_csv(df: pd.DataFrame, buf, chunksize: int):
+    if df.empty:
+        df.to_csv(buf, index=False, encoding="utf-8")
+        return
+    for i, chunk in enumerate(_chunks(df, chunksize)):
+        chunk.to_csv(buf, index=False, header=i == 0, encoding="utf-8")
+
+
+def _write_parquet(df: pd.DataFrame, buf, chunksize: int):
+    if not HAS_PYARROW:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Schema from the whole frame, so a slice of all-missing values keeps its column's type.
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(buf, schema) as writer:
+        if df.empty:
+            writer.write_table(schema.empty_table())
+        for chunk in _chunks(df, chunksize):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+_WRITERS = {"xlsx": _write_xlsx, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def render_export(df: pd.DataFrame, fmt: str = "xlsx", chunksize: int = EXPORT_CHUNK_ROWS) -> bytes:
+    """Serialize `df` (uncached). Raises KeyError for an unknown format."""
+    writer = _WRITERS[fmt]
+    buf = io.BytesIO()
+    writer(df, buf, chunksize)
+    return buf.getvalue()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a frame's columns and values (index ignored, as exports drop it)."""
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return content_hash(repr(list(df.columns)), rows.tobytes())
+
+
+def export_bytes(df: pd.DataFrame, fmt: str = "xlsx", key=None) -> bytes:
+    """
+    Cached render_export(). Pass `key` when the caller already has a stable identity for
+    the table (e.g. the catalog key for the full scored catalog) to skip content hashing.
+    """
+    cache_key = (key if key is not None else frame_fingerprint(df), fmt)
+    return _export_cache.get_or_compute(cache_key, lambda: render_export(df, fmt))
+
+
+def export_cache_stats() -> dict:
+    return _export_cache.stats()
@@ -0,0 +1,133 @@
+# filter_index.py
+# ---------------- Precomputed indexes for categorical filters and numeric thresholds ----------------
+import numpy as np
+import pandas as pd
+
+from scoring import normalize_category
+
+# Dropdown filters (value "All" disables the filter; Category uses "All Drones").
+CATEGORICAL_FILTERS = ["Category", "Battery_Type", "Frame_Material", "Flight_Control_Board"]
+
+# Numeric criteria offered as "min_*" thresholds in the UI.
+THRESHOLD_COLUMNS = [
+    "Flight_Time_(min)",
+    "Wind_Resistance_(km/h)",
+    "Weight-Lifting_Capacity_(kg)",
+    "Max_Speed_(km/h)",
+    "Transmitter_Range_(km)",
+    "Camera_Resolution_(MP)",
+    "Battery_(mAh)",
+    "Weight_(kg)",
+]
+
+
+class FilterIndex:
+    """
+    Built once per catalog. Holds, for each categorical filter column, the row codes and a
+    packed bitmap per distinct value, and for each numeric threshold column the values in
+    ascending order with their row positions. Queries return row positions (ascending, i.e.
+    catalog order) without materializing intermediate DataFrames; they match
+    filter_subset() + apply_numeric_thresholds() row for row.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self._codes = {}
+        self._values = {}
+        self._bitmaps = {}
+        for col in CATEGORICAL_FILTERS:
+            if col not in df.columns:
+                continue
+            series = normalize_category(df[col]) if col == "Category" else df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, uniques = pd.factorize(series)
+            self._codes[col] = codes
+            self._values[col] = pd.Index(uniques)
+            self._bitmaps[col] = [np.packbits(codes == k) for k in range(len(uniques))]
+
+        # Same semantics as apply_numeric_thresholds: non-numeric/missing count as 0.
+        self._numeric = {}
+        self._order = {}
+        self._sorted = {}
+        for col in THRESHOLD_COLUMNS:
+            if col not in df.columns:
+                continue
+            vals = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            order = np.argsort(vals, kind="stable")
+            self._numeric[col] = vals
+            self._order[col] = order
+            self._sorted[col] = vals[order]
+        self._options_cache = {}
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [*self._codes.values(), *self._numeric.values(), *self._order.values(), *self._sorted.values()]
+        arrays += [bm for bitmaps in self._bitmaps.values() for bm in bitmaps]
+        return int(sum(a.nbytes for a in arrays))
+
+    # ---- categorical ----
+    def _bitmap(self, col: str, value):
+        pos = self._values[col].get_indexer([value])[0]
+        if pos < 0:
+            return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        return self._bitmaps[col][pos]
+
+    def categorical_mask(self, cat: str, bat: str = "All", frm: str = "All", fcb: str = "All"):
+        """Packed bitmap of rows matching the dropdown filters, or None when no filter is active."""
+        wanted = [
+            ("Category", cat.lower() if cat != "All Drones" else None),
+            ("Battery_Type", bat if bat != "All" else None),
+            ("Frame_Material", frm if frm != "All" else None),
+            ("Flight_Control_Board", fcb if fcb != "All" else None),
+        ]
+        mask = None
+        for col, value in wanted:
+            if value is None or col not in self._codes:
+                continue
+            bm = self._bitmap(col, value)
+            mask = bm if mask is None else mask & bm
+        return mask
+
+    def query(self, cat: str, bat: str = "All", frm: str = "All", fcb: str = "All") -> np.ndarray:
+        """Row positions passing the categorical filters (filter_subset equivalent)."""
+        mask = self.categorical_mask(cat, bat, frm, fcb)
+        if mask is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(mask, count=self.n_rows))
+
+    # ---- numeric ----
+    def apply_thresholds(self, positions: np.ndarray, thresholds: dict) -> np.ndarray:
+        """Subset of `positions` meeting every active `col >= value` threshold."""
+        active = [
+            (col, float(val)) for col, val in thresholds.items()
+            if col in self._numeric and float(val) > 0
+        ]
+        if not active or len(positions) == 0:
+            return positions
+        # The most selective threshold (found by binary search) drives the candidates.
+        starts = {col: np.searchsorted(self._sorted[col], val, side="left") for col, val in active}
+        lead, lead_val = min(active, key=lambda cv: self.n_rows - starts[cv[0]])
+        cand = np.sort(self._order[lead][starts[lead]:])
+        if len(positions) < self.n_rows:
+            cand = cand[np.isin(cand, positions, assume_unique=True)]
+        for col, val in active:
+            if col != lead:
+                cand = cand[self._numeric[col][cand] >= val]
+        return cand
+
+    # ---- dropdowns ----
+    def dynamic_options(self, cat: str):
+        """(FCB, Battery, Frame) dropdown lists for a category, 'All' first (dynamic_options equivalent)."""
+        if cat not in self._options_cache:
+            rows = self.query(cat)
+            lists = []
+            for col in ("Flight_Control_Board", "Battery_Type", "Frame_Material"):
+                opts = ["All"]
+                if col in self._codes:
+                    codes = np.unique(self._codes[col][rows])
+                    opts += sorted(set(self._values[col][codes[codes >= 0]].astype(str)))
+                lists.append(opts)
+            self._options_cache[cat] = tuple(lists)
+        return self._options_cache[cat]
@@ -0,0 +1,673 @@
+# ingest.py
+# ---------------- Workbook ingestion with a content-addressed cache ----------------
+import io
+import os
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache, content_hash, frame_nbytes
+from dataset_store import DatasetHandle, DatasetStore
+from scoring import (
+    ScoringPlan,
+    TopK,
+    active_plan,
+    add_scores_by_category,
+    apply_numeric_thresholds,
+    category_bounds,
+    filter_subset,
+    merge_bounds,
+    merge_selected_bounds,
+    normalize_category,
+    score_by_category,
+    score_columns,
+    score_dataframe_for_selected_category,
+    selected_category_bounds,
+)
+from filter_index import CATEGORICAL_FILTERS, FilterIndex
+from profiling import stage
+
+# Cache bounds can be tuned per deployment without code changes.
+INGEST_CACHE_ENTRIES = int(os.environ.get("DRONE_INGEST_CACHE_ENTRIES", "8"))
+INGEST_CACHE_MB = int(os.environ.get("DRONE_INGEST_CACHE_MB", "512"))
+# Optional directory for on-disk Parquet sidecars (disabled when unset).
+SIDECAR_DIR = os.environ.get("DRONE_CACHE_DIR") or None
+# Rows per chunk for streaming ingestion of catalogs too large for memory.
+STREAM_CHUNK_ROWS = int(os.environ.get("DRONE_STREAM_CHUNK_ROWS", "50000"))
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    A parsed + scored workbook and its filter index.
+    Instances are cached and shared across sessions: treat the frames as read-only.
+    """
+
+    key: str
+    raw: pd.DataFrame
+    scored: pd.DataFrame
+    index: FilterIndex = field(repr=False)
+    # Per-category data versions inherited across incremental updates (see apply_delta);
+    # categories not listed are at version `key`.
+    versions: dict = field(default_factory=dict, repr=False, compare=False)
+    update: "DeltaSummary | None" = field(default=None, repr=False, compare=False)
+    # The criteria the scores were computed with (see rescore_catalog).
+    plan: ScoringPlan | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def nbytes(self) -> int:
+        return frame_nbytes(self.raw, self.scored) + self.index.nbytes
+
+    @property
+    def schema(self) -> dict:
+        """{column: dtype name} of the canonical scored frame."""
+        return catalog_schema(self.scored)
+
+    def version(self, category: str) -> str:
+        """Changes whenever the rows of `category` do ('All Drones': whenever any row does)."""
+        if category == "All Drones":
+            return self.key
+        return self.versions.get(category.lower(), self.key)
+
+
+_ingest_cache = LRUCache(
+    max_entries=INGEST_CACHE_ENTRIES,
+    max_bytes=INGEST_CACHE_MB * 1024 * 1024,
+    sizeof=lambda catalog: catalog.nbytes,
+)
+
+
+def _tidy(df: pd.DataFrame) -> pd.DataFrame:
+    # Columns mixing numbers and text (e.g. Model 200 vs "X8") are kept as text,
+    # which also lets the frame round-trip through Parquet sidecars.
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    if "Category" in df.columns:
+        df["Category"] = normalize_category(df["Category"])
+    return df
+
+
+# ---------------- Canonical, compact frames ----------------
+# Low-cardinality text columns kept as pandas categoricals once a catalog is loaded.
+CATEGORICAL_COLUMNS = [*CATEGORICAL_FILTERS, "MIL-STD-810G/MIL-STD-810H", "Rating"]
+
+
+def _fits_float32(values: np.ndarray) -> bool:
+    narrow = values.astype(np.float32).astype(np.float64)
+    return bool(np.all((narrow == values) | np.isnan(values)))
+
+
+def canonicalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact form of a tidy catalog frame, built once per catalog (in place; idempotent).
+    Text columns in CATEGORICAL_COLUMNS become categoricals with sorted (stable)
+    categories, so later stages reuse their codes instead of re-hashing strings.
+    float64 columns whose values all round-trip through float32 are stored as float32 and
+    int64 columns that fit are stored as int32 (scoring and filters compute in float64).
+    Values never change, so scores and filters match the uncompacted frame exactly.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            continue
+        if df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype):
+            df[col] = df[col].astype("category")
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Merged frames (apply_delta) may carry unused or unsorted categories.
+            values = df[col]
+            codes = values.cat.codes.to_numpy()
+            if not np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)).all():
+                values = values.cat.remove_unused_categories()
+            if not values.cat.categories.is_monotonic_increasing:
+                values = values.cat.reorder_categories(values.cat.categories.sort_values())
+            df[col] = values
+    for col in df.columns[df.dtypes == np.float64]:
+        if _fits_float32(df[col].to_numpy()):
+            df[col] = df[col].astype(np.float32)
+    i32 = np.iinfo(np.int32)
+    for col in df.columns[df.dtypes == np.int64]:
+        if df[col].between(i32.min, i32.max).all():
+            df[col] = df[col].astype(np.int32)
+    return df
+
+
+def catalog_schema(df: pd.DataFrame) -> dict:
+    return {col: str(dtype) for col, dtype in df.dtypes.items()}
+
+
+def read_catalog(data: bytes) -> pd.DataFrame:
+    """Parse workbook bytes and normalize Category for consistent matching."""
+    return _tidy(pd.read_excel(io.BytesIO(data)))
+
+
+def read_catalog_file(path: str) -> pd.DataFrame:
+    """read_catalog() for a .xlsx, .csv or .parquet catalog on disk (the formats iter_catalog_chunks() reads)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        with open(path, "rb") as fh:
+            return read_catalog(fh.read())
+    if ext == ".csv":
+        return _tidy(pd.read_csv(path))
+    if ext == ".parquet":
+        return _tidy(pd.read_parquet(path))
+    raise ValueError(f"Unsupported catalog format: {path}")
+
+
+def catalog_key(data: bytes, plan: ScoringPlan | None = None) -> str:
+    """Cache key: file contents + the criteria the scores are computed with (default: active)."""
+    return f"{content_hash(data)[:32]}-{(plan or active_plan()).version}"
+
+
+def _sidecar_paths(sidecar_dir: str, key: str):
+    return (
+        os.path.join(sidecar_dir, f"{key}.raw.parquet"),
+        os.path.join(sidecar_dir, f"{key}.scored.parquet"),
+    )
+
+
+def _read_sidecar(sidecar_dir: str, key: str):
+    raw_path, scored_path = _sidecar_paths(sidecar_dir, key)
+    if not (os.path.exists(raw_path) and os.path.exists(scored_path)):
+        return None
+    try:
+        return pd.read_parquet(raw_path), pd.read_parquet(scored_path)
+    except Exception:
+        # Missing Parquet engine or a corrupt/partial file: fall back to parsing.
+        return None
+
+
+def _write_sidecar(sidecar_dir: str, key: str, raw: pd.DataFrame, scored: pd.DataFrame):
+    raw_path, scored_path = _sidecar_paths(sidecar_dir, key)
+    try:
+        os.makedirs(sidecar_dir, exist_ok=True)
+        # Write to temp names then rename so readers never see half-written files.
+        for frame, path in ((raw, raw_path), (scored, scored_path)):
+            tmp = f"{path}.tmp{os.getpid()}"
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+    except Exception:
+        # Sidecars are best-effort (e.g. no pyarrow, mixed-type object columns).
+        for path in (raw_path, scored_path):
+            tmp = f"{path}.tmp{os.getpid()}"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+# Content hash -> key of the latest Catalog built from those bytes, so a criteria
+# change can rescore that Catalog instead of starting over.
+_latest_keys = LRUCache(max_entries=INGEST_CACHE_ENTRIES * 4)
+
+
+def load_catalog(data: bytes, score_fn=add_scores_by_category, sidecar_dir: str | None = SIDECAR_DIR,
+                 plan: ScoringPlan | None = None) -> Catalog:
+    """
+    Return the Catalog (raw + scored frames and filter index) for workbook bytes, scored
+    with `plan` (default: the active criteria). `score_fn(frame, plan=...)` turns the raw frame into the
+    scored one (add_scores_by_category by default).
+    Results are cached by content + criteria version, so unchanged uploads skip parsing,
+    scoring and indexing entirely; after a criteria change, a cached Catalog of the same
+    bytes is rescored only for the categories whose criteria changed.
+    """
+    plan = plan or active_plan()
+    digest = content_hash(data)[:32]
+    key = catalog_key(data, plan)
+
+    def build():
+        previous_key = _latest_keys.get(digest)
+        previous = _ingest_cache.get(previous_key) if previous_key else None
+        if previous is not None and previous.plan is not None:
+            return rescore_catalog(previous, plan, key, score_fn)
+        with stage("sidecar_read"):
+            frames = _read_sidecar(sidecar_dir, key) if sidecar_dir else None
+        if frames is not None:
+            with stage("canonicalize"):
+                frames = tuple(canonicalize(f) for f in frames)
+        else:
+            with stage("excel_parse"):
+                raw = read_catalog(data)
+            with stage("canonicalize"):
+                raw = canonicalize(raw)
+            with stage("global_scoring"):
+                scored = score_fn(raw, plan=plan)
+            with stage("canonicalize_scored"):
+                frames = raw, canonicalize(scored)
+            if sidecar_dir:
+                with stage("sidecar_write"):
+                    _write_sidecar(sidecar_dir, key, *frames)
+        with stage("filter_index_build"):
+            index = FilterIndex(frames[1])
+        return Catalog(key, *frames, index=index, plan=plan)
+
+    catalog = _ingest_cache.get_or_compute(key, build)
+    _latest_keys.put(digest, key)
+    return catalog
+
+
+def ingest_cache_stats() -> dict:
+    return _ingest_cache.stats()
+
+
+# ---------------- Shared catalogs for sessions ----------------
+# Sessions keep handles on these rather than their own references: a catalog stays
+# pinned while any session uses it, however the ingest cache above evicts.
+def _catalog_view(catalog: Catalog) -> Catalog:
+    """The catalog with shallow copies of its frames: a session writing into them copies what it changes."""
+    return replace(catalog, raw=catalog.raw.copy(deep=False), scored=catalog.scored.copy(deep=False))
+
+
+_datasets = DatasetStore(view=_catalog_view)
+
+
+def open_catalog(data: bytes, handle: DatasetHandle | None = None, sidecar_dir: str | None = SIDECAR_DIR) -> DatasetHandle:
+    """
+    A handle on the shared Catalog for workbook bytes (load_catalog() on first use).
+    Pass the session's previous handle: it is returned as is while it still matches
+    (same bytes and criteria), otherwise released.
+    """
+    plan = active_plan()
+    return _datasets.reacquire(
+        handle, catalog_key(data, plan), lambda: load_catalog(data, sidecar_dir=sidecar_dir, plan=plan)
+    )
+
+
+def open_updated_catalog(catalog: Catalog, data: bytes, handle: DatasetHandle | None = None) -> DatasetHandle:
+    """open_catalog() for update_catalog(catalog, data)."""
+    return _datasets.reacquire(handle, _update_key(catalog, data), lambda: update_catalog(catalog, data))
+
+
+def dataset_store_stats() -> dict:
+    return _datasets.stats()
+
+
+# ---------------- Incremental updates ----------------
+# Delta workbooks: rows keyed by Manufacturer + Model (trimmed, case-insensitive). An
+# optional Action column marks rows to remove ("remove"/"delete"); every other row is
+# added, or replaces the catalog row with its key. Columns a delta leaves out keep their
+# current values; blank cells clear them.
+KEY_COLUMNS = ("Manufacturer", "Model")
+ACTION_COLUMN = "Action"
+REMOVE_ACTIONS = {"remove", "delete"}
+
+
+@dataclass(frozen=True)
+class DeltaSummary:
+    """What apply_delta() did; `rescored` lists the categories that were rescored."""
+
+    added: int
+    changed: int
+    removed: int
+    unchanged: int
+    not_found: int
+    rescored: tuple
+
+
+def _key_part(series: pd.Series) -> pd.Index:
+    # Normalize each distinct value once (missing values become "nan", like astype(str)).
+    codes, uniques = pd.factorize(series)
+    norm = pd.Index(uniques).astype(str).str.strip().str.casefold()
+    return norm.append(pd.Index(["nan"])).take(codes)
+
+
+def _row_keys(df: pd.DataFrame, rows=None) -> pd.Index:
+    missing = [c for c in KEY_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing key columns {missing}")
+    parts = [_key_part(df[c] if rows is None else df[c].iloc[rows]) for c in KEY_COLUMNS]
+    return parts[0] + "\x1f" + parts[1]
+
+
+def _positions_by_key(raw: pd.DataFrame, wanted: pd.Index) -> dict:
+    """{key: positions in raw} for the wanted keys; only rows of the wanted makers are keyed."""
+    makers = _key_part(raw[KEY_COLUMNS[0]])
+    rows = np.flatnonzero(makers.isin(wanted.str.split("\x1f").str[0]))
+    keys = _row_keys(raw, rows)
+    found = keys.isin(wanted)
+    positions = {}
+    for pos, k in zip(rows[found], keys[found]):
+        positions.setdefault(k, []).append(pos)
+    return positions
+
+
+def _inverse(keys: np.ndarray) -> np.ndarray:
+    """order such that keys[order] is ascending, for distinct keys in [0, max]: O(n), no sort."""
+    slots = np.full(int(keys.max()) + 1 if len(keys) else 0, -1)
+    slots[keys] = np.arange(len(keys))
+    return slots[slots >= 0]
+
+
+def _same(old, new) -> bool:
+    if pd.isna(old) and pd.isna(new):
+        return True
+    try:
+        return bool(old == new) or float(old) == float(new)
+    except (TypeError, ValueError):
+        return False
+
+
+def _concat_keeping_categories(frames: list) -> pd.DataFrame:
+    """pd.concat() that keeps the first frame's categorical columns categorical."""
+    frames = [f.copy(deep=False) for f in frames if len(f)] or frames[:1]
+    for col in frames[0].columns[frames[0].dtypes == "category"]:
+        values = [frames[0][col].cat.categories]
+        for f in frames[1:]:
+            if col in f.columns:
+                f[col] = f[col].where(f[col].isna(), f[col].astype(str))
+                values.append(pd.Index(f[col].dropna().unique()))
+        dtype = pd.CategoricalDtype(values[0].append(values[1:]).unique())
+        for f in frames:
+            if col in f.columns:
+                f[col] = f[col].astype(dtype)
+    return pd.concat(frames)
+
+
+def _infer_dtypes(df: pd.DataFrame, like: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column dtypes read_excel would give the same cells (text, int without blanks, float);
+    text columns that were mixed in `like` stay object, as _tidy() leaves them.
+    """
+    for col in df.columns[df.dtypes == object]:
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if kind == "string" and not (col in like.columns and like[col].dtype == object):
+            df[col] = df[col].astype("str")
+        elif kind in ("integer", "floating", "mixed-integer-float"):
+            df[col] = pd.to_numeric(df[col])
+    for col in df.columns[df.dtypes.map(pd.api.types.is_float_dtype)]:
+        values = df[col].to_numpy()
+        if np.isfinite(values).all() and (values == np.round(values)).all():
+            df[col] = values.astype(np.int64)
+    return df
+
+
+def _merge_delta(raw: pd.DataFrame, delta: pd.DataFrame):
+    """
+    (new raw frame, source, touched categories, DeltaSummary counts) for a tidy delta frame.
+    source[i] is the old position of new row i, or -1 for replaced and added rows.
+    Replaced rows keep their place and index label; added rows are appended.
+    """
+    delta = delta.loc[~_row_keys(delta).duplicated(keep="last")]  # last mention wins
+    delta_keys = _row_keys(delta)
+    if ACTION_COLUMN in delta.columns:
+        remove = delta[ACTION_COLUMN].astype(str).str.strip().str.lower().isin(REMOVE_ACTIONS).to_numpy()
+        delta = delta.drop(columns=ACTION_COLUMN)
+    else:
+        remove = np.zeros(len(delta), dtype=bool)
+
+    positions = _positions_by_key(raw, delta_keys)
+
+    n = len(raw)
+    drop = np.zeros(n, dtype=bool)
+    replaced, replacements, added = [], [], []
+    counts = dict(added=0, changed=0, removed=0, unchanged=0, not_found=0)
+    for i, k in enumerate(delta_keys):
+        found = positions.get(k, [])
+        if remove[i]:
+            drop[found] = True
+            counts["removed" if found else "not_found"] += 1
+            continue
+        row = delta.iloc[i]
+        if not found:
+            added.append(i)
+            counts["added"] += 1
+            continue
+        first, duplicates = found[0], found[1:]
+        current = raw.iloc[first]
+        if not duplicates and all(
+            col in raw.columns and _same(current[col], row[col]) for col in delta.columns
+        ):
+            counts["unchanged"] += 1
+            continue
+        merged = current.astype(object).copy()
+        for col in delta.columns.difference(KEY_COLUMNS, sort=False):  # keep the catalog's spelling
+            merged[col] = row[col]
+        drop[found] = True
+        replaced.append(first)
+        replacements.append(merged)
+        counts["changed"] += 1
+
+    kept = np.flatnonzero(~drop)
+    frames, order = [raw.iloc[kept]], [kept]
+    if replacements:
+        frames.append(pd.DataFrame(replacements, index=raw.index[replaced]).infer_objects())
+        order.append(np.asarray(replaced))
+    if added:
+        new_rows = delta.iloc[added].reindex(columns=list(dict.fromkeys([*raw.columns, *delta.columns])))
+        start = int(raw.index.max()) + 1 if n and pd.api.types.is_integer_dtype(raw.index) else n
+        new_rows.index = pd.RangeIndex(start, start + len(new_rows))
+        frames.append(new_rows)
+        order.append(np.arange(n, n + len(added)))
+
+    # Categories whose rows were dropped, replaced or added (old and new values).
+    touched = set()
+    if "Category" in raw.columns:
+        touched.update(raw["Category"].iloc[np.flatnonzero(drop)].dropna().astype(str))
+        for frame in frames[1:]:
+            touched.update(normalize_category(frame["Category"].dropna()))
+    order = _inverse(np.concatenate(order))
+    source = np.concatenate([kept, np.full(len(replaced) + len(added), -1)])[order]
+    merged = _concat_keeping_categories(frames).iloc[order]
+    return canonicalize(_tidy(_infer_dtypes(merged, raw))), source, touched, counts
+
+
+def apply_delta(catalog: Catalog, delta: pd.DataFrame, key: str | None = None,
+                score_fn=add_scores_by_category) -> Catalog:
+    """
+    A new Catalog with a delta frame (rows keyed by Manufacturer + Model, see above)
+    applied to `catalog`.
+    Scores are normalized within each category, so only the categories with added,
+    changed or removed rows are rescored; the other rows are copied from
+    catalog.scored and their categories keep their version, so cached query results
+    for them stay valid. The result matches loading the updated workbook from scratch
+    except for the index labels (kept from `catalog`; added rows get new ones).
+    Rows are scored with the criteria `catalog` was scored with.
+    """
+    plan = catalog.plan or active_plan()
+    if key is None:
+        digest = pd.util.hash_pandas_object(delta.astype(str), index=False).to_numpy()
+        key = f"{content_hash(catalog.key, *map(str, delta.columns), digest.tobytes())[:32]}-{plan.version}"
+    with stage("delta_merge"):
+        raw, source, touched, counts = _merge_delta(catalog.raw, _tidy(delta.copy()))
+    summary = DeltaSummary(**counts, rescored=tuple(sorted(touched)))
+    if not (summary.added or summary.changed or summary.removed):
+        return replace(catalog, update=summary)
+    return _rescore_categories(catalog, raw, source, touched, key, score_fn, plan, update=summary)
+
+
+def _rescore_categories(catalog: Catalog, raw: pd.DataFrame, source: np.ndarray, touched: set, key: str,
+                        score_fn, plan: ScoringPlan, **extra) -> Catalog:
+    # A Catalog of `raw` that rescores rows of `touched` categories (and new rows,
+    # source -1) and copies the rest from catalog.scored at positions `source`.
+    if "Category" not in raw.columns:
+        with stage("global_scoring"):
+            scored = canonicalize(score_fn(raw, plan=plan))
+        return Catalog(key, raw, scored, index=FilterIndex(scored), plan=plan, **extra)
+
+    with stage("incremental_scoring"):
+        category = raw["Category"]
+        redo = (source < 0) | category.isna().to_numpy() | category.isin(touched).to_numpy()
+        reuse, rescore = np.flatnonzero(~redo), np.flatnonzero(redo)
+        present = category.dropna().unique()
+        columns = list(dict.fromkeys([*raw.columns, "Score", *score_columns(present, plan), "Rating"]))
+        parts = [catalog.scored.iloc[source[reuse]], score_fn(raw.iloc[rescore], plan=plan)]
+        scored = _concat_keeping_categories(parts).reindex(columns=columns)
+        scored = scored.iloc[_inverse(np.concatenate([reuse, rescore]))]
+    with stage("canonicalize_scored"):
+        scored = canonicalize(scored)
+    with stage("filter_index_build"):
+        index = FilterIndex(scored)
+    versions = {str(c): catalog.version(str(c)) for c in present if c not in touched}
+    return Catalog(key, raw, scored, index=index, versions=versions, plan=plan, **extra)
+
+
+def rescore_catalog(catalog: Catalog, plan: ScoringPlan | None = None, key: str | None = None,
+                    score_fn=add_scores_by_category) -> Catalog:
+    """
+    `catalog` rescored with `plan` (default: the active one). Only categories whose
+    criteria differ between catalog.plan and `plan` are rescored; the others keep
+    their rows and their version, so cached query results for them stay valid.
+    """
+    plan = plan or active_plan()
+    old = catalog.plan
+    if old is not None and old.version == plan.version:
+        return catalog
+    key = key or f"{catalog.key.rsplit('-', 1)[0]}-{plan.version}"
+    categories = map(str, catalog.raw["Category"].dropna().unique()) if "Category" in catalog.raw.columns else ()
+    touched = {c for c in categories if old is None or old.category_version(c) != plan.category_version(c)}
+    source = np.arange(len(catalog.raw))
+    return _rescore_categories(catalog, catalog.raw, source, touched, key, score_fn, plan)
+
+
+def _update_key(catalog: Catalog, data: bytes) -> str:
+    return f"{content_hash(catalog.key, data)[:32]}-{(catalog.plan or active_plan()).version}"
+
+
+def update_catalog(catalog: Catalog, data: bytes) -> Catalog:
+    """apply_delta() for delta workbook bytes, cached like load_catalog()."""
+    key = _update_key(catalog, data)
+
+    def build():
+        with stage("delta_parse"):
+            delta = read_catalog(data)
+        return apply_delta(catalog, delta, key)
+
+    return _ingest_cache.get_or_compute(key, build)
+
+
+# ---------------- Streaming ingestion (memory bounded by chunk size) ----------------
+def _iter_xlsx_rows(path: str, chunksize: int):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buf = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue  # read_excel skips fully blank rows too
+            buf.append(row)
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+
+def iter_catalog_chunks(path: str, chunksize: int = STREAM_CHUNK_ROWS):
+    """
+    Yield tidied chunks of at most `chunksize` rows from a .xlsx, .csv or .parquet
+    catalog without loading the whole file. Row labels continue across chunks.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        chunks = _iter_xlsx_rows(path, chunksize)
+    elif ext == ".csv":
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+
+        chunks = (b.to_pandas() for b in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+    else:
+        raise ValueError(f"Unsupported catalog format: {path}")
+
+    start = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield _tidy(chunk)
+
+
+def scan_catalog(path: str, chunksize: int = STREAM_CHUNK_ROWS, plan: ScoringPlan | None = None):
+    """
+    First streaming pass: (bounds, output columns) for a catalog file.
+    bounds are running per-category min/max of the numeric criteria; output columns
+    are what add_scores_by_category() would return for the whole catalog.
+    """
+    plan = plan or active_plan()
+    bounds, columns, present = None, None, set()
+    for chunk in iter_catalog_chunks(path, chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+        if "Category" in chunk.columns:
+            bounds = merge_bounds(bounds, category_bounds(chunk, plan))
+            present.update(chunk["Category"].dropna().unique())
+    if columns is None or "Category" not in columns:
+        return bounds, columns or []
+    out_cols = columns + ["Score"] + score_columns(present, plan) + ["Rating"]
+    return bounds, list(dict.fromkeys(out_cols))
+
+
+def iter_scored_chunks(path: str, chunksize: int = STREAM_CHUNK_ROWS, plan: ScoringPlan | None = None):
+    """
+    Two-pass streaming version of add_scores_by_category(): yields scored chunks
+    whose concatenation equals scoring the whole file at once.
+    """
+    plan = plan or active_plan()  # one plan for both passes
+    bounds, columns = scan_catalog(path, chunksize, plan)
+    for chunk in iter_catalog_chunks(path, chunksize):
+        if "Category" not in chunk.columns:
+            yield chunk
+            continue
+        yield score_by_category(chunk, plan, bounds=bounds).reindex(columns=columns)
+
+
+def write_scored_catalog(path: str, out_path: str, chunksize: int = STREAM_CHUNK_ROWS) -> int:
+    """Stream-score `path` into a .csv or .parquet file; returns the number of rows."""
+    rows = 0
+    writer = None
+    try:
+        for chunk in iter_scored_chunks(path, chunksize):
+            if out_path.lower().endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(out_path, mode="w" if rows == 0 else "a", header=rows == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def stream_rank_categories(
+    path: str, categories, k: int, thresholds: dict | None = None, chunksize: int = STREAM_CHUNK_ROWS,
+    plan: ScoringPlan | None = None,
+) -> dict:
+    """
+    {category: best k rows} for a catalog file, scored with each category's weights
+    like score_dataframe_for_selected_category(), without materializing the scored frame.
+    Pass 1 collects each category's min/max over rows passing the thresholds; pass 2
+    scores every chunk with those bounds and keeps a running TopK per category.
+    """
+    thresholds = thresholds or {}
+    plan = plan or active_plan()
+
+    def filtered(chunk, cat):
+        return apply_numeric_thresholds(filter_subset(chunk, cat, "All", "All", "All"), thresholds)
+
+    bounds = dict.fromkeys(categories)
+    for chunk in iter_catalog_chunks(path, chunksize):
+        for cat in categories:
+            sub = filtered(chunk, cat)
+            if not sub.empty:
+                bounds[cat] = merge_selected_bounds(bounds[cat], selected_category_bounds(sub, cat, plan))
+
+    tops = {cat: TopK(k) for cat in categories}
+    for chunk in iter_catalog_chunks(path, chunksize):
+        for cat in categories:
+            if bounds[cat] is None:
+                continue
+            sub = filtered(chunk, cat)
+            if not sub.empty:
+                tops[cat].push(score_dataframe_for_selected_category(sub, cat, top=k, bounds=bounds[cat], plan=plan))
+    return {cat: top.result() for cat, top in tops.items()}
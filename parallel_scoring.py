@@ -0,0 +1,170 @@
+# parallel_scoring.py
+# ---------------- Category scoring on a process pool ----------------
+"""
+score_by_category() split over row ranges and run on a pool of worker processes.
+
+The kernel inputs (category codes, numeric criteria, looked-up categorical scores)
+and outputs (weighted criteria, Score sums) live in shared memory: workers read and
+write them in place, and only row ranges and per-range min/max are pickled. Two
+phases: each worker reduces min/max per category over its range (merged with
+merge_bounds()), then scores its range with the merged bounds. Every row goes through
+the same kernel as the serial path, so the result is identical for any worker count.
+
+Worth it only on large catalogs with several cores; add_scores_by_category() uses it
+when DRONE_SCORING_WORKERS > 1 and the catalog has at least DRONE_PARALLEL_MIN_ROWS rows.
+"""
+import atexit
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+from scoring import (
+    ScoringPlan,
+    _bound_arrays,
+    _bounds,
+    _finish_scores,
+    _prepare_scoring,
+    _score_inputs,
+    _score_rows,
+    _seed_outputs,
+    active_plan,
+    merge_bounds,
+)
+
+# Pools are expensive to start (each worker imports pandas), so one is kept per size.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        if workers not in _pools:
+            # No fork: the app and the HTTP server are multi-threaded.
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            _pools[workers] = ProcessPoolExecutor(workers, mp_context=mp.get_context(method))
+        return _pools[workers]
+
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+class _SharedArrays:
+    """NumPy arrays in named shared-memory blocks; `specs` lets workers attach to them."""
+
+    def __init__(self):
+        self.blocks = []
+        self.specs = {}
+
+    def empty(self, shape, name: str, dtype=np.float64) -> np.ndarray:
+        shape = tuple(np.atleast_1d(shape).tolist())
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = SharedMemory(create=True, size=size)
+        self.blocks.append(shm)
+        self.specs[name] = (shm.name, shape, np.dtype(dtype).str)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def release(self):
+        for shm in self.blocks:
+            try:
+                shm.close()
+            except BufferError:  # views still alive (an exception mid-way); freed with them
+                pass
+            shm.unlink()
+        self.blocks.clear()
+
+
+def _attach(specs: dict):
+    blocks = {key: SharedMemory(name=name) for key, (name, _, _) in specs.items()}
+    arrays = {
+        key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[key].buf)
+        for key, (_, shape, dtype) in specs.items()
+    }
+    return blocks, arrays
+
+
+def _close(blocks: dict):
+    for shm in blocks.values():
+        shm.close()
+
+
+def _bounds_task(specs: dict, numeric_cols: list, n_categories: int, lo: int, hi: int):
+    blocks, arrays = _attach(specs)
+    try:
+        num = pd.DataFrame(arrays["num"][:, lo:hi].T.copy(), columns=numeric_cols)
+        return _bounds(num, arrays["codes"][lo:hi].copy(), n_categories)
+    finally:
+        del arrays  # views must go before the blocks can close
+        _close(blocks)
+
+
+def _score_task(specs: dict, plan: ScoringPlan, num_idx: list, lookup_idx: list, mins, maxs, lo: int, hi: int):
+    blocks, arrays = _attach(specs)
+    try:
+        _score_rows(
+            plan, arrays["codes"], num_idx, arrays["num"], mins, maxs, lookup_idx, arrays["lookups"],
+            arrays["contrib"], arrays["total"], lo, hi,
+        )
+    finally:
+        del arrays
+        _close(blocks)
+
+
+def row_ranges(n_rows: int, n_ranges: int) -> list:
+    """`n_ranges` contiguous (lo, hi) ranges of near-equal size covering 0..n_rows."""
+    edges = np.linspace(0, n_rows, max(min(n_ranges, n_rows), 1) + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def score_by_category_parallel(df: pd.DataFrame, workers: int, plan: ScoringPlan | None = None,
+                               bounds=None, ranges_per_worker: int = 1) -> pd.DataFrame:
+    """score_by_category() on a pool of `workers` processes; same output, bit for bit."""
+    plan = plan or active_plan()
+    prepared = _prepare_scoring(df, plan)
+    if prepared is None:
+        return df.copy()
+    out, codes = prepared
+    n = len(out)
+    pool = _pool(workers)
+    ranges = row_ranges(n, workers * ranges_per_worker)
+    shared = _SharedArrays()
+    try:
+        with stage("parallel_inputs"):
+            numeric_cols, num, lookup_cols, lookups = _score_inputs(out, plan, empty=shared.empty)
+            shared.empty(n, "codes", np.intp)[:] = codes
+            contrib = shared.empty((len(plan.criteria), n), "contrib")
+            total = shared.empty(n, "total")
+            targets = _seed_outputs(out, plan, codes, contrib, total)
+        if bounds is None and numeric_cols:
+            with stage("parallel_bounds"):
+                futures = [
+                    pool.submit(_bounds_task, shared.specs, numeric_cols, len(plan.categories), lo, hi)
+                    for lo, hi in ranges
+                ]
+                for future in futures:  # in range order: the reduction is deterministic
+                    bounds = merge_bounds(bounds, future.result())
+        mins, maxs = _bound_arrays(bounds, numeric_cols) if numeric_cols else (None, None)
+        with stage("parallel_scoring"):
+            num_idx = [plan.criteria.index(c) for c in numeric_cols]
+            lookup_idx = [plan.criteria.index(c) for c in lookup_cols]
+            futures = [
+                pool.submit(_score_task, shared.specs, plan, num_idx, lookup_idx, mins, maxs, lo, hi)
+                for lo, hi in ranges
+            ]
+            for future in futures:
+                future.result()
+        with stage("parallel_assemble"):
+            result = _finish_scores(out, targets, contrib, total)
+        del num, lookups, contrib, total
+        return result
+    finally:
+        shared.release()
@@ -0,0 +1,107 @@
+# profiling.py
+# ---------------- Per-stage timing / memory instrumentation ----------------
+"""
+Lightweight spans for the Calculate pipeline. Disabled (zero-cost no-ops) unless
+DRONE_PROFILE=1. When enabled, every finished stage is written as one JSON log line
+on the "drone_selection.perf" logger and kept on the run's Profiler for the app's
+performance panel.
+
+    profiler = start_run()          # once per script run / request
+    with stage("excel_parse"):      # anywhere below, including library code
+        ...
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PROFILE_ENABLED = os.environ.get("DRONE_PROFILE", "").lower() in ("1", "true", "yes", "on")
+
+logger = logging.getLogger("drone_selection.perf")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size (Linux /proc), or None where unavailable."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Profiler:
+    """Collects nested stage spans for one run (e.g. one Streamlit rerun)."""
+
+    def __init__(self, run_id: str | None = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = []
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name: str):
+        self._stack.append(name)
+        path = "/".join(self._stack)
+        rss0 = rss_bytes()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            rss1 = rss_bytes()
+            self._stack.pop()
+            record = {
+                "event": "stage",
+                "run": self.run_id,
+                "stage": path,
+                "ms": round(elapsed * 1000, 3),
+                "rss_delta_mb": None if rss0 is None or rss1 is None else round((rss1 - rss0) / 2**20, 3),
+                "rss_mb": None if rss1 is None else round(rss1 / 2**20, 1),
+            }
+            self.records.append(record)
+            logger.info(json.dumps(record))
+
+    def total_ms(self) -> float:
+        return sum(r["ms"] for r in self.records if "/" not in r["stage"])
+
+
+_current: ContextVar = ContextVar("drone_profiler", default=None)
+
+
+def _ensure_handler():
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def start_run(run_id: str | None = None, enabled: bool | None = None) -> Profiler | None:
+    """Make a fresh Profiler current for this thread/context (None when profiling is off)."""
+    if not (PROFILE_ENABLED if enabled is None else enabled):
+        _current.set(None)
+        return None
+    _ensure_handler()
+    profiler = Profiler(run_id)
+    _current.set(profiler)
+    return profiler
+
+
+def current() -> Profiler | None:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Span on the current Profiler; does nothing when no run is being profiled."""
+    profiler = _current.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
@@ -0,0 +1,114 @@
+# query.py
+# ---------------- Calculate pipeline with a shared query-result cache ----------------
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from caching import LRUCache, frame_nbytes
+from profiling import stage
+from scoring import active_plan, rank_positions, score_dataframe_for_selected_category, selected_category_bounds
+from skyline import default_criteria, pareto_front
+
+QUERY_CACHE_ENTRIES = int(os.environ.get("DRONE_QUERY_CACHE_ENTRIES", "256"))
+QUERY_CACHE_MB = int(os.environ.get("DRONE_QUERY_CACHE_MB", "128"))
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    """Top-N rows for one filter state; `empty_reason` says which step removed every row."""
+
+    top: pd.DataFrame
+    empty_reason: str | None = None  # None | "categorical" | "numeric"
+
+
+# Process-wide, so every session working on the same dataset shares hits.
+_query_cache = LRUCache(
+    max_entries=QUERY_CACHE_ENTRIES,
+    max_bytes=QUERY_CACHE_MB * 1024 * 1024,
+    sizeof=lambda result: frame_nbytes(result.top),
+)
+
+
+def query_key(catalog, cat: str, bat: str, frm: str, fcb: str, thresholds: dict, n: int) -> tuple:
+    """
+    Normalized cache key: inactive (<= 0) thresholds are dropped, values made floats.
+    Uses the category's data and criteria versions, so results survive updates to
+    other categories' rows or criteria.
+    """
+    active = tuple(sorted((col, float(val)) for col, val in thresholds.items() if float(val) > 0))
+    criteria = _plan(catalog).category_version(cat)
+    return (catalog.version(cat), cat, bat, frm, fcb, active, int(n), criteria)
+
+
+def _plan(catalog):
+    # The criteria the catalog was scored with, so rescoring agrees with its Scores.
+    return catalog.plan or active_plan()
+
+
+def run_query(catalog, cat: str, bat: str, frm: str, fcb: str, thresholds: dict, n: int) -> QueryResult:
+    """
+    filter -> thresholds -> rescore with the selected category's weights -> top N.
+    Results are memoized per dataset and normalized filter state; the returned frame
+    is shared, so treat it as read-only.
+    """
+    key = query_key(catalog, cat, bat, frm, fcb, thresholds, n)
+
+    def compute():
+        rows, empty_reason = _filtered_rows(catalog, cat, bat, frm, fcb, thresholds)
+        if empty_reason:
+            return QueryResult(catalog.scored.iloc[:0], empty_reason)
+        sub = catalog.scored.iloc[rows]
+        plan = _plan(catalog)
+        with stage("category_rescoring"):
+            if cat in plan.categories:
+                scored = score_dataframe_for_selected_category(sub, cat, top=n, plan=plan)
+            else:
+                scored = sub.copy()
+        return QueryResult(scored.head(n))
+
+    return _query_cache.get_or_compute(key, compute)
+
+
+def _filtered_rows(catalog, cat: str, bat: str, frm: str, fcb: str, thresholds: dict):
+    """(row positions, empty_reason) after the dropdown filters and numeric minimums."""
+    with stage("categorical_filter"):
+        rows = catalog.index.query(cat, bat, frm, fcb)
+    if len(rows) == 0:
+        return rows, "categorical"
+    with stage("threshold_filter"):
+        rows = catalog.index.apply_thresholds(rows, thresholds)
+    return rows, "numeric" if len(rows) == 0 else None
+
+
+def run_skyline(catalog, cat: str, bat: str, frm: str, fcb: str, thresholds: dict,
+                criteria=None, minimize=()) -> QueryResult:
+    """
+    Same filters as run_query(), then every drone on the Pareto front of `criteria`
+    (default: the category's numeric criteria), best Score first. Scores use the
+    selected category's weights with min/max over all filtered rows, not just the front.
+    """
+    criteria = tuple(criteria) if criteria else tuple(default_criteria(cat, _plan(catalog)))
+    minimize = tuple(sorted(minimize))
+    key = ("skyline", query_key(catalog, cat, bat, frm, fcb, thresholds, 0), criteria, minimize)
+
+    def compute():
+        rows, empty_reason = _filtered_rows(catalog, cat, bat, frm, fcb, thresholds)
+        if empty_reason:
+            return QueryResult(catalog.scored.iloc[:0], empty_reason)
+        sub = catalog.scored.iloc[rows]
+        plan = _plan(catalog)
+        with stage("skyline"):
+            front = pareto_front(sub, criteria, cat, minimize, plan)
+        with stage("category_rescoring"):
+            if cat in plan.categories:
+                return QueryResult(score_dataframe_for_selected_category(
+                    front, cat, bounds=selected_category_bounds(sub, cat, plan), plan=plan
+                ))
+            return QueryResult(front.iloc[rank_positions(front)])
+
+    return _query_cache.get_or_compute(key, compute)
+
+
+def query_cache_stats() -> dict:
+    return _query_cache.stats()
@@ -0,0 +1,158 @@
+# score_catalogs.py
+# ---------------- Batch CLI: rank a directory of catalog workbooks ----------------
+"""
+Score every catalog in a directory (.xlsx workbooks by default; .csv and .parquet
+with --pattern) on a process pool and write one ranked table per drone category.
+
+    python score_catalogs.py catalogs/ -o ranked/ --top 20 --workers 8
+    python score_catalogs.py catalogs/ -o ranked/ --per-file --min "Flight_Time_(min)=30"
+    python score_catalogs.py huge/ -o ranked/ --per-file --top 50 --chunksize 100000
+    python score_catalogs.py catalogs/ -o ranked/ --criteria criteria.toml
+    python score_catalogs.py exports/ -o ranked/ --pattern "*.csv" --pattern "*.parquet"
+
+By default all catalogs are merged and each category is ranked across vendors
+(parsing runs one worker per file, scoring one worker per category shard).
+--per-file ranks each workbook on its own, one worker per file; add --chunksize
+to stream each file in two passes so memory stays bounded by the chunk size.
+"""
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from criteria_config import CriteriaError, load_criteria, refresh_criteria
+from ingest import read_catalog_file, stream_rank_categories
+from scoring import ScoringPlan, apply_numeric_thresholds, filter_subset, score_dataframe_for_selected_category
+
+
+def _slug(text: str) -> str:
+    return "_".join(text.lower().split())
+
+
+def _load(path: str) -> pd.DataFrame:
+    df = read_catalog_file(path)
+    df["Source_File"] = os.path.basename(path)
+    return df
+
+
+def rank_category(data: pd.DataFrame, category: str, thresholds: dict, top: int | None,
+                  plan: ScoringPlan | None = None) -> pd.DataFrame:
+    """Filter to one category, apply thresholds and rank with that category's weights."""
+    sub = filter_subset(data, category, "All", "All", "All")
+    sub = apply_numeric_thresholds(sub, thresholds)
+    if sub.empty:
+        return sub
+    return _with_rank(score_dataframe_for_selected_category(sub, category, top=top, plan=plan))
+
+
+def _with_rank(ranked: pd.DataFrame) -> pd.DataFrame:
+    ranked = ranked.reset_index(drop=True)
+    ranked.insert(0, "Rank", range(1, len(ranked) + 1))
+    return ranked
+
+
+def _rank_file(path: str, thresholds: dict, top: int | None, plan: ScoringPlan,
+               chunksize: int | None = None) -> dict:
+    if chunksize:
+        ranked = stream_rank_categories(path, plan.categories, top, thresholds, chunksize, plan)
+        source = os.path.basename(path)
+        return {
+            cat: _with_rank(frame.assign(Source_File=source)) if not frame.empty else frame
+            for cat, frame in ranked.items()
+        }
+    df = _load(path)
+    return {cat: rank_category(df, cat, thresholds, top, plan) for cat in plan.categories}
+
+
+def _write(frame: pd.DataFrame, out_dir: str, name: str, fmt: str) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{_slug(name)}.{fmt}")
+    if fmt == "xlsx":
+        frame.to_excel(path, index=False, sheet_name="Results")
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def _threshold(item: str) -> tuple:
+    """argparse type for --min COLUMN=VALUE."""
+    col, sep, val = item.partition("=")
+    if not sep or not col.strip():
+        raise argparse.ArgumentTypeError(f"expected COLUMN=VALUE, got {item!r}")
+    try:
+        return col.strip(), float(val)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{val.strip()!r} in {item!r} is not a number") from None
+
+
+def run(args) -> list:
+    """Execute the batch job described by parsed CLI args; returns written paths."""
+    paths = sorted(
+        p for pattern in args.pattern for p in glob.glob(os.path.join(args.input_dir, pattern))
+    )
+    if not paths:
+        raise SystemExit(f"No catalogs matching {args.pattern} in {args.input_dir}")
+    thresholds = dict(args.min or [])
+    # Workers get the plan explicitly, so every file is ranked with the same criteria.
+    plan = load_criteria(args.criteria) if args.criteria else refresh_criteria(force=True)
+    written = []
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if args.per_file:
+            # One worker per file, end to end.
+            futures = {p: pool.submit(_rank_file, p, thresholds, args.top, plan, args.chunksize) for p in paths}
+            for path, fut in futures.items():
+                stem = os.path.splitext(os.path.basename(path))[0]
+                for cat, ranked in fut.result().items():
+                    if not ranked.empty:
+                        written.append(_write(ranked, os.path.join(args.output_dir, stem), cat, args.format))
+            return written
+
+        # Parse in parallel (one worker per file), then score one shard per category.
+        merged = pd.concat(list(pool.map(_load, paths)), ignore_index=True)
+        futures = {
+            cat: pool.submit(rank_category, merged[merged["Category"] == cat], cat, thresholds, args.top, plan)
+            for cat in plan.categories
+        }
+        for cat, fut in futures.items():
+            ranked = fut.result()
+            if not ranked.empty:
+                written.append(_write(ranked, args.output_dir, cat, args.format))
+    return written
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Rank drone catalog workbooks per category.")
+    ap.add_argument("input_dir", help="Directory containing catalog workbooks")
+    ap.add_argument("-o", "--output-dir", default="ranked", help="Where ranked tables are written")
+    ap.add_argument("--pattern", action="append", default=None, help="Glob for catalog files, .xlsx/.csv/.parquet (default *.xlsx)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="Process pool size")
+    ap.add_argument("--top", type=int, default=None, help="Keep only the best N per category")
+    ap.add_argument("--min", action="append", type=_threshold, metavar="COLUMN=VALUE", help="Numeric threshold (repeatable)")
+    ap.add_argument("--per-file", action="store_true", help="Rank each workbook separately")
+    ap.add_argument("--chunksize", type=int, default=None, help="Stream files in chunks (needs --per-file and --top)")
+    ap.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    ap.add_argument("--criteria", help="Criteria file (.json/.toml/.yaml) instead of the built-in weights")
+    return ap
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunksize and not (args.per_file and args.top):
+        parser.error("--chunksize requires --per-file and --top")
+    args.pattern = args.pattern or ["*.xlsx"]
+    try:
+        written = run(args)
+    except CriteriaError as exc:
+        parser.error(str(exc))
+    for path in written:
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,619 @@
+# scoring.py
+# ---------------- Headless scoring library (no Streamlit imports) ----------------
+import json
+import os
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from caching import content_hash
+from criteria_data import (
+    weights_dict,
+    Criteria_Scores_Frame_Material,
+    Criteria_Scores_MIL_STD,
+    Criteria_Scores_Flight_Control_Board,
+)
+from profiling import stage
+
+# Process-pool scoring (parallel_scoring.py) for large catalogs; 0 or 1 = serial.
+SCORING_WORKERS = int(os.environ.get("DRONE_SCORING_WORKERS", "0"))
+PARALLEL_MIN_ROWS = int(os.environ.get("DRONE_PARALLEL_MIN_ROWS", "200000"))
+
+# Criteria scored by lookup table instead of min-max normalization (built-in defaults;
+# a criteria file can replace them, see criteria_config.py).
+CATEGORICAL_SCORES = {
+    "Frame_Material": Criteria_Scores_Frame_Material,
+    "Flight_Control_Board": Criteria_Scores_Flight_Control_Board,
+    "MIL-STD-810G/MIL-STD-810H": Criteria_Scores_MIL_STD,
+}
+
+
+def _normalize_text(values):
+    return values.astype(str).str.replace("_", " ").str.strip().str.lower()
+
+
+def _is_canonical(series: pd.Series) -> bool:
+    # A categorical whose categories are already normalized (see ingest.canonicalize).
+    if not isinstance(series.dtype, pd.CategoricalDtype) or series.hasnans:
+        return False
+    cats = series.cat.categories
+    return _normalize_text(cats).equals(cats)
+
+
+def normalize_category(series: pd.Series) -> pd.Series:
+    """'Surveillance_And_Security ' -> 'surveillance and security'."""
+    return _normalize_with_codes(series, ())[0]
+
+
+def _normalize_with_codes(series: pd.Series, categories):
+    """(normalize_category(series), position of each value in `categories` or -1), factorizing once."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and not series.hasnans:
+        if not _is_canonical(series):
+            # Normalize the few categories instead of the rows; the result stays a
+            # categorical (categories that normalize alike are merged).
+            normalized = _normalize_text(series.cat.categories)
+            uniques = normalized.unique().sort_values()
+            codes = uniques.get_indexer(normalized).take(series.cat.codes.to_numpy())
+            series = pd.Series(pd.Categorical.from_codes(codes, uniques), index=series.index, name=series.name)
+        return series, category_codes(series, categories)
+    # Normalize each distinct value once instead of once per row.
+    codes, uniques = pd.factorize(series)
+    normalized = _normalize_text(pd.Index(uniques))
+    missing = np.flatnonzero(codes < 0)
+    if len(missing):
+        # Keep astype(str) semantics for missing values ("nan", "None", NaN): they are
+        # normalized row by row and appended, so one take() builds the column.
+        normalized = normalized.append(_normalize_text(pd.Index(series.iloc[missing])))
+        codes = codes.copy()
+        codes[missing] = len(uniques) + np.arange(len(missing))
+    out = pd.Series(normalized.take(codes).array, index=series.index)
+    return out, pd.Index(categories).get_indexer(normalized).take(codes)
+
+
+def _factorize(series: pd.Series):
+    """pd.factorize(), reusing the codes of categorical columns instead of hashing values."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def category_codes(series: pd.Series, categories) -> np.ndarray:
+    """Position of each (normalized) Category value in `categories`, -1 if absent."""
+    codes, uniques = _factorize(series)
+    # Appended -1: missing values (code -1) never match a category.
+    return np.append(pd.Index(categories).get_indexer(uniques), -1).take(codes)
+
+
+def _lookup_scores(series: pd.Series, table: dict) -> np.ndarray:
+    """table[value] per row (0 when missing), mapping each distinct value once."""
+    codes, uniques = _factorize(series)
+    scores = pd.Index(uniques).map(table).to_numpy(dtype=float, na_value=0.0)
+    # Code -1 (NaN) picks the appended 0.
+    return np.append(np.nan_to_num(scores, nan=0.0), 0.0)[codes]
+
+
+@dataclass(frozen=True)
+class ScoringPlan:
+    """
+    Weights and categorical score tables compiled into arrays.
+    weights[c, j] is the weight of criteria[j] in categories[c] (0 when unused);
+    order[c] lists that category's criterion indices in weights_dict order
+    (padded with -1) so Scores are summed in exactly the legacy order.
+    tables holds (criterion, ((value, score), ...)) lookup tables.
+    version hashes everything scoring depends on; category_versions[c] only what
+    categories[c] depends on (its weights and the tables of its criteria), so caches
+    keyed on it survive edits that leave the category alone.
+    """
+
+    categories: tuple
+    criteria: tuple
+    weights: np.ndarray
+    uses: np.ndarray
+    order: np.ndarray
+    tables: tuple = ()
+    version: str = ""
+    category_versions: tuple = ()
+
+    @cached_property
+    def lookup_tables(self) -> dict:
+        """{criterion: {value: score}} for the criteria scored by lookup table."""
+        return {col: dict(items) for col, items in self.tables}
+
+    def weights_for(self, category: str) -> dict:
+        """{criterion: weight} of a category in its own order ({} for unknown categories)."""
+        if category not in self.categories:
+            return {}
+        c = self.categories.index(category)
+        return {self.criteria[j]: float(self.weights[c, j]) for j in self.order[c] if j >= 0}
+
+    def category_version(self, category: str) -> str:
+        """Changes whenever scoring of `category` would ('' for unknown categories)."""
+        if category not in self.categories:
+            return ""
+        return self.category_versions[self.categories.index(category)]
+
+
+def compile_scoring_plan(weights: dict = weights_dict, tables: dict | None = None) -> ScoringPlan:
+    """Compile {category: {criterion: weight}} and {criterion: {value: score}} tables."""
+    tables = CATEGORICAL_SCORES if tables is None else tables
+    tables = tuple((col, tuple(sorted((str(v), float(s)) for v, s in t.items()))) for col, t in tables.items())
+    categories = tuple(weights.keys())
+    criteria = tuple(dict.fromkeys(col for w in weights.values() for col in w))
+    col_idx = {col: j for j, col in enumerate(criteria)}
+
+    w_mat = np.zeros((len(categories), len(criteria)))
+    uses = np.zeros((len(categories), len(criteria)), dtype=bool)
+    width = max((len(w) for w in weights.values()), default=0)
+    order = np.full((len(categories), width), -1, dtype=np.intp)
+    for c, w in enumerate(weights.values()):
+        for k, (col, val) in enumerate(w.items()):
+            w_mat[c, col_idx[col]] = val
+            uses[c, col_idx[col]] = True
+            order[c, k] = col_idx[col]
+    for arr in (w_mat, uses, order):
+        arr.setflags(write=False)
+
+    by_col = dict(tables)
+    category_versions = tuple(
+        content_hash(json.dumps([cat, list(w.items()), [[col, by_col[col]] for col in w if col in by_col]]))[:16]
+        for cat, w in weights.items()
+    )
+    version = content_hash(*categories, *category_versions)[:16]
+    return ScoringPlan(categories, criteria, w_mat, uses, order, tables, version, category_versions)
+
+
+_DEFAULT_PLAN = compile_scoring_plan()
+
+# The plan scoring uses unless one is passed; swapped whole by set_active_plan(), so a
+# caller that reads it once works with one consistent set of criteria.
+_active_plan = _DEFAULT_PLAN
+_active_lock = threading.Lock()
+
+
+def active_plan() -> ScoringPlan:
+    return _active_plan
+
+
+def set_active_plan(plan: ScoringPlan) -> ScoringPlan:
+    """Make `plan` the active one (criteria_config.py does this on reload); returns the previous plan."""
+    global _active_plan
+    with _active_lock:
+        previous, _active_plan = _active_plan, plan
+    return previous
+
+
+_RATING_CUTS = (0.40, 0.55, 0.70, 0.85)
+# Sorted, as canonical categoricals are; code 0 ('') is for a NaN Score.
+_RATING_DTYPE = pd.CategoricalDtype(["", "★", "★★", "★★★", "★★★★", "★★★★★"])
+
+
+def _to_rating(score: np.ndarray) -> pd.Categorical:
+    """Stars from Score (same thresholds as before; NaN -> ''), built from the bucket codes."""
+    bucket = np.ones(len(score), dtype=np.int8)
+    for cut in _RATING_CUTS:
+        bucket += score >= cut
+    bucket[np.isnan(score)] = 0
+    return pd.Categorical.from_codes(bucket, dtype=_RATING_DTYPE, validate=False)
+
+
+def _numeric_criteria(df: pd.DataFrame, plan: ScoringPlan) -> list:
+    return [col for col in plan.criteria if col in df.columns and col not in plan.lookup_tables]
+
+
+def _numeric_frame(df: pd.DataFrame, cols: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        {col: pd.to_numeric(df[col], errors="coerce") for col in cols}, index=df.index
+    ).astype(float)
+
+
+def _bounds(num: pd.DataFrame, codes: np.ndarray, n_categories: int):
+    # Row i describes category code i - 1 (row 0 collects unmatched rows).
+    groups = num.groupby(codes, sort=True)
+    full = range(-1, n_categories)
+    return groups.min().reindex(full), groups.max().reindex(full)
+
+
+def category_bounds(df: pd.DataFrame, plan: ScoringPlan | None = None):
+    """
+    Per-category (mins, maxs) of the numeric criteria, one row per category code.
+    Bounds of separate chunks combine with merge_bounds() and can be passed to
+    score_by_category() so chunked scoring matches scoring the whole catalog.
+    """
+    plan = plan or active_plan()
+    codes = category_codes(normalize_category(df["Category"]), plan.categories)
+    return _bounds(_numeric_frame(df, _numeric_criteria(df, plan)), codes, len(plan.categories))
+
+
+def merge_bounds(a, b):
+    """Combine two category_bounds() results (either may be None)."""
+    if a is None or b is None:
+        return b if a is None else a
+    return np.fmin(a[0], b[0]), np.fmax(a[1], b[1])
+
+
+def score_columns(categories, plan: ScoringPlan | None = None) -> list:
+    """*_Score columns score_by_category() adds when `categories` are present, in order."""
+    plan = plan or active_plan()
+    present = set(categories)
+    return [
+        f"{col}_Score"
+        for col in dict.fromkeys(
+            plan.criteria[j] for c, cat in enumerate(plan.categories) if cat in present
+            for j in plan.order[c] if j >= 0
+        )
+    ]
+
+
+def _numeric_values(series: pd.Series) -> np.ndarray:
+    # NumPy int/float columns as they are; anything else coerced to float64 (NaN if not a number).
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+        return series.to_numpy()
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _score_inputs(out: pd.DataFrame, plan: ScoringPlan, empty=None):
+    """
+    Per-row inputs of the scoring kernel for a _prepare_scoring() frame: (numeric
+    criteria, their values, categorical criteria, their looked-up scores), one array
+    per criterion. Numeric columns are used as they are (the kernel casts the rows it
+    takes to float64). With empty(shape, name), both are copied into float matrices
+    (criteria x rows) it allocates as "num" and "lookups" instead.
+    """
+    numeric_cols = _numeric_criteria(out, plan)
+    num = [_numeric_values(out[col]) for col in numeric_cols]
+    lookup_cols = [col for col in plan.lookup_tables if col in plan.criteria and col in out.columns]
+    lookups = [_lookup_scores(out[col], plan.lookup_tables[col]) for col in lookup_cols]
+    if empty is not None:
+        matrices = empty((len(num), len(out)), "num"), empty((len(lookups), len(out)), "lookups")
+        for matrix, arrays in zip(matrices, (num, lookups)):
+            for k, values in enumerate(arrays):
+                matrix[k] = values
+        num, lookups = matrices
+    return numeric_cols, num, lookup_cols, lookups
+
+
+def _bound_arrays(bounds, numeric_cols: list):
+    # category_bounds() frames -> (mins, maxs) arrays, row c + 1 for category code c.
+    mins, maxs = bounds
+    return mins[numeric_cols].to_numpy(dtype=float), maxs[numeric_cols].to_numpy(dtype=float)
+
+
+def _score_rows(plan: ScoringPlan, codes, num_idx, num, mins, maxs, lookup_idx, lookups,
+                contrib, total, lo: int, hi: int):
+    """
+    Overwrite, for the matched rows in lo:hi, contrib[j, row] (weighted criterion
+    values) for the criteria the row's category uses and total[row] (the Score: their
+    sum in the category's criterion order, rounded). Other entries keep what
+    _seed_outputs() put there. Rows are taken one category at a time, so each criterion
+    is one pass with scalar min, range and weight. Every operation is per row, so any
+    split into row ranges gives the same bits. With `mins` None the bounds are taken
+    from the category's rows in lo:hi, which is only right for a single call over all rows.
+    """
+    c = codes[lo:hi]
+    num_pos = {j: k for k, j in enumerate(num_idx)}
+    lookup_pos = {j: k for k, j in enumerate(lookup_idx)}
+    for cat in np.flatnonzero(np.bincount(c[c >= 0], minlength=len(plan.categories))):
+        rows = np.flatnonzero(c == cat) + lo
+        # Score: accumulated in the category's own criterion order (bit-identical to
+        # the legacy loop).
+        acc = np.zeros(len(rows))
+        for j in plan.order[cat]:
+            if j < 0:
+                break
+            if j in num_pos:
+                k = num_pos[j]
+                value = num[k][rows].astype(float, copy=False)  # a copy: the steps below work in place
+                if mins is None:
+                    mn, mx = np.fmin.reduce(value), np.fmax.reduce(value)  # NaN-skipping, like groupby
+                else:
+                    mn, mx = mins[cat + 1, k], maxs[cat + 1, k]  # rows offset by the unmatched row
+                rng = mx - mn
+                if rng > 0:
+                    with np.errstate(invalid="ignore"):
+                        value -= mn
+                        value /= rng
+                    np.copyto(value, 0.0, where=np.isnan(value))
+                else:
+                    value = np.zeros(len(rows))
+            elif j in lookup_pos:
+                value = lookups[lookup_pos[j]][rows]
+            else:  # criterion missing from the frame
+                value = np.zeros(len(rows))
+            value *= plan.weights[cat, j]
+            contrib[j, rows] = value
+            acc += value
+        total[rows] = np.round(acc, 2)
+
+
+def _seed_outputs(out: pd.DataFrame, plan: ScoringPlan, codes, contrib, total) -> list:
+    """
+    Fill contrib and total with the values rows keep when the kernel does not score
+    them: the current *_Score / Score columns (NaN for new *_Score columns). Returns
+    the (column, criterion index) pairs to write back: criteria of the categories
+    present, in first-appearance order.
+    """
+    counts = np.bincount(codes[codes >= 0], minlength=len(plan.categories))
+    present = [plan.categories[c] for c in np.flatnonzero(counts)]
+    targets = []
+    for name in score_columns(present, plan):
+        j = plan.criteria.index(name[: -len("_Score")])
+        contrib[j] = out[name].to_numpy(dtype=float) if name in out.columns else np.nan
+        targets.append((name, j))
+    total[:] = out["Score"].to_numpy(dtype=float)
+    return targets
+
+
+def _finish_scores(out: pd.DataFrame, targets: list, contrib, total, copy: bool = True) -> pd.DataFrame:
+    """
+    Write the *_Score columns, Score and Rating from the kernel's output. With `copy`
+    False the columns are views of contrib and total (when nothing else uses them).
+    """
+    for name, j in targets:
+        out[name] = pd.Series(contrib[j], index=out.index, copy=copy)
+    out["Score"] = pd.Series(total, index=out.index, copy=copy)
+    out["Rating"] = pd.Series(_to_rating(total), index=out.index)
+    return out
+
+
+def _prepare_scoring(df: pd.DataFrame, plan: ScoringPlan):
+    # (output frame with normalized Category and a Score column, category codes);
+    # None without Category.
+    if "Category" not in df.columns:
+        return None
+    out = df.copy(deep=False)  # copy-on-write: columns are only replaced, never written into
+    out["Category"], codes = _normalize_with_codes(out["Category"], plan.categories)
+    if "Score" not in out.columns:
+        out["Score"] = 0.0
+    return out, codes
+
+
+def score_by_category(df: pd.DataFrame, plan: ScoringPlan | None = None, bounds=None) -> pd.DataFrame:
+    """
+    Row-wise Score using each row's own Category weights, in one vectorized pass.
+    Numeric criteria are min-max normalized within the category (over its rows, or
+    with the given category_bounds()); categorical ones use the lookup tables.
+    Output matches the legacy per-category loop: same columns, order and values
+    (Rating is a categorical of the same labels; categorical Category stays one).
+    """
+    plan = plan or active_plan()
+    prepared = _prepare_scoring(df, plan)
+    if prepared is None:
+        return df.copy()
+    out, codes = prepared
+    numeric_cols, num, lookup_cols, lookups = _score_inputs(out, plan)
+    # Without bounds the kernel takes each category's min/max from its rows as it goes.
+    mins, maxs = _bound_arrays(bounds, numeric_cols) if bounds is not None and numeric_cols else (None, None)
+
+    n = len(out)
+    contrib = np.empty((len(plan.criteria), n))
+    total = np.empty(n)
+    targets = _seed_outputs(out, plan, codes, contrib, total)
+    _score_rows(
+        plan, codes, [plan.criteria.index(c) for c in numeric_cols], num, mins, maxs,
+        [plan.criteria.index(c) for c in lookup_cols], lookups, contrib, total, 0, n,
+    )
+    return _finish_scores(out, targets, contrib, total, copy=False)
+
+
+# ---------------- Public helpers (used by the app and the batch CLI) ----------------
+def add_scores_by_category(df: pd.DataFrame, workers: int | None = None,
+                           plan: ScoringPlan | None = None) -> pd.DataFrame:
+    """
+    Compute a 'Score' for each row using the weights of its own Category (row-wise).
+    Adds *_Score helper columns when a weighted feature exists.
+    Also adds a 'Rating' (stars) derived from the Score.
+    Returns a new DataFrame. With `workers` > 1 (default DRONE_SCORING_WORKERS),
+    catalogs of at least PARALLEL_MIN_ROWS rows are scored on a process pool.
+    `plan` defaults to the active one.
+    """
+    workers = SCORING_WORKERS if workers is None else workers
+    plan = plan or active_plan()
+    if workers > 1 and len(df) >= PARALLEL_MIN_ROWS:
+        from parallel_scoring import score_by_category_parallel
+
+        return score_by_category_parallel(df, workers, plan)
+    return score_by_category(df, plan)
+
+
+def filter_subset(data: pd.DataFrame, cat: str, bat: str, frm: str, fcb: str) -> pd.DataFrame:
+    """Apply categorical filters (one mask, so only the matching rows are copied)."""
+    mask = np.ones(len(data), dtype=bool)
+    original = data["Category"] if "Category" in data.columns else None
+    category = normalize_category(original) if original is not None else None
+
+    if cat != "All Drones" and category is not None:
+        mask &= (category == cat.lower()).to_numpy(dtype=bool, na_value=False)
+    for col, value in (("Battery_Type", bat), ("Frame_Material", frm), ("Flight_Control_Board", fcb)):
+        if value != "All" and col in data.columns:
+            mask &= (data[col] == value).to_numpy(dtype=bool, na_value=False)
+    sub = data[mask]
+    if category is not original:  # not already normalized
+        sub = sub.assign(Category=category[mask])
+    return sub
+
+
+def dynamic_options(sub: pd.DataFrame):
+    """Return dropdown value lists (FCB, Battery, Frame) with 'All' first."""
+    fcb = ["All"]
+    bat = ["All"]
+    frm = ["All"]
+    if "Flight_Control_Board" in sub.columns:
+        fcb += sorted(sub["Flight_Control_Board"].dropna().astype(str).unique().tolist())
+    if "Battery_Type" in sub.columns:
+        bat += sorted(sub["Battery_Type"].dropna().astype(str).unique().tolist())
+    if "Frame_Material" in sub.columns:
+        frm += sorted(sub["Frame_Material"].dropna().astype(str).unique().tolist())
+    return fcb, bat, frm
+
+
+def apply_numeric_thresholds(data: pd.DataFrame, thresholds: dict) -> pd.DataFrame:
+    """Keep rows where each numeric column is >= its threshold (if threshold > 0)."""
+    mask = np.ones(len(data), dtype=bool)
+    for col, val in thresholds.items():
+        if col in data.columns and float(val) > 0:
+            s = pd.to_numeric(data[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            mask &= s >= float(val)
+    return data[mask]
+
+
+def selected_category_bounds(data: pd.DataFrame, category_key: str, plan: ScoringPlan | None = None) -> dict:
+    """
+    {column: (min, max)} of the selected category's numeric criteria over `data`, as used
+    by score_dataframe_for_selected_category(). Chunk results combine with merge_selected_bounds().
+    """
+    plan = plan or active_plan()
+    bounds = {}
+    for col in plan.weights_for(category_key):
+        if col in data.columns and col not in plan.lookup_tables:
+            s = pd.to_numeric(data[col], errors="coerce").fillna(0).astype(float)
+            bounds[col] = (s.min(), s.max())
+    return bounds
+
+
+def merge_selected_bounds(a: dict | None, b: dict) -> dict:
+    if not a:
+        return dict(b)
+    return {col: (np.fmin(a[col][0], mn), np.fmax(a[col][1], mx)) for col, (mn, mx) in b.items()}
+
+
+def criteria_matrix(data: pd.DataFrame, category_key: str, bounds: dict | None = None,
+                    plan: ScoringPlan | None = None):
+    """
+    (criteria, X, weights) for the selected category: X[i, j] is row i's normalized value
+    of criteria[j] (lookup table or min-max over `data`, as in
+    score_dataframe_for_selected_category), so X @ weights gives the unrounded Scores.
+    """
+    plan = plan or active_plan()
+    w = plan.weights_for(category_key)
+    criteria = [col for col in w if col in data.columns]
+    X = np.zeros((len(data), len(criteria)))
+    for j, col in enumerate(criteria):
+        if col in plan.lookup_tables:
+            X[:, j] = _lookup_scores(data[col], plan.lookup_tables[col])
+            continue
+        s = pd.to_numeric(data[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+        mn, mx = bounds[col] if bounds is not None else (s.min(), s.max())
+        if mx > mn:
+            X[:, j] = (s - mn) / (mx - mn)
+    return criteria, X, np.array([w[col] for col in criteria], dtype=float)
+
+
+def score_dataframe_for_selected_category(
+    data: pd.DataFrame, category_key: str, top: int | None = None, bounds: dict | None = None,
+    plan: ScoringPlan | None = None,
+) -> pd.DataFrame:
+    """
+    Score the current filtered result using weights of the **selected** category.
+    This is independent of the global row-wise add_scores_by_category().
+    Rows come back ranked (see rank_positions); with `top`, only the best `top` rows
+    are selected, without sorting the rest. `bounds` overrides the min/max taken from
+    `data` (see selected_category_bounds), e.g. when scoring chunk by chunk.
+    """
+    plan = plan or active_plan()
+    w = plan.weights_for(category_key)
+    if not w:
+        return data
+
+    # Scores are computed in a narrow frame (score and tie-break columns only), so of
+    # `data` itself only the returned rows are copied.
+    tmp = data[[c for c in data.columns if c.endswith("_Score") or c in TIE_BREAKERS]].copy()
+    assigned = []
+
+    for col, weight in w.items():
+        if col not in data.columns:
+            continue
+        assigned.append(f"{col}_Score")
+
+        # categorical
+        if col in plan.lookup_tables:
+            tmp[f"{col}_Score"] = pd.Series(_lookup_scores(data[col], plan.lookup_tables[col]), index=tmp.index) * weight
+            continue
+
+        # numeric (float64 math even for float32 columns)
+        s = pd.to_numeric(data[col], errors="coerce").fillna(0).astype(float)
+        mn, mx = bounds[col] if bounds is not None else (s.min(), s.max())
+        norm = (s - mn) / (mx - mn) if mx > mn else 0
+        tmp[f"{col}_Score"] = norm * weight
+
+    score_cols = [c for c in tmp.columns if c.endswith("_Score")]
+    if not score_cols:
+        return data.copy()
+    tmp["Score"] = tmp[score_cols].sum(axis=1).round(2)
+    with stage("top_n_ranking"):
+        positions = rank_positions(tmp, top)
+    out = data.iloc[positions].copy(deep=False)  # a fresh frame: adding columns leaves `data` alone
+    for name in [*assigned, "Score"]:
+        out[name] = tmp[name].to_numpy()[positions]
+    return out
+
+
+# ---------------- Ranking ----------------
+# Ties on Score are broken by these columns (ascending), then by catalog order.
+TIE_BREAKERS = ("Manufacturer", "Model")
+
+
+def _tie_codes(values: pd.Series) -> np.ndarray:
+    """Codes in ascending name order for a tie-breaker column; missing names sort last."""
+    codes, uniques = pd.factorize(values.astype(str), sort=True)
+    return np.where(codes < 0, len(uniques), codes)
+
+
+def rank_positions(scored: pd.DataFrame, k: int | None = None) -> np.ndarray:
+    """
+    Positions of the best rows by Score (descending, NaN last), ties broken by
+    TIE_BREAKERS (ascending, missing last) then position. With `k`, only rows that
+    can make the top k are sorted: an argpartition-style selection finds the k-th
+    best Score first.
+    """
+    score = scored["Score"].to_numpy(dtype=float)
+    key = np.where(np.isnan(score), -np.inf, score)
+    n = len(key)
+    cand = np.arange(n)
+    if k is not None and k < n:
+        kth = np.partition(key, n - k)[n - k]
+        cand = np.flatnonzero(key >= kth)  # keeps every row tied with the k-th
+    sort_keys = [cand]
+    for col in reversed(TIE_BREAKERS):
+        if col in scored.columns:
+            sort_keys.append(_tie_codes(scored[col].iloc[cand]))
+    sort_keys.append(-key[cand])
+    ranked = cand[np.lexsort(sort_keys)]
+    return ranked if k is None else ranked[:k]
+
+
+def tie_break_order(scored: pd.DataFrame) -> np.ndarray:
+    """Positions sorted by TIE_BREAKERS then position (rank order among equal Scores)."""
+    keys = [np.arange(len(scored))]
+    for col in reversed(TIE_BREAKERS):
+        if col in scored.columns:
+            keys.append(_tie_codes(scored[col]))
+    return np.lexsort(keys)
+
+
+def top_k(scored: pd.DataFrame, k: int) -> pd.DataFrame:
+    """The best `k` rows of a scored frame, in rank order."""
+    return scored.iloc[rank_positions(scored, k)]
+
+
+class TopK:
+    """
+    Running top-k over scored chunks: memory stays at k + one chunk, and the result
+    equals top_k() over the concatenated chunks (fed in catalog order).
+    """
+
+    def __init__(self, k: int):
+        self.k = max(int(k), 1)
+        self._best = None
+
+    def push(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        chunk = top_k(chunk, self.k)
+        merged = chunk if self._best is None else pd.concat([self._best, chunk])
+        self._best = top_k(merged, self.k)
+
+    def result(self) -> pd.DataFrame:
+        return self._best if self._best is not None else pd.DataFrame()
@@ -0,0 +1,213 @@
+# sensitivity.py
+# ---------------- Weight sensitivity / Monte Carlo rank stability ----------------
+"""
+How robust is a category's top-N to the exact weights of the active criteria?
+
+The normalized criteria matrix X (rows x criteria) is built once; thousands of
+perturbed weight vectors are then scored with one matrix multiply per chunk
+(chunks sized to a memory budget) and ranked like the app does: Score rounded to
+2 decimals, descending, ties broken by Manufacturer, Model, position.
+
+    python sensitivity.py Drones_All_Together.xlsx --category fpv --top 5 --samples 5000
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from scoring import TIE_BREAKERS, ScoringPlan, active_plan, criteria_matrix, tie_break_order
+
+DEFAULT_SAMPLES = 2000
+DEFAULT_SPREAD = 0.2
+CHUNK_MB = 64
+
+
+@dataclass(frozen=True)
+class SensitivityResult:
+    """
+    drones: one row per drone (index of the input frame), ordered by base rank, with
+    p_top_n and rank statistics over the samples (ranks are 1-based; median/p90 are NaN
+    when they fall below the tracked rank window).
+    thresholds: per criterion, the range its weight can move (others fixed) before the
+    base top-N set changes.
+    rank_hist: counts per drone of ranks 1..track, plus a last column for ranks > track.
+    """
+
+    category: str
+    top_n: int
+    n_samples: int
+    criteria: tuple
+    base_weights: np.ndarray
+    drones: pd.DataFrame
+    thresholds: pd.DataFrame
+    rank_hist: np.ndarray
+
+
+def perturbed_weights(base: np.ndarray, n: int, spread: float, rng) -> np.ndarray:
+    """`n` weight vectors: each weight scaled by U(1 - spread, 1 + spread), renormalized to sum(base)."""
+    w = base * rng.uniform(1 - spread, 1 + spread, size=(n, len(base)))
+    return w * (base.sum() / w.sum(axis=1, keepdims=True))
+
+
+def _ranks(X: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """0-based rank of each row (columns of X, in tie-break order) for each weight vector."""
+    S = np.round(weights @ X.T, 2)
+    order = np.argsort(-S, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(X.shape[0]), order.shape), axis=1)
+    return ranks
+
+
+def _hist_quantile(hist: np.ndarray, q: float) -> np.ndarray:
+    cum = np.cumsum(hist, axis=1)
+    pos = (cum < q * cum[:, -1:]).sum(axis=1).astype(float)
+    pos[pos >= hist.shape[1] - 1] = np.nan  # beyond the tracked window
+    return pos + 1
+
+
+def weight_thresholds(X: np.ndarray, base: np.ndarray, criteria, top: np.ndarray) -> pd.DataFrame:
+    """
+    For each criterion, [stable_from, stable_to]: weights (others fixed, unrounded scores)
+    for which no drone outside the `top` positions overtakes one inside them.
+    """
+    s = X @ base
+    inside = np.zeros(len(s), dtype=bool)
+    inside[top] = True
+    rows = []
+    for j, col in enumerate(criteria):
+        lo, hi = 0.0, np.inf
+        if inside.any() and (~inside).any():
+            gap = s[inside][:, None] - s[~inside][None, :]
+            slope = X[inside, j][:, None] - X[~inside, j][None, :]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                delta = -gap / slope  # weight change at which the pair's scores cross
+            up = delta[(slope < 0) & (delta >= 0)]
+            down = delta[(slope > 0) & (delta <= 0)]
+            if up.size:
+                hi = base[j] + up.min()
+            if down.size:
+                lo = max(base[j] + down.max(), 0.0)
+        rows.append({"criterion": col, "weight": base[j], "stable_from": lo, "stable_to": hi})
+    return pd.DataFrame(rows)
+
+
+def analyze_sensitivity(
+    data: pd.DataFrame,
+    category_key: str,
+    top_n: int = 5,
+    n_samples: int = DEFAULT_SAMPLES,
+    spread: float = DEFAULT_SPREAD,
+    seed: int = 0,
+    track: int | None = None,
+    chunk_mb: int = CHUNK_MB,
+    plan: ScoringPlan | None = None,
+) -> SensitivityResult:
+    """
+    Monte Carlo rank stability of `data` (already filtered, e.g. one category) under the
+    selected category's weights perturbed by +/- `spread`. Ranks up to `track`
+    (default 4 * top_n) are kept as a histogram for the median/p90 columns.
+    `plan` defaults to the active criteria.
+    """
+    plan = plan or active_plan()
+    if category_key not in plan.categories:
+        raise ValueError(f"Unknown category {category_key!r}")
+    if data.empty:
+        raise ValueError("No drones to analyze")
+    n = len(data)
+    top_n = min(max(int(top_n), 1), n)
+    track = min(track or 4 * top_n, n)
+
+    criteria, X, base = criteria_matrix(data, category_key, plan=plan)
+    # Put rows in tie-break order once so a stable sort on Score alone ranks like the app.
+    perm = tie_break_order(data)
+    inv = np.empty_like(perm)
+    inv[perm] = np.arange(n)
+    Xp = X[perm]
+
+    base_rank = _ranks(Xp, base[None, :])[0][inv]
+
+    in_top = np.zeros(n)
+    rank_sum = np.zeros(n)
+    rank_sq = np.zeros(n)
+    best = np.full(n, n)
+    worst = np.zeros(n, dtype=np.int64)
+    hist = np.zeros((n, track + 1), dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    # Per sample: Scores + argsort + ranks (3 x 8 bytes per drone).
+    batch = max(1, int(chunk_mb * 2**20 // (24 * n)))
+    done = 0
+    while done < n_samples:
+        size = min(batch, n_samples - done)
+        ranks = _ranks(Xp, perturbed_weights(base, size, spread, rng))[:, inv]
+        in_top += (ranks < top_n).sum(axis=0)
+        rank_sum += ranks.sum(axis=0)
+        rank_sq += (ranks.astype(float) ** 2).sum(axis=0)
+        best = np.minimum(best, ranks.min(axis=0))
+        worst = np.maximum(worst, ranks.max(axis=0))
+        clipped = np.minimum(ranks, track) + np.arange(n) * (track + 1)
+        hist += np.bincount(clipped.ravel(), minlength=n * (track + 1)).reshape(n, track + 1)
+        done += size
+
+    mean = rank_sum / n_samples
+    drones = pd.DataFrame(
+        {col: data[col].to_numpy() for col in TIE_BREAKERS if col in data.columns}, index=data.index
+    ).assign(
+        base_rank=base_rank + 1,
+        p_top_n=in_top / n_samples,
+        mean_rank=mean + 1,
+        rank_std=np.sqrt(np.maximum(rank_sq / n_samples - mean**2, 0)),
+        best_rank=best + 1,
+        worst_rank=worst + 1,
+        median_rank=_hist_quantile(hist, 0.5),
+        p90_rank=_hist_quantile(hist, 0.9),
+    )
+    order = np.argsort(base_rank, kind="stable")
+    # Thresholds are exact crossings, so they use the unrounded base top-N.
+    exact_top = perm[np.argsort(-(Xp @ base), kind="stable")[:top_n]]
+    thresholds = weight_thresholds(X, base, criteria, exact_top)
+    return SensitivityResult(
+        category_key, top_n, n_samples, tuple(criteria), base,
+        drones.iloc[order], thresholds, hist[order],
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Monte Carlo weight sensitivity of a category's top-N.")
+    ap.add_argument("catalog", help="Catalog workbook (.xlsx/.csv/.parquet)")
+    ap.add_argument("--category", required=True, choices=list(active_plan().categories))
+    ap.add_argument("--top", type=int, default=5, help="N of the top-N being tested")
+    ap.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Perturbed weight vectors")
+    ap.add_argument("--spread", type=float, default=DEFAULT_SPREAD, help="Relative weight noise (0.2 = +/-20%%)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", help="Write the per-drone table to this CSV")
+    return ap
+
+
+def main(argv=None) -> int:
+    from criteria_config import criteria_status, refresh_criteria
+    from ingest import iter_catalog_chunks
+    from scoring import filter_subset
+
+    refresh_criteria(force=True)  # DRONE_CRITERIA_FILE, before --category choices are listed
+    if criteria_status()["error"]:
+        print(f"warning: {criteria_status()['error']}; using the built-in criteria", file=sys.stderr)
+    args = build_parser().parse_args(argv)
+    catalog = pd.concat(list(iter_catalog_chunks(args.catalog)))
+    data = filter_subset(catalog, args.category, "All", "All", "All")
+    if data.empty:
+        raise SystemExit(f"No {args.category!r} drones in {args.catalog}")
+    result = analyze_sensitivity(data, args.category, args.top, args.samples, args.spread, args.seed)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(result.drones.head(2 * result.top_n).to_string())
+        print()
+        print(result.thresholds.to_string(index=False))
+    if args.output:
+        result.drones.to_csv(args.output)
+        print(f"saved {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# server.py
+# ---------------- Local HTTP scoring API ----------------
+"""
+Serve the Calculate pipeline (filters -> thresholds -> rescoring -> top N) as JSON
+for other tools, with catalogs parsed, scored and indexed once at startup.
+
+    python server.py Drones_All_Together.xlsx other_vendor.xlsx --port 8000
+
+    GET  /health
+    GET  /catalogs                      names, row counts and dataset keys
+    POST /query   {"catalog": "Drones_All_Together", "category": "fpv", "n": 5,
+                   "battery_type": "All", "frame_material": "All",
+                   "flight_control_board": "All",
+                   "thresholds": {"Flight_Time_(min)": 20}, "columns": ["Model", "Score"]}
+    POST /skyline same filters as /query plus "criteria": [...], "minimize": [...];
+                  returns every drone on that Pareto front ("n" is ignored)
+    POST /similar {"catalog": ..., "manufacturer": "DJI", "model": "Avata", "k": 5, "columns": [...]}
+                  the k closest drones of the same category, with a "Distance"
+    POST /update  {"catalog": ..., "rows": [{"Manufacturer": "DJI", "Model": "Avata", ...},
+                   {"Manufacturer": ..., "Model": ..., "Action": "remove"}]}
+                  applies a delta in memory, rescoring only the touched categories
+    POST /reload  {"catalog": "Drones_All_Together"}   (omit "catalog" to reload all);
+                  also re-reads the criteria file
+    GET  /criteria                      criteria source, version, revision, per-category versions
+
+"n" and "k" are capped at MAX_TOP_N.
+
+With --criteria (or DRONE_CRITERIA_FILE), edits to the criteria file are picked up
+within DRONE_CRITERIA_POLL_SECONDS; loaded catalogs are then rescored for the changed
+categories only.
+
+Requests are handled on a thread per connection. Query results are shared with the
+app's query cache (query.py) and the serialized JSON bodies are cached on top of it,
+within DRONE_RESPONSE_CACHE_ENTRIES and DRONE_RESPONSE_CACHE_MB.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from caching import LRUCache
+from criteria_config import CriteriaError, criteria_status, refresh_criteria, watch_criteria
+from filter_index import THRESHOLD_COLUMNS
+from ingest import apply_delta, load_catalog, rescore_catalog
+from query import query_cache_stats, query_key, run_query, run_skyline
+from scoring import active_plan
+from similarity import similar_drones, similarity_cache_stats
+from skyline import numeric_criteria
+
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("DRONE_RESPONSE_CACHE_ENTRIES", "1024"))
+RESPONSE_CACHE_MB = int(os.environ.get("DRONE_RESPONSE_CACHE_MB", "64"))
+MAX_BODY_BYTES = 1024 * 1024
+MAX_TOP_N = 1000  # largest "n" (/query) and "k" (/similar); larger values are capped
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class CatalogRegistry:
+    """Named catalogs loaded from workbook paths; reload swaps entries atomically."""
+
+    def __init__(self, paths):
+        self._paths = {os.path.splitext(os.path.basename(p))[0]: p for p in paths}
+        self._catalogs = {}
+        self._lock = threading.Lock()
+        for name in self._paths:
+            self.reload(name)
+
+    def names(self) -> list:
+        return list(self._paths)
+
+    def get(self, name: str | None):
+        if name is None:
+            raise ApiError(400, f"Specify a catalog; available: {self.names()}")
+        catalog = self._catalogs.get(name)
+        if catalog is None:
+            raise ApiError(404, f"Unknown catalog {name!r}; available: {self.names()}")
+        plan = active_plan()
+        if catalog.plan.version != plan.version:
+            # Criteria changed since it was scored: rescore the changed categories once.
+            with self._lock:
+                catalog = self._catalogs[name]
+                if catalog.plan.version != plan.version:
+                    catalog = self._catalogs[name] = rescore_catalog(catalog, plan)
+        return catalog
+
+    def reload(self, name: str) -> dict:
+        if name not in self._paths:
+            raise ApiError(404, f"Unknown catalog {name!r}; available: {self.names()}")
+        with open(self._paths[name], "rb") as fh:
+            catalog = load_catalog(fh.read())
+        with self._lock:
+            previous = self._catalogs.get(name)
+            self._catalogs[name] = catalog
+        return {"catalog": name, "key": catalog.key, "changed": previous is None or previous.key != catalog.key}
+
+    def update(self, name: str, delta) -> dict:
+        """Apply a delta frame to the loaded catalog (until the next reload from disk)."""
+        while True:
+            base = self.get(name)
+            catalog = apply_delta(base, delta)  # outside the lock: queries keep being served
+            with self._lock:
+                if self._catalogs.get(name) is base:
+                    self._catalogs[name] = catalog
+                    break
+            # Reloaded, rescored or updated meanwhile: apply the delta to the current one.
+        return {"catalog": name, "key": catalog.key, **asdict(catalog.update)}
+
+    def describe(self) -> list:
+        return [
+            {"catalog": name, "path": self._paths[name], "rows": len(cat.scored), "key": cat.key,
+             "criteria": cat.plan.version}
+            for name, cat in self._catalogs.items()
+        ]
+
+
+def _parse_query(body: dict) -> dict:
+    category = body.get("category", "All Drones")
+    if not isinstance(category, str):
+        raise ApiError(400, "category must be a string")
+    if category != "All Drones" and category not in active_plan().categories:
+        raise ApiError(400, f"Unknown category {category!r}")
+    thresholds = body.get("thresholds") or {}
+    if not isinstance(thresholds, dict):
+        raise ApiError(400, "thresholds must be an object of {column: minimum}")
+    unknown = sorted(set(thresholds) - set(THRESHOLD_COLUMNS))
+    if unknown:
+        raise ApiError(400, f"Unknown threshold columns {unknown}; allowed: {THRESHOLD_COLUMNS}")
+    try:
+        thresholds = {col: float(val) for col, val in thresholds.items()}
+        n = int(body.get("n", 5))
+    except (TypeError, ValueError):
+        raise ApiError(400, "thresholds and n must be numbers") from None
+    filters = {field: body.get(field, "All") for field in ("battery_type", "frame_material", "flight_control_board")}
+    for field, value in filters.items():
+        if not isinstance(value, str):
+            raise ApiError(400, f"{field} must be a string")
+    columns = body.get("columns")
+    if columns is not None and not (isinstance(columns, list) and all(isinstance(c, str) for c in columns)):
+        raise ApiError(400, "columns must be a list of column names")
+    return {
+        "cat": category,
+        "bat": filters["battery_type"],
+        "frm": filters["frame_material"],
+        "fcb": filters["flight_control_board"],
+        "thresholds": thresholds,
+        "n": min(max(n, 1), MAX_TOP_N),
+        "columns": columns,
+    }
+
+
+def _catalog_name(body: dict) -> str | None:
+    name = body.get("catalog")
+    if name is not None and not isinstance(name, str):
+        raise ApiError(400, "catalog must be a string")
+    return name
+
+
+def _parse_criteria(body: dict, field: str, plan) -> list:
+    value = body.get(field) or []
+    allowed = numeric_criteria(plan)
+    if not (isinstance(value, list) and all(isinstance(c, str) for c in value) and set(value) <= set(allowed)):
+        raise ApiError(400, f"{field} must be a list of numeric criteria: {allowed}")
+    return value
+
+
+class ScoringService:
+    """The endpoints, independent of the HTTP plumbing."""
+
+    def __init__(self, registry: CatalogRegistry):
+        self.registry = registry
+        self._responses = LRUCache(
+            max_entries=RESPONSE_CACHE_ENTRIES, max_bytes=RESPONSE_CACHE_MB * 1024 * 1024, sizeof=len
+        )
+
+    def _catalog(self, body: dict):
+        refresh_criteria()
+        names = self.registry.names()
+        name = _catalog_name(body) or (names[0] if len(names) == 1 else None)
+        return name, self.registry.get(name)
+
+    def query(self, body: dict, skyline: bool = False) -> bytes:
+        name, catalog = self._catalog(body)
+        q = _parse_query(body)
+        columns = q.pop("columns")
+        columns = tuple(columns) if columns else None
+        extra = {}
+        if skyline:
+            del q["n"]  # the whole front is returned
+            extra = {field: _parse_criteria(body, field, catalog.plan) for field in ("criteria", "minimize")}
+            key = ("skyline", name, query_key(catalog, n=0, **q), columns, *map(tuple, extra.values()))
+        else:
+            # The name is part of the body, and catalogs loaded from the same bytes share keys.
+            key = (name, query_key(catalog, **q), columns)
+
+        def render():
+            result = run_skyline(catalog, **q, **extra) if skyline else run_query(catalog, **q)
+            top = result.top
+            if columns:
+                top = top.loc[:, [c for c in columns if c in top.columns]]
+            head = json.dumps({
+                "catalog": name,
+                "category": q["cat"],
+                "count": len(top),
+                "empty_reason": result.empty_reason,
+            })
+            # Splice the frame's own JSON in rather than round-tripping it through dicts.
+            return (head[:-1] + ', "rows": ' + top.to_json(orient="records") + "}").encode("utf-8")
+
+        return self._responses.get_or_compute(key, render)
+
+    def similar(self, body: dict) -> bytes:
+        name, catalog = self._catalog(body)
+        manufacturer, model = body.get("manufacturer"), body.get("model")
+        if not (isinstance(manufacturer, str) and isinstance(model, str)):
+            raise ApiError(400, "manufacturer and model are required strings")
+        try:
+            k = min(max(int(body.get("k", 5)), 1), MAX_TOP_N)
+        except (TypeError, ValueError):
+            raise ApiError(400, "k must be a number") from None
+        columns = body.get("columns")
+        if columns is not None and not (isinstance(columns, list) and all(isinstance(c, str) for c in columns)):
+            raise ApiError(400, "columns must be a list of column names")
+        columns = tuple(columns) if columns else None
+        key = ("similar", name, catalog.key, manufacturer, model, k, columns)
+
+        def render():
+            try:
+                rows = similar_drones(catalog, manufacturer, model, k)
+            except KeyError as exc:
+                raise ApiError(404, exc.args[0]) from None
+            if columns:
+                rows = rows.loc[:, [c for c in columns if c in rows.columns and c != "Distance"] + ["Distance"]]
+            head = json.dumps({"catalog": name, "manufacturer": manufacturer, "model": model, "count": len(rows)})
+            return (head[:-1] + ', "rows": ' + rows.to_json(orient="records") + "}").encode("utf-8")
+
+        return self._responses.get_or_compute(key, render)
+
+    def update(self, body: dict) -> dict:
+        name, _ = self._catalog(body)
+        rows = body.get("rows")
+        if not (isinstance(rows, list) and rows and all(isinstance(r, dict) for r in rows)):
+            raise ApiError(400, "rows must be a non-empty list of objects")
+        try:
+            return self.registry.update(name, pd.DataFrame(rows))
+        except ValueError as exc:
+            raise ApiError(400, str(exc)) from None
+
+    def reload(self, body: dict) -> dict:
+        name = _catalog_name(body)
+        names = [name] if name else self.registry.names()
+        refresh_criteria(force=True)
+        return {"reloaded": [self.registry.reload(name) for name in names], "criteria": criteria_status()}
+
+    def stats(self) -> dict:
+        return {
+            "responses": self._responses.stats(),
+            "queries": query_cache_stats(),
+            "similarity": similarity_cache_stats(),
+        }
+
+
+def make_handler(service: ScoringService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+        # Headers and body go out in separate writes; without TCP_NODELAY, Nagle plus
+        # delayed ACKs add ~40 ms to every keep-alive response.
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, payload):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status >= 400:
+                # The request body may be unread, so the connection can't be reused.
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ApiError(413, "Request body too large")
+            if not length:
+                return {}
+            try:
+                body = json.loads(self.rfile.read(length))
+            except json.JSONDecodeError as exc:
+                raise ApiError(400, f"Invalid JSON: {exc}") from None
+            if not isinstance(body, dict):
+                raise ApiError(400, "Request body must be a JSON object")
+            return body
+
+        def _dispatch(self, routes: dict):
+            try:
+                route = routes.get(self.path.split("?", 1)[0])
+                if route is None:
+                    raise ApiError(404, f"No route {self.command} {self.path}")
+                self._send(200, route())
+            except ApiError as exc:
+                self._send(exc.status, {"error": str(exc)})
+            except Exception as exc:  # answer with the error rather than a bare connection reset
+                self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+        def do_GET(self):
+            self._dispatch({
+                "/health": lambda: {"status": "ok", "catalogs": service.registry.names()},
+                "/catalogs": lambda: {"catalogs": service.registry.describe()},
+                "/criteria": criteria_status,
+                "/stats": service.stats,
+            })
+
+        def do_POST(self):
+            self._dispatch({
+                "/query": lambda: service.query(self._body()),
+                "/skyline": lambda: service.query(self._body(), skyline=True),
+                "/similar": lambda: service.similar(self._body()),
+                "/update": lambda: service.update(self._body()),
+                "/reload": lambda: service.reload(self._body()),
+            })
+
+        def log_message(self, format, *args):
+            if not self.server.quiet:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def make_server(paths, host: str = "127.0.0.1", port: int = 8000, quiet: bool = False) -> ThreadingHTTPServer:
+    """Load `paths` and bind (port 0 picks a free port); call serve_forever() to run."""
+    server = ThreadingHTTPServer((host, port), make_handler(ScoringService(CatalogRegistry(paths))))
+    server.daemon_threads = True
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Serve drone rankings over HTTP/JSON.")
+    ap.add_argument("catalogs", nargs="+", help="Catalog workbooks to preload")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--quiet", action="store_true", help="Don't log each request")
+    ap.add_argument("--criteria", help="Criteria file (.json/.toml/.yaml), reloaded when it changes")
+    args = ap.parse_args(argv)
+
+    if args.criteria:
+        try:
+            watch_criteria(args.criteria)
+        except CriteriaError as exc:
+            ap.error(str(exc))
+    else:
+        refresh_criteria(force=True)
+    server = make_server(args.catalogs, args.host, args.port, args.quiet)
+    print(f"serving {', '.join(args.catalogs)} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
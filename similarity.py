@@ -0,0 +1,163 @@
+# similarity.py
+# ---------------- "Find similar drones": k-NN within a category ----------------
+"""
+Nearest neighbours of a drone among drones of its own category, using the weighted
+min-max criteria values add_scores_by_category() already stores in the *_Score
+columns (normalized value x category weight), so criteria count as much as they do
+in the Score.
+
+One index per category: a KD-tree when SciPy is installed, otherwise the vectors
+alone, searched with one vectorized distance pass (fast for catalog-sized
+categories). Indexes are cached by category and a hash of its vectors, so when a
+dataset changes only the categories whose vectors changed are rebuilt.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache, content_hash
+from scoring import ScoringPlan, active_plan
+
+SIMILARITY_CACHE_ENTRIES = int(os.environ.get("DRONE_SIMILARITY_CACHE_ENTRIES", "64"))
+MAX_LISTED_DRONES = 2000  # larger categories are searched rather than listed in the app
+SEARCH_LIMIT = 200  # matches returned by search_drones()
+
+
+@dataclass(frozen=True)
+class CategoryIndex:
+    """Row positions (in the scored frame) and vectors of one category, plus an optional KD-tree."""
+
+    category: str
+    columns: tuple
+    positions: np.ndarray
+    vectors: np.ndarray
+    tree: object = None
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.positions.nbytes + self.vectors.nbytes * (2 if self.tree is not None else 1))
+
+    def query(self, vector: np.ndarray, k: int):
+        """(distances, row positions) of the k nearest vectors, closest first."""
+        k = min(k, len(self.positions))
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        if self.tree is not None:
+            dist, idx = self.tree.query(vector, k=k)
+            return np.atleast_1d(dist), self.positions[np.atleast_1d(idx)]
+        dist = np.sqrt(((self.vectors - vector) ** 2).sum(axis=1))
+        idx = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+        idx = idx[np.lexsort((idx, dist[idx]))]  # by distance, then catalog order
+        return dist[idx], self.positions[idx]
+
+
+def _kdtree_class():
+    """scipy's cKDTree, imported on first index build (None without SciPy: brute force)."""
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return None
+    return cKDTree
+
+
+# Keyed by (category, vector hash): unchanged categories are shared across dataset versions.
+_index_cache = LRUCache(max_entries=SIMILARITY_CACHE_ENTRIES, sizeof=lambda ci: ci.nbytes)
+# Keyed by (dataset key, category) so repeat queries skip hashing the vectors.
+_dataset_indexes = LRUCache(max_entries=SIMILARITY_CACHE_ENTRIES)
+# Keyed by (dataset key, category): distinct drone names, and (..., text) search results.
+_drone_names = LRUCache(max_entries=SIMILARITY_CACHE_ENTRIES)
+_searches = LRUCache(max_entries=SIMILARITY_CACHE_ENTRIES)
+
+
+def category_vectors(scored: pd.DataFrame, category: str, positions: np.ndarray, plan: ScoringPlan | None = None):
+    """(columns, vectors) of the category's weighted criteria for the given rows."""
+    columns = tuple(
+        f"{col}_Score" for col in (plan or active_plan()).weights_for(category) if f"{col}_Score" in scored.columns
+    )
+    block = scored.iloc[positions][list(columns)].to_numpy(dtype=float)
+    return columns, np.nan_to_num(block, nan=0.0)
+
+
+def category_index(catalog, category: str) -> CategoryIndex:
+    """The (cached) index for one category of a Catalog."""
+
+    def lookup():
+        positions = catalog.index.query(category)
+        columns, vectors = category_vectors(catalog.scored, category, positions, catalog.plan)
+        key = (category, columns, content_hash(positions.tobytes(), vectors.tobytes()))
+
+        def build():
+            kdtree = _kdtree_class()
+            tree = kdtree(vectors) if kdtree is not None and len(vectors) else None
+            return CategoryIndex(category, columns, positions, vectors, tree)
+
+        return _index_cache.get_or_compute(key, build)
+
+    return _dataset_indexes.get_or_compute((catalog.key, category), lookup)
+
+
+def find_drone(catalog, manufacturer: str, model: str, category: str | None = None) -> int:
+    """
+    Position of the first row with this Manufacturer and Model, among the rows of
+    `category` when given (KeyError if none). Vectorized comparisons over the
+    candidate rows: the Model column first, then Manufacturer on its matches only.
+    """
+    scored = catalog.scored
+    rows = catalog.index.query(category) if category is not None else np.arange(len(scored))
+    models = scored["Model"].iloc[rows] if len(rows) < len(scored) else scored["Model"]
+    rows = rows[(models.astype(str) == str(model)).to_numpy(dtype=bool, na_value=False)]
+    makers = scored["Manufacturer"].iloc[rows].astype(str)
+    rows = rows[(makers == str(manufacturer)).to_numpy(dtype=bool, na_value=False)]
+    if not len(rows):
+        raise KeyError(f"No drone {manufacturer} {model}")
+    return int(rows[0])
+
+
+def drone_names(catalog, category: str) -> pd.DataFrame:
+    """
+    Distinct Manufacturer/Model pairs of a category ('All Drones': every drone) in
+    catalog order, with a lowercase 'Label' for searching. Cached per dataset and category.
+    """
+
+    def build():
+        rows = catalog.scored.iloc[catalog.index.query(category)]
+        names = rows[["Manufacturer", "Model"]].astype(str).drop_duplicates(ignore_index=True)
+        return names.assign(Label=(names["Manufacturer"] + " " + names["Model"]).str.lower())
+
+    return _drone_names.get_or_compute((catalog.key, category), build)
+
+
+def search_drones(catalog, category: str, text: str, limit: int = SEARCH_LIMIT) -> list:
+    """Up to `limit` (Manufacturer, Model) pairs of the category whose names contain `text` (any case)."""
+    text = text.strip().lower()
+
+    def build():
+        names = drone_names(catalog, category)
+        hits = names[names["Label"].str.contains(text, regex=False)].head(limit)
+        return list(zip(hits["Manufacturer"], hits["Model"]))
+
+    return _searches.get_or_compute((catalog.key, category, text, limit), build)
+
+
+def similar_drones(catalog, manufacturer: str, model: str, k: int = 5, category: str | None = None) -> pd.DataFrame:
+    """
+    The `k` drones of the same category closest to Manufacturer/Model (itself excluded),
+    closest first, with a 'Distance' column. Empty when its category has no weights.
+    `category` narrows the search for the drone (e.g. the category it was picked from).
+    """
+    pos = find_drone(catalog, manufacturer, model, category)
+    category = str(catalog.scored["Category"].iloc[pos])
+    if category not in (catalog.plan or active_plan()).categories:
+        return catalog.scored.iloc[:0].assign(Distance=pd.Series(dtype=float))
+    index = category_index(catalog, category)
+    target = index.vectors[np.searchsorted(index.positions, pos)]
+    dist, rows = index.query(target, k + 1)
+    keep = rows != pos
+    dist, rows = dist[keep][:k], rows[keep][:k]
+    return catalog.scored.iloc[rows].assign(Distance=np.round(dist, 4))
+
+
+def similarity_cache_stats() -> dict:
+    return _index_cache.stats()
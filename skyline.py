@@ -0,0 +1,167 @@
+# skyline.py
+# ---------------- Pareto frontier (skyline) over numeric criteria ----------------
+"""
+Drones not dominated on a chosen set of numeric criteria: no other drone is at least
+as good on every criterion and strictly better on one. Higher is better (as in the
+weighted Score) unless a column is listed in `minimize`; missing values count as 0.
+
+Identical points are collapsed first. Two criteria use a single sort + running
+maximum (O(n log n)); more use sort-filter-skyline: points sorted by descending sum
+(ties broken by descending lexicographic order) can only be dominated by earlier ones,
+so blocks of candidates are checked against
+the skyline found so far (vectorized, dropping dominated candidates as they are found)
+and then against the earlier members of their own block.
+"""
+import numpy as np
+import pandas as pd
+
+from scoring import ScoringPlan, active_plan
+
+BLOCK_ROWS = 2048
+_SKYLINE_CHUNK = 256
+
+
+def _weakly_dominates(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """out[i, j]: a[j] >= b[i] on every column (built column by column, no 3-D temporary)."""
+    out = a[None, :, 0] >= b[:, None, 0]
+    for k in range(1, a.shape[1]):
+        out &= a[None, :, k] >= b[:, None, k]
+    return out
+
+
+def _dominated_by(front: np.ndarray, cand: np.ndarray) -> np.ndarray:
+    """Mask of `cand` rows weakly dominated by some row of `front` (>= on every column)."""
+    alive = np.ones(len(cand), dtype=bool)
+    idx = np.arange(len(cand))
+    for start in range(0, len(front), _SKYLINE_CHUNK):
+        if not len(idx):
+            break
+        part = front[start:start + _SKYLINE_CHUNK]
+        hit = _weakly_dominates(part, cand[idx]).any(axis=1)
+        alive[idx[hit]] = False
+        idx = idx[~hit]
+    return ~alive
+
+
+def _skyline_2d(points: np.ndarray) -> np.ndarray:
+    order = np.lexsort((-points[:, 1], -points[:, 0]))  # x desc, then y desc
+    y = points[order, 1]
+    best_before = np.concatenate(([-np.inf], np.maximum.accumulate(y)[:-1]))
+    return np.sort(order[y > best_before])
+
+
+def _skyline_sfs(points: np.ndarray, block: int) -> np.ndarray:
+    """`points` are distinct and in ascending lexicographic order, as _distinct() returns them."""
+    # A dominator has a sum at least as large (float addition is monotonic) and is
+    # lexicographically larger: a stable sort of the reversed rows ranks it first even
+    # when the sums round equal.
+    order = len(points) - 1 - np.argsort(-points.sum(axis=1)[::-1], kind="stable")
+    ranked = points[order]
+    keep = []
+    front = np.empty((0, points.shape[1]))
+    for start in range(0, len(ranked), block):
+        cand_idx = np.arange(start, min(start + block, len(ranked)))
+        cand_idx = cand_idx[~_dominated_by(front, ranked[cand_idx])]
+        if not len(cand_idx):
+            continue
+        cand = ranked[cand_idx]
+        # Within the block a dominator always comes first (see the ranking above).
+        ge = _weakly_dominates(cand, cand)  # ge[i, j]: j >= i everywhere
+        survivors = ~np.tril(ge, k=-1).any(axis=1)
+        cand_idx = cand_idx[survivors]
+        keep.append(cand_idx)
+        front = np.vstack([front, ranked[cand_idx]])
+    return np.sort(order[np.concatenate(keep)]) if keep else np.empty(0, dtype=np.intp)
+
+
+def _distinct(values: np.ndarray):
+    """(distinct rows, row -> distinct index); a lexsort is much faster than np.unique(axis=0)."""
+    order = np.lexsort(values.T[::-1])
+    ranked = values[order]
+    first = np.concatenate(([True], (ranked[1:] != ranked[:-1]).any(axis=1)))
+    inverse = np.empty(len(values), dtype=np.intp)
+    inverse[order] = np.cumsum(first) - 1
+    return ranked[first], inverse
+
+
+def _prefilter(values: np.ndarray, n_pivots: int = 256) -> np.ndarray:
+    """
+    Mask of rows not strictly dominated by the skyline of the `n_pivots` largest-sum rows.
+    On large inputs this discards most rows before the exact pass at O(n) cost.
+    """
+    k = min(n_pivots, len(values))
+    top = np.argpartition(-values.sum(axis=1), k - 1)[:k]
+    pivots = values[top][skyline_positions(values[top])]
+    keep = np.ones(len(values), dtype=bool)
+    for p in pivots:
+        idx = np.flatnonzero(keep)
+        cand = values[idx]
+        keep[idx[(p >= cand).all(axis=1) & (p > cand).any(axis=1)]] = False
+    return keep
+
+
+def skyline_positions(values: np.ndarray, block: int = BLOCK_ROWS) -> np.ndarray:
+    """Ascending positions of the non-dominated rows of a (rows x criteria) array, maximizing all."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2 or len(values) == 0:
+        return np.empty(0, dtype=np.intp)
+    if values.shape[1] == 0:
+        return np.arange(len(values))
+    rows = np.arange(len(values))
+    if len(values) > 4 * block:
+        rows = np.flatnonzero(_prefilter(values))
+    # Equal points never dominate each other: solve on the distinct ones, then expand.
+    points, inverse = _distinct(values[rows])
+    d = points.shape[1]
+    if d == 1:
+        front = np.array([len(points) - 1])  # distinct rows come out ascending
+    elif d == 2:
+        front = _skyline_2d(points)
+    else:
+        front = _skyline_sfs(points, block)
+    on_front = np.zeros(len(points), dtype=bool)
+    on_front[front] = True
+    return rows[on_front[inverse]]
+
+
+def numeric_criteria(plan: ScoringPlan | None = None) -> list:
+    """Every numeric criterion some category weighs (active criteria by default), in weights order."""
+    plan = plan or active_plan()
+    return list(dict.fromkeys(
+        col for cat in plan.categories for col in plan.weights_for(cat) if col not in plan.lookup_tables
+    ))
+
+
+def criteria_values(data: pd.DataFrame, criteria, minimize=(), plan: ScoringPlan | None = None) -> np.ndarray:
+    """Numeric matrix for the skyline (missing -> 0, `minimize` columns negated)."""
+    allowed = numeric_criteria(plan)
+    unknown = [c for c in criteria if c not in allowed]
+    if unknown:
+        raise ValueError(f"Not numeric criteria: {unknown}; choose from {allowed}")
+    cols = []
+    for col in criteria:
+        if col in data.columns:
+            s = pd.to_numeric(data[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+        else:
+            s = np.zeros(len(data))
+        cols.append(-s if col in minimize else s)
+    return np.column_stack(cols) if cols else np.empty((len(data), 0))
+
+
+def default_criteria(category_key: str, plan: ScoringPlan | None = None) -> list:
+    """The category's numeric criteria (active criteria by default), or all of them for 'All Drones'."""
+    plan = plan or active_plan()
+    if category_key in plan.categories:
+        return [c for c in plan.weights_for(category_key) if c not in plan.lookup_tables]
+    return numeric_criteria(plan)
+
+
+def pareto_front(data: pd.DataFrame, criteria=None, category_key: str = "All Drones", minimize=(),
+                 plan: ScoringPlan | None = None) -> pd.DataFrame:
+    """
+    Rows of `data` (already filtered, e.g. by filter_subset + apply_numeric_thresholds)
+    on the Pareto frontier of `criteria` (default: the category's numeric criteria),
+    in their original order.
+    """
+    criteria = list(criteria) if criteria else default_criteria(category_key, plan)
+    return data.iloc[skyline_positions(criteria_values(data, criteria, minimize, plan))]
@@ -0,0 +1,124 @@
+# test_criteria_config.py
+# ---------------- Criteria file validation, hot reload and per-category versions ----------------
+import json
+
+import pandas as pd
+import pytest
+
+from criteria_config import CriteriaError, CriteriaWatcher, validate_criteria
+from criteria_data import weights_dict
+from scoring import active_plan, compile_scoring_plan, score_by_category, set_active_plan
+
+
+def _doc(**changes) -> dict:
+    weights = {cat: dict(w) for cat, w in weights_dict.items()}
+    weights.update(changes)
+    return {"weights": weights}
+
+
+@pytest.fixture(autouse=True)
+def _restore_plan():
+    previous = active_plan()
+    yield
+    set_active_plan(previous)
+
+
+def test_category_keys_are_normalized_like_the_data():
+    doc = {"weights": {"Surveillance_And_Security ": {"Flight_Time_(min)": 1}}}
+    weights, _ = validate_criteria(doc)
+    assert list(weights) == ["surveillance and security"]
+
+    df = pd.DataFrame({
+        "Category": ["Surveillance_And_Security", "surveillance and security", "FPV"],
+        "Flight_Time_(min)": [10, 20, 30],
+    })
+    scored = score_by_category(df, compile_scoring_plan(*validate_criteria(doc)))
+    assert scored["Score"].tolist() == [0.0, 1.0, 0.0]
+    assert scored["Flight_Time_(min)_Score"].notna().tolist() == [True, True, False]
+
+
+def test_keys_that_normalize_alike_are_rejected():
+    with pytest.raises(CriteriaError, match="same category 'fpv'"):
+        validate_criteria({"weights": {"FPV": {"Flight_Time_(min)": 1}, "fpv ": {"Flight_Time_(min)": 1}}})
+
+
+@pytest.mark.parametrize("doc, problem", [
+    ({}, '"weights" table'),
+    ({"weights": {"fpv": {}}}, "non-empty table"),
+    ({"weights": {"fpv": {"Flight_Time_(min)": 1.5}}}, "between 0 and 1"),
+    ({"weights": {"fpv": {"Flight_Time_(min)": True}}}, "between 0 and 1"),
+    ({"weights": {"fpv": {"Flight_Time_(min)": 0.5}}}, "sum to 0.5"),
+    ({"weights": {"fpv": {"Frame_Material": 1}}, "scores": {"Frame_Material": {"Wood": 2}}}, "'Wood'"),
+    ({"weights": {"fpv": {"Frame_Material": 1}}, "scores": []}, '"scores" must be'),
+    ({"weights": {"fpv": {"Frame_Material": 1}}, "extra": 1}, "unknown top-level keys"),
+])
+def test_invalid_documents_are_rejected(doc, problem):
+    with pytest.raises(CriteriaError, match=problem):
+        validate_criteria(doc)
+
+
+def test_all_problems_are_reported():
+    doc = {"weights": {"fpv": {"Flight_Time_(min)": 2}, "delivery": {"Flight_Time_(min)": 0.5}}, "extra": 1}
+    with pytest.raises(CriteriaError) as exc:
+        validate_criteria(doc)
+    assert len(exc.value.problems) == 3
+
+
+def test_builtin_criteria_round_trip():
+    weights, tables = validate_criteria(_doc())
+    assert compile_scoring_plan(weights, tables).version == compile_scoring_plan().version
+
+
+def test_category_versions_follow_what_each_category_uses():
+    base = compile_scoring_plan(*validate_criteria(_doc()))
+    fpv = dict(weights_dict["fpv"])
+    fpv["Flight_Time_(min)"], fpv["Max_Speed_(km/h)"] = fpv["Max_Speed_(km/h)"], fpv["Flight_Time_(min)"]
+    edited = compile_scoring_plan(*validate_criteria(_doc(fpv=fpv)))
+    changed = {cat for cat in base.categories if base.category_version(cat) != edited.category_version(cat)}
+    assert changed == {"fpv"} and edited.version != base.version
+
+    # A score table changes every category that weights its criterion.
+    doc = _doc()
+    doc["scores"] = {"Frame_Material": {"Carbon Fiber": 0.5}}
+    rescored = compile_scoring_plan(*validate_criteria(doc))
+    using = {cat for cat, w in weights_dict.items() if "Frame_Material" in w}
+    assert {cat for cat in base.categories if base.category_version(cat) != rescored.category_version(cat)} == using
+
+
+def test_watcher_reloads_and_keeps_the_last_good_plan(tmp_path):
+    path = tmp_path / "criteria.json"
+    path.write_text(json.dumps(_doc()))
+    watcher = CriteriaWatcher(str(path), poll_seconds=3600)
+    first = watcher.refresh(force=True)
+    assert watcher.error is None and first.version == compile_scoring_plan().version
+
+    fpv = {"Flight_Time_(min)": 0.5, "Max_Speed_(km/h)": 0.5}
+    path.write_text(json.dumps(_doc(fpv=fpv)))
+    assert watcher.refresh() is first  # within poll_seconds: the file is not looked at
+    second = watcher.refresh(force=True)
+    assert active_plan() is second and watcher.revision == 1
+    assert second.weights_for("fpv") == fpv
+
+    path.write_text(json.dumps(_doc(fpv={"Flight_Time_(min)": 0.5})))
+    assert watcher.refresh(force=True) is second  # rejected: the previous plan stays active
+    assert "sum to 0.5" in watcher.error and watcher.status()["version"] == second.version
+
+    path.write_text("{not json")
+    assert watcher.refresh(force=True) is second and "cannot parse JSON" in watcher.error
+
+    path.write_text(json.dumps(_doc(fpv=fpv)))
+    assert watcher.refresh(force=True).version == second.version
+    assert watcher.error is None and watcher.revision == 1  # same criteria: nothing swapped
+
+
+def test_watcher_polls_for_changes(tmp_path):
+    path = tmp_path / "criteria.json"
+    path.write_text(json.dumps(_doc()))
+    watcher = CriteriaWatcher(str(path), poll_seconds=0)
+    watcher.refresh()
+    path.write_text(json.dumps(_doc(fpv={"Flight_Time_(min)": 1})))  # a different size
+    assert watcher.refresh().weights_for("fpv") == {"Flight_Time_(min)": 1.0}
+
+    path.unlink()
+    assert watcher.refresh().weights_for("fpv") == {"Flight_Time_(min)": 1.0}
+    assert watcher.error
@@ -0,0 +1,151 @@
+# test_dataset_store.py
+# ---------------- Reference counts, release on garbage collection, eviction ----------------
+import gc
+import threading
+import time
+
+import pytest
+
+from dataset_store import DatasetStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Dataset:
+    def __init__(self, name, nbytes=100):
+        self.name = name
+        self.nbytes = nbytes
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _store(clock, **kwargs) -> DatasetStore:
+    kwargs.setdefault("max_bytes", None)
+    kwargs.setdefault("idle_seconds", 10)
+    return DatasetStore(clock=clock, **kwargs)
+
+
+def test_handles_share_one_dataset(clock):
+    store = _store(clock)
+    builds = []
+    a = store.acquire("k", lambda: builds.append(1) or Dataset("k"))
+    b = store.acquire("k", lambda: builds.append(1) or Dataset("k"))
+    assert a.dataset is b.dataset and builds == [1]
+    stats = store.stats()
+    assert (stats["entries"], stats["handles"], stats["saved_bytes"]) == (1, 2, 100)
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    a.release()
+    a.release()  # idempotent
+    assert a.released and store.stats()["handles"] == 1
+    b.release()
+    assert store.stats()["pinned"] == 0
+
+
+def test_garbage_collected_handles_are_released(clock):
+    store = _store(clock)
+    handle = store.acquire("k", lambda: Dataset("k"))
+    assert store.stats()["pinned"] == 1
+    del handle
+    gc.collect()
+    assert store.stats()["pinned"] == 0
+    assert store.stats()["entries"] == 1  # kept until idle for idle_seconds
+    clock.now = 10
+    assert store.stats()["entries"] == 0
+
+
+def test_idle_entries_are_evicted(clock):
+    store = _store(clock)
+    kept = store.acquire("pinned", lambda: Dataset("pinned"))
+    store.acquire("a", lambda: Dataset("a")).release()
+    clock.now = 5
+    store.acquire("b", lambda: Dataset("b")).release()
+    clock.now = 12  # "a" idle for 12s, "b" for 7s
+    store.evict_idle()
+    assert store.stats()["entries"] == 2
+    clock.now = 100  # pinned entries stay however long they are idle
+    store.evict_idle()
+    assert store.stats()["entries"] == 1 and not kept.released
+
+
+def test_reacquire_refreshes_last_use(clock):
+    store = _store(clock)
+    handle = store.acquire("a", lambda: Dataset("a"))
+    clock.now = 8
+    assert store.reacquire(handle, "a", lambda: Dataset("a")) is handle
+    handle.release()
+    clock.now = 15  # released at 8: not yet idle for 10s
+    assert store.stats()["entries"] == 1
+
+    other = store.reacquire(handle, "b", lambda: Dataset("b"))
+    assert other.key == "b" and store.stats()["handles"] == 1
+
+
+def test_budget_evicts_least_recently_used_unpinned(clock):
+    store = _store(clock, max_bytes=300, idle_seconds=1000)
+    store.acquire("a", lambda: Dataset("a")).release()
+    pinned = store.acquire("b", lambda: Dataset("b"))
+    store.acquire("c", lambda: Dataset("c")).release()
+    store.acquire("a", lambda: Dataset("a")).release()  # "c" is now the least recently used
+    store.acquire("d", lambda: Dataset("d")).release()
+    stats = store.stats()
+    assert (stats["bytes"], stats["evictions"]) == (300, 1)
+    builds = []
+    for key in "abd":
+        store.acquire(key, lambda: builds.append(key) or Dataset(key)).release()
+    assert builds == []
+
+    # Pinned entries are never evicted, even over budget.
+    big = store.acquire("big", lambda: Dataset("big", nbytes=1000))
+    stats = store.stats()
+    assert (stats["entries"], stats["bytes"]) == (2, 1100) and not pinned.released
+    big.release()
+    pinned.release()
+
+
+def test_concurrent_first_requests_build_once(clock):
+    store = _store(clock)
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return Dataset("k")
+
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(store.acquire("k", build))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert builds == [1]
+    assert len({id(h.dataset) for h in handles}) == 1 and store.stats()["handles"] == 8
+
+
+def test_failed_build_is_not_stored(clock):
+    store = _store(clock)
+
+    def build():
+        raise ValueError("bad workbook")
+
+    with pytest.raises(ValueError):
+        store.acquire("k", build)
+    assert store.stats()["entries"] == 0
+    assert store.acquire("k", lambda: Dataset("k")).dataset.name == "k"
+
+
+def test_handles_get_views(clock):
+    store = _store(clock, view=lambda dataset: Dataset(dataset.name, dataset.nbytes))
+    a = store.acquire("k", lambda: Dataset("k"))
+    b = store.acquire("k", lambda: Dataset("k"))
+    assert a.dataset is not b.dataset and a.dataset.name == b.dataset.name == "k"
+    assert store.stats()["bytes"] == 100
@@ -0,0 +1,60 @@
+# test_filter_index.py
+# ---------------- FilterIndex vs. filter_subset + apply_numeric_thresholds ----------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_catalog
+from filter_index import THRESHOLD_COLUMNS, FilterIndex
+from ingest import canonicalize
+from scoring import apply_numeric_thresholds, dynamic_options, filter_subset, normalize_category
+
+
+def _messy_catalog(seed: int) -> pd.DataFrame:
+    """A synthetic catalog with missing labels and values, and text in a numeric column."""
+    rng = np.random.default_rng(seed)
+    df = generate_catalog(500, seed=seed)
+    for col in ("Category", "Battery_Type", "Frame_Material", "Flight_Control_Board", "Flight_Time_(min)"):
+        df.loc[rng.random(len(df)) < 0.05, col] = None
+    speed = df["Max_Speed_(km/h)"].astype(object)
+    speed[rng.random(len(df)) < 0.05] = "n/a"
+    return df.assign(**{"Max_Speed_(km/h)": speed})
+
+
+def _random_query(rng, df: pd.DataFrame):
+    def pick(col, all_value):
+        values = [all_value, "Unknown", *df[col].dropna().astype(str).unique()]
+        return values[rng.integers(len(values))] if rng.random() < 0.6 else all_value
+
+    categories = ["All Drones", "racing", *normalize_category(df["Category"].dropna()).unique()]
+    cat = categories[rng.integers(len(categories))]
+    thresholds = {}
+    for col in rng.choice(THRESHOLD_COLUMNS, size=rng.integers(0, 4), replace=False):
+        values = pd.to_numeric(df[col], errors="coerce").fillna(0)
+        thresholds[str(col)] = float(values.quantile(rng.random())) if rng.random() < 0.8 else 0
+    return (cat, pick("Battery_Type", "All"), pick("Frame_Material", "All"), pick("Flight_Control_Board", "All")), thresholds
+
+
+@pytest.mark.parametrize("canonical", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_filter_subset_and_thresholds(seed, canonical):
+    df = _messy_catalog(seed)
+    if canonical:
+        df = canonicalize(df)
+    index = FilterIndex(df)
+    rng = np.random.default_rng(100 + seed)
+    for _ in range(50):
+        filters, thresholds = _random_query(rng, df)
+        expected = apply_numeric_thresholds(filter_subset(df, *filters), thresholds)
+        positions = index.apply_thresholds(index.query(*filters), thresholds)
+        np.testing.assert_array_equal(positions, df.index.get_indexer(expected.index))
+
+
+@pytest.mark.parametrize("canonical", [False, True])
+def test_dynamic_options_match(canonical):
+    df = _messy_catalog(7)
+    if canonical:
+        df = canonicalize(df)
+    index = FilterIndex(df)
+    for cat in ["All Drones", "racing", *normalize_category(df["Category"].dropna()).unique()]:
+        assert index.dynamic_options(cat) == dynamic_options(filter_subset(df, cat, "All", "All", "All"))
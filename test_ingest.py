@@ -0,0 +1,96 @@
+# test_ingest.py
+# ---------------- Incremental updates vs. loading the edited workbook ----------------
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_catalog
+from ingest import apply_delta, load_catalog, open_catalog, read_catalog
+
+
+def _xlsx(df: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="module")
+def workbook() -> pd.DataFrame:
+    return read_catalog(_xlsx(generate_catalog(400, seed=11)))
+
+
+def _assert_same_catalog(updated, expected):
+    pd.testing.assert_frame_equal(updated.raw.reset_index(drop=True), expected.raw, check_exact=True)
+    pd.testing.assert_frame_equal(updated.scored.reset_index(drop=True), expected.scored, check_exact=True)
+    for cat in expected.scored["Category"].unique():
+        np.testing.assert_array_equal(updated.index.query(str(cat)), expected.index.query(str(cat)))
+
+
+def test_delta_matches_loading_edited_workbook(workbook):
+    catalog = load_catalog(_xlsx(workbook))
+    raw = workbook
+    changed, other = raw.index[raw["Category"].str.lower() == "fpv"][:2]
+    removed = raw.index[raw["Category"].str.lower() == "delivery"][0]
+
+    change = raw.loc[[changed]].assign(**{"Flight_Time_(min)": 99})
+    add = raw.loc[[changed]].assign(Model="Brand New", **{"Flight_Time_(min)": 12})
+    remove = pd.DataFrame({"Manufacturer": [raw.at[removed, "Manufacturer"]],
+                           "Model": [raw.at[removed, "Model"]], "Action": ["remove"]})
+    unchanged = raw.iloc[[5]]
+    delta = pd.concat([unchanged, change, add, remove], ignore_index=True)
+    # Only the columns a delta has are updated (blank cells would clear): a second one
+    # with the key spelled differently changes just Max_Speed.
+    partial = pd.DataFrame({"Manufacturer": [f" {raw.at[other, 'Manufacturer'].upper()} "],
+                            "Model": [raw.at[other, "Model"].lower()], "Max_Speed_(km/h)": [123.5]})
+
+    expected_raw = raw.copy()
+    expected_raw.loc[changed, "Flight_Time_(min)"] = 99
+    expected_raw.loc[other, "Max_Speed_(km/h)"] = 123.5
+    expected_raw = pd.concat([expected_raw.drop(index=removed), add], ignore_index=True)
+    expected = load_catalog(_xlsx(expected_raw))
+
+    updated = apply_delta(catalog, read_catalog(_xlsx(delta)))
+    assert (updated.update.added, updated.update.changed, updated.update.removed) == (1, 1, 1)
+    assert updated.update.unchanged == 1
+    assert set(updated.update.rescored) == {"fpv", "delivery"}
+    updated = apply_delta(updated, read_catalog(_xlsx(partial)))
+    assert updated.update.changed == 1 and updated.update.rescored == ("fpv",)
+    _assert_same_catalog(updated, expected)
+
+    # Untouched categories keep their version, so their cached query results stay valid.
+    for cat in set(catalog.versions) - {"fpv", "delivery"}:
+        assert updated.version(cat) == catalog.version(cat)
+    assert updated.version("fpv") != catalog.version("fpv")
+
+
+def test_delta_of_unchanged_rows_keeps_catalog(workbook):
+    catalog = load_catalog(_xlsx(workbook))
+    updated = apply_delta(catalog, workbook.iloc[:10].copy())
+    assert updated.update.unchanged == 10 and updated.update.rescored == ()
+    assert updated.key == catalog.key and updated.scored is catalog.scored
+
+
+def test_chained_deltas_match_one_load(workbook):
+    catalog = load_catalog(_xlsx(workbook))
+    # The second delta only carries the column it changes, so row 1 keeps the first edit.
+    first = workbook.iloc[[0, 1]].assign(**{"Battery_(mAh)": 7777})
+    second = workbook.iloc[[1, 2]][["Manufacturer", "Model"]].assign(**{"Weight_(kg)": 1.25})
+    updated = apply_delta(apply_delta(catalog, first), second)
+
+    expected_raw = workbook.copy()
+    expected_raw.loc[[0, 1], "Battery_(mAh)"] = 7777
+    expected_raw.loc[[1, 2], "Weight_(kg)"] = 1.25
+    _assert_same_catalog(updated, load_catalog(_xlsx(expected_raw)))
+
+
+def test_session_writes_stay_in_its_copy(workbook):
+    data = _xlsx(workbook)
+    mine, theirs = open_catalog(data, sidecar_dir=None), open_catalog(data, sidecar_dir=None)
+    score = theirs.dataset.scored["Score"].copy()
+    mine.dataset.scored.loc[:, "Score"] = 0.0
+    mine.dataset.scored["Note"] = "edited"
+    assert theirs.dataset.scored["Score"].equals(score) and "Note" not in theirs.dataset.scored
+    mine.release()
+    theirs.release()
@@ -0,0 +1,46 @@
+# test_parallel_scoring.py
+# ---------------- Process-pool scoring vs. serial scoring ----------------
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_catalog
+from ingest import canonicalize
+from parallel_scoring import row_ranges, score_by_category_parallel, shutdown_pools
+from scoring import add_scores_by_category, category_bounds, score_by_category
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _pools():
+    yield
+    shutdown_pools()
+
+
+@pytest.fixture(scope="module")
+def catalog() -> pd.DataFrame:
+    return canonicalize(generate_catalog(20_000, seed=3))
+
+
+@pytest.mark.parametrize("workers, ranges_per_worker", [(2, 1), (3, 4)])
+def test_bit_identical_to_serial(catalog, workers, ranges_per_worker):
+    parallel = score_by_category_parallel(catalog, workers, ranges_per_worker=ranges_per_worker)
+    pd.testing.assert_frame_equal(parallel, score_by_category(catalog), check_exact=True)
+
+
+def test_raw_labels_and_given_bounds():
+    df = generate_catalog(5_000, seed=4)
+    bounds = category_bounds(df)
+    parallel = score_by_category_parallel(df, 2, bounds=bounds)
+    pd.testing.assert_frame_equal(parallel, score_by_category(df, bounds=bounds), check_exact=True)
+
+
+def test_add_scores_by_category_uses_pool_above_threshold(catalog, monkeypatch):
+    monkeypatch.setattr("scoring.PARALLEL_MIN_ROWS", 1_000)
+    pd.testing.assert_frame_equal(
+        add_scores_by_category(catalog, workers=2), score_by_category(catalog), check_exact=True
+    )
+
+
+def test_row_ranges_cover_rows():
+    assert row_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert row_ranges(2, 5) == [(0, 1), (1, 2)]
+    assert row_ranges(0, 4) == [(0, 0)]
@@ -0,0 +1,84 @@
+# test_query.py
+# ---------------- Query cache keys: normalization and invalidation ----------------
+import io
+
+import pytest
+
+from benchmarks.synthetic import generate_catalog
+from criteria_data import weights_dict
+from ingest import apply_delta, load_catalog, rescore_catalog
+from query import query_key, run_query, run_skyline
+from scoring import compile_scoring_plan
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    buf = io.BytesIO()
+    generate_catalog(400, seed=13).to_excel(buf, index=False)
+    return load_catalog(buf.getvalue(), sidecar_dir=None)
+
+
+def _key(catalog, cat="fpv", thresholds=None, n=5, **filters):
+    return query_key(catalog, cat, filters.get("bat", "All"), filters.get("frm", "All"), filters.get("fcb", "All"),
+                     thresholds or {}, n)
+
+
+def test_equivalent_filter_states_share_a_key(catalog):
+    base = _key(catalog, thresholds={"Flight_Time_(min)": 20, "Max_Speed_(km/h)": 50.0})
+    same = [
+        {"Max_Speed_(km/h)": 50, "Flight_Time_(min)": 20.0},  # order, int vs float
+        {"Flight_Time_(min)": "20", "Max_Speed_(km/h)": 50, "Weight_(kg)": 0},  # text, inactive threshold
+        {"Flight_Time_(min)": 20, "Max_Speed_(km/h)": 50, "Battery_(mAh)": -1},
+    ]
+    for thresholds in same:
+        assert _key(catalog, thresholds=thresholds) == base
+    assert _key(catalog, thresholds={"Flight_Time_(min)": 20, "Max_Speed_(km/h)": 50}, n=5.0) == base
+    assert _key(catalog, thresholds={}) == _key(catalog, thresholds={"Flight_Time_(min)": 0})
+
+
+def test_different_filter_states_get_different_keys(catalog):
+    base = _key(catalog, thresholds={"Flight_Time_(min)": 20})
+    assert _key(catalog, thresholds={"Flight_Time_(min)": 21}) != base
+    assert _key(catalog, thresholds={"Flight_Time_(min)": 20, "Weight_(kg)": 1}) != base
+    assert _key(catalog, thresholds={"Flight_Time_(min)": 20}, n=6) != base
+    assert _key(catalog, thresholds={"Flight_Time_(min)": 20}, bat="Li-Po") != base
+    assert _key(catalog, cat="delivery", thresholds={"Flight_Time_(min)": 20}) != base
+
+
+def test_results_are_shared_until_a_threshold_changes(catalog):
+    first = run_query(catalog, "fpv", "All", "All", "All", {"Flight_Time_(min)": 10, "Weight_(kg)": 0}, 5)
+    assert run_query(catalog, "fpv", "All", "All", "All", {"Flight_Time_(min)": 10.0}, 5) is first
+    stricter = run_query(catalog, "fpv", "All", "All", "All", {"Flight_Time_(min)": 30}, 5)
+    assert stricter is not first
+    assert (stricter.top["Flight_Time_(min)"] >= 30).all()
+
+
+def test_data_updates_invalidate_only_their_category(catalog):
+    fpv = run_query(catalog, "fpv", "All", "All", "All", {}, 5)
+    delivery = run_query(catalog, "delivery", "All", "All", "All", {}, 5)
+    row = catalog.raw[catalog.raw["Category"].str.lower() == "fpv"].iloc[[0]]
+    updated = apply_delta(catalog, row.assign(**{"Flight_Time_(min)": 999}))
+
+    assert _key(updated, cat="delivery") == _key(catalog, cat="delivery")
+    assert run_query(updated, "delivery", "All", "All", "All", {}, 5) is delivery
+    assert _key(updated, cat="fpv") != _key(catalog, cat="fpv")
+    after = run_query(updated, "fpv", "All", "All", "All", {}, 5)
+    assert after is not fpv and 999 in after.top["Flight_Time_(min)"].tolist()
+    assert _key(updated, cat="All Drones") != _key(catalog, cat="All Drones")
+
+
+def test_criteria_changes_invalidate_only_their_category(catalog):
+    fpv = run_query(catalog, "fpv", "All", "All", "All", {}, 5)
+    delivery = run_query(catalog, "delivery", "All", "All", "All", {}, 5)
+    skyline = run_skyline(catalog, "delivery", "All", "All", "All", {})
+    weights = {cat: dict(w) for cat, w in weights_dict.items()}
+    weights["fpv"] = {"Flight_Time_(min)": 1.0}
+    rescored = rescore_catalog(catalog, compile_scoring_plan(weights))
+
+    assert _key(rescored, cat="delivery") == _key(catalog, cat="delivery")
+    assert run_query(rescored, "delivery", "All", "All", "All", {}, 5) is delivery
+    assert run_skyline(rescored, "delivery", "All", "All", "All", {}) is skyline
+    assert _key(rescored, cat="fpv") != _key(catalog, cat="fpv")
+    after = run_query(rescored, "fpv", "All", "All", "All", {}, 5)
+    assert after is not fpv
+    assert after.top["Score"].tolist() == after.top["Flight_Time_(min)_Score"].round(2).tolist()  # flight time alone
@@ -0,0 +1,69 @@
+# test_ranking.py
+# ---------------- Top-k selection vs. a full stable sort ----------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import TIE_BREAKERS, TopK, rank_positions, tie_break_order, top_k
+
+
+def _scored(seed: int, n: int) -> pd.DataFrame:
+    """Few distinct scores and names, so ties (and ties at the k-th place) are common."""
+    rng = np.random.default_rng(seed)
+    score = rng.integers(0, 6, size=n) / 5
+    score[rng.random(n) < 0.1] = np.nan
+    makers = np.array(["DJI", "Autel", "Skydio", None], dtype=object)[rng.integers(0, 4, size=n)]
+    models = np.array(["X", "Mini", "Air", "air"], dtype=object)[rng.integers(0, 4, size=n)]
+    return pd.DataFrame({"Manufacturer": makers, "Model": models, "Score": score})
+
+
+def full_sort(scored: pd.DataFrame) -> np.ndarray:
+    """Score descending (NaN last), then TIE_BREAKERS ascending, then position: one stable sort."""
+    keys = pd.DataFrame({col: scored[col].astype(str).to_numpy() for col in TIE_BREAKERS})
+    keys["Score"] = scored["Score"].fillna(-np.inf).to_numpy()
+    order = keys.sort_values(["Score", *TIE_BREAKERS], ascending=[False] + [True] * len(TIE_BREAKERS), kind="stable")
+    return order.index.to_numpy()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rank_positions_match_full_sort(seed):
+    scored = _scored(seed, n=int(np.random.default_rng(seed).integers(1, 300)))
+    expected = full_sort(scored)
+    np.testing.assert_array_equal(rank_positions(scored), expected)
+    for k in {1, 2, 7, len(scored) // 2, len(scored) - 1, len(scored), len(scored) + 5} - {0}:
+        np.testing.assert_array_equal(rank_positions(scored, k), expected[:k])
+
+
+def test_ties_at_the_kth_place():
+    # Rows 1-4 tie on Score; the top 3 must take the best two of them by name, then position.
+    scored = pd.DataFrame({
+        "Manufacturer": ["A", "B", "A", "B", "A"],
+        "Model": ["m", "m", "m", "a", "m"],
+        "Score": [0.9, 0.5, 0.5, 0.5, 0.5],
+    })
+    np.testing.assert_array_equal(rank_positions(scored, 3), [0, 2, 4])
+    np.testing.assert_array_equal(rank_positions(scored, 3), full_sort(scored)[:3])
+
+
+def test_tie_break_order_is_rank_order_among_equal_scores():
+    scored = _scored(3, n=200).assign(Score=0.5)
+    np.testing.assert_array_equal(tie_break_order(scored), full_sort(scored))
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_running_top_k_matches_top_k(seed):
+    rng = np.random.default_rng(seed)
+    scored = _scored(seed, n=400)
+    for k in (1, 5, 37, 500):
+        running = TopK(k)
+        bounds = [0, *np.sort(rng.choice(np.arange(1, len(scored)), size=6, replace=False)), len(scored)]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            running.push(scored.iloc[start:stop])
+        pd.testing.assert_frame_equal(running.result(), top_k(scored, k))
+        np.testing.assert_array_equal(running.result().index, full_sort(scored)[:k])
+
+
+def test_empty_inputs():
+    assert TopK(3).result().empty
+    empty = _scored(0, n=0)
+    assert len(rank_positions(empty)) == 0 and len(rank_positions(empty, 3)) == 0
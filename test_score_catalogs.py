@@ -0,0 +1,48 @@
+# test_score_catalogs.py
+# ---------------- Batch CLI: every input format, whole-file and chunked ----------------
+import pandas as pd
+import pytest
+
+import score_catalogs
+from benchmarks.synthetic import generate_catalog
+from ingest import read_catalog_file
+
+
+@pytest.fixture(scope="module")
+def catalogs(tmp_path_factory):
+    """The same catalog as .xlsx, .csv and .parquet."""
+    folder = tmp_path_factory.mktemp("catalogs")
+    df = generate_catalog(300, seed=21)
+    df.to_excel(folder / "c.xlsx", index=False)
+    df.to_csv(folder / "c.csv", index=False)
+    df.to_parquet(folder / "c.parquet", index=False)
+    return folder
+
+
+def test_read_catalog_file_reads_every_format(catalogs):
+    expected = read_catalog_file(str(catalogs / "c.xlsx"))
+    for name in ("c.csv", "c.parquet"):
+        pd.testing.assert_frame_equal(read_catalog_file(str(catalogs / name)), expected)
+    with pytest.raises(ValueError, match="Unsupported catalog format"):
+        read_catalog_file(str(catalogs / "c.json"))
+
+
+def _ranked(out_dir) -> dict:
+    return {p.relative_to(out_dir).as_posix(): pd.read_csv(p) for p in sorted(out_dir.rglob("*.csv"))}
+
+
+@pytest.mark.parametrize("ext", ["xlsx", "csv", "parquet"])
+def test_whole_file_and_chunked_runs_agree(catalogs, tmp_path, ext):
+    args = [str(catalogs), "--pattern", f"*.{ext}", "--per-file", "--top", "5", "--workers", "1"]
+    score_catalogs.main([*args, "-o", str(tmp_path / "whole")])
+    score_catalogs.main([*args, "-o", str(tmp_path / "chunked"), "--chunksize", "64"])
+    whole, chunked = _ranked(tmp_path / "whole"), _ranked(tmp_path / "chunked")
+    assert whole and list(whole) == list(chunked)
+    for name in whole:
+        pd.testing.assert_frame_equal(whole[name], chunked[name], check_like=True)  # Source_File sits elsewhere
+
+
+def test_merged_run_reads_csv(catalogs, tmp_path):
+    score_catalogs.main([str(catalogs), "--pattern", "*.csv", "--top", "3", "--workers", "1", "-o", str(tmp_path)])
+    ranked = _ranked(tmp_path)
+    assert ranked and all(len(frame) <= 3 and (frame["Source_File"] == "c.csv").all() for frame in ranked.values())
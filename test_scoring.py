@@ -0,0 +1,133 @@
+# test_scoring.py
+# ---------------- Vectorized scoring vs. the original per-category loop ----------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import SEED_CATALOG, generate_catalog
+from criteria_data import (
+    weights_dict,
+    Criteria_Scores_Frame_Material,
+    Criteria_Scores_MIL_STD,
+    Criteria_Scores_Flight_Control_Board,
+)
+from ingest import canonicalize
+from scoring import add_scores_by_category, category_bounds, score_by_category
+
+
+def legacy_add_scores_by_category(df: pd.DataFrame) -> pd.DataFrame:
+    """The masked-assignment loop score_by_category() replaced, kept as the reference."""
+    out = df.copy()
+    if "Category" not in out.columns:
+        return out
+    out["Category"] = out["Category"].astype(str).str.replace("_", " ").str.strip().str.lower()
+    if "Score" not in out.columns:
+        out["Score"] = 0.0
+
+    for cat, weights in weights_dict.items():
+        mask = out["Category"] == cat
+        if not mask.any():
+            continue
+        for col in weights.keys():
+            out.loc[mask, f"{col}_Score"] = 0.0
+        sub = out.loc[mask].copy()
+        for col, w in weights.items():
+            if col not in sub.columns:
+                continue
+            if col == "Frame_Material":
+                sc = sub[col].map(Criteria_Scores_Frame_Material).fillna(0) * w
+            elif col == "Flight_Control_Board":
+                sc = sub[col].map(Criteria_Scores_Flight_Control_Board).fillna(0) * w
+            elif col == "MIL-STD-810G/MIL-STD-810H":
+                sc = sub[col].map(Criteria_Scores_MIL_STD).fillna(0) * w
+            else:
+                s = pd.to_numeric(sub[col], errors="coerce")
+                mn, mx = s.min(), s.max()
+                if pd.isna(mn) or pd.isna(mx) or mx <= mn:
+                    norm = pd.Series(0, index=sub.index, dtype=float)
+                else:
+                    norm = (s - mn) / (mx - mn)
+                sc = norm.fillna(0) * w
+            out.loc[mask, f"{col}_Score"] = sc
+        score_cols = [f"{c}_Score" for c in weights.keys() if f"{c}_Score" in out.columns]
+        if score_cols:
+            out.loc[mask, "Score"] = out.loc[mask, score_cols].sum(axis=1).round(2)
+
+    def to_rating(x: float) -> str:
+        if pd.isna(x):
+            return ""
+        for cut, stars in ((0.85, "★★★★★"), (0.70, "★★★★"), (0.55, "★★★"), (0.40, "★★")):
+            if x >= cut:
+                return stars
+        return "★"
+
+    out["Rating"] = out["Score"].apply(to_rating)
+    return out
+
+
+def _messy_catalog(n: int, seed: int) -> pd.DataFrame:
+    # Raw labels plus what real uploads contain: unknown and missing categories,
+    # missing numbers, unscored categorical values.
+    df = generate_catalog(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    df.loc[rng.random(n) < 0.03, "Category"] = "Unknown_Cat"
+    df.loc[rng.random(n) < 0.03, "Category"] = None
+    df.loc[rng.random(n) < 0.05, "Wind_Resistance_(km/h)"] = np.nan
+    df.loc[rng.random(n) < 0.05, "Frame_Material"] = "Wood"
+    return df
+
+
+CATALOGS = {
+    "synthetic": lambda: generate_catalog(3000, seed=1),
+    "messy": lambda: _messy_catalog(3000, seed=2),
+    "tiny": lambda: _messy_catalog(40, seed=3),
+    "missing columns": lambda: _messy_catalog(2000, seed=4).drop(columns=["Battery_(mAh)", "Frame_Material"]),
+    "one category": lambda: generate_catalog(500, seed=5).assign(Category="FPV"),
+    "shipped workbook": lambda: pd.read_excel(SEED_CATALOG),
+}
+
+
+def _as_text(out: pd.DataFrame, cols=("Rating",)) -> pd.DataFrame:
+    # Rating (and Category of categorical input) come back as categoricals of the same labels.
+    return out.astype({col: str for col in cols})
+
+
+@pytest.mark.parametrize("name", CATALOGS)
+def test_matches_legacy_loop(name):
+    df = CATALOGS[name]()
+    pd.testing.assert_frame_equal(_as_text(score_by_category(df)), legacy_add_scores_by_category(df), check_exact=True)
+
+
+@pytest.mark.parametrize("name", ["synthetic", "messy", "shipped workbook"])
+def test_canonical_frames_score_the_same(name):
+    df = CATALOGS[name]()
+    canonical = canonicalize(df.copy())
+    out = score_by_category(canonical)
+    if not df["Category"].isna().any():  # missing ones normalize row by row, to text
+        assert isinstance(out["Category"].dtype, pd.CategoricalDtype)
+        assert out["Category"].cat.categories.is_monotonic_increasing
+    expected = score_by_category(df)
+    written = ["Category", *[c for c in expected.columns if c.endswith("_Score")], "Score", "Rating"]
+    pd.testing.assert_frame_equal(
+        _as_text(out[written], ("Category", "Rating")), _as_text(expected[written]), check_exact=True
+    )
+
+
+def test_add_scores_by_category_is_score_by_category():
+    df = _messy_catalog(1000, seed=6)
+    pd.testing.assert_frame_equal(add_scores_by_category(df, workers=0), score_by_category(df), check_exact=True)
+
+
+def test_chunks_with_bounds_match_whole_frame():
+    df = _messy_catalog(5000, seed=7)
+    whole = score_by_category(df)
+    bounds = category_bounds(df)
+    chunks = pd.concat([score_by_category(df.iloc[i:i + 777], bounds=bounds) for i in range(0, len(df), 777)])
+    pd.testing.assert_frame_equal(chunks.reindex(columns=whole.columns), whole, check_exact=True, check_dtype=False)
+
+
+def test_without_category_returns_copy():
+    df = pd.DataFrame({"Model": ["a"], "Flight_Time_(min)": [10]})
+    out = score_by_category(df)
+    pd.testing.assert_frame_equal(out, df)
+    assert out is not df
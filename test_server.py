@@ -0,0 +1,113 @@
+# test_server.py
+# ---------------- HTTP API endpoints ----------------
+import json
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import server
+from benchmarks.synthetic import SEED_CATALOG
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    # Two names for the same bytes: they share dataset keys but not responses.
+    folder = tmp_path_factory.mktemp("catalogs")
+    paths = [shutil.copy(SEED_CATALOG, folder / "a.xlsx"), shutil.copy(SEED_CATALOG, folder / "b.xlsx")]
+    httpd = server.make_server([str(p) for p in paths], port=0, quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _call(api, path: str, body=None):
+    data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    req = urllib.request.Request(f"http://127.0.0.1:{api.server_port}{path}", data=data)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_query(api):
+    status, out = _call(api, "/query", {"catalog": "a", "category": "fpv", "n": 3, "columns": ["Model", "Score"]})
+    assert status == 200 and out["count"] == 3 and out["catalog"] == "a"
+    assert list(out["rows"][0]) == ["Model", "Score"]
+    assert [r["Score"] for r in out["rows"]] == sorted((r["Score"] for r in out["rows"]), reverse=True)
+
+
+def test_same_bytes_under_two_names(api):
+    body = {"category": "delivery", "n": 2}
+    for path in ("/query", "/skyline"):
+        a = _call(api, path, {**body, "catalog": "a"})[1]
+        b = _call(api, path, {**body, "catalog": "b"})[1]
+        assert (a["catalog"], b["catalog"]) == ("a", "b") and a["rows"] == b["rows"]
+
+
+def test_n_and_k_are_capped(api, monkeypatch):
+    monkeypatch.setattr(server, "MAX_TOP_N", 2)
+    status, out = _call(api, "/query", {"catalog": "a", "n": 10**9, "columns": ["Manufacturer", "Model"]})
+    assert status == 200 and out["count"] == 2
+    drone = out["rows"][0]
+    status, out = _call(api, "/similar", {"catalog": "a", "manufacturer": drone["Manufacturer"],
+                                          "model": drone["Model"], "k": 10**9})
+    assert status == 200 and out["count"] == 2
+
+
+@pytest.mark.parametrize("path, body, message", [
+    ("/query", {"catalog": ["a"]}, "catalog must be a string"),
+    ("/reload", {"catalog": 5}, "catalog must be a string"),
+    ("/reload", {"catalog": ["a"]}, "catalog must be a string"),
+    ("/query", {"catalog": "a", "category": 3}, "category must be a string"),
+    ("/query", {"catalog": "a", "category": "racing"}, "Unknown category"),
+    ("/query", {"catalog": "a", "n": "many"}, "must be numbers"),
+    ("/query", {"catalog": "a", "thresholds": {"Price": 1}}, "Unknown threshold columns"),
+    ("/query", {"catalog": "a", "frame_material": 1}, "frame_material must be a string"),
+    ("/query", {"catalog": "a", "columns": "Model"}, "columns must be a list"),
+    ("/query", {}, "Specify a catalog"),
+    ("/skyline", {"catalog": "a", "criteria": ["Model"]}, "numeric criteria"),
+    ("/similar", {"catalog": "a", "manufacturer": "DJI"}, "required strings"),
+    ("/update", {"catalog": "a", "rows": []}, "non-empty list"),
+    ("/query", b"{not json", "Invalid JSON"),
+    ("/query", b"[1]", "must be a JSON object"),
+])
+def test_bad_requests_are_400(api, path, body, message):
+    status, out = _call(api, path, body)
+    assert status == 400 and message in out["error"]
+
+
+def test_unknown_catalog_and_route_are_404(api):
+    assert _call(api, "/query", {"catalog": "c"})[0] == 404
+    assert _call(api, "/reload", {"catalog": "c"})[0] == 404
+    assert _call(api, "/nope", {})[0] == 404
+
+
+def test_reload(api):
+    status, out = _call(api, "/reload", {"catalog": "b"})
+    assert status == 200 and [r["catalog"] for r in out["reloaded"]] == ["b"]
+    assert out["reloaded"][0]["changed"] is False
+    status, out = _call(api, "/reload", {})
+    assert status == 200 and [r["catalog"] for r in out["reloaded"]] == ["a", "b"]
+
+
+def test_similar_and_stats(api):
+    status, out = _call(api, "/query", {"catalog": "a", "category": "fpv", "n": 1, "columns": ["Manufacturer", "Model"]})
+    drone = out["rows"][0]
+    status, out = _call(api, "/similar", {"catalog": "a", "manufacturer": drone["Manufacturer"],
+                                          "model": drone["Model"], "k": 2})
+    assert status == 200 and out["count"] == 2 and "Distance" in out["rows"][0]
+    assert _call(api, "/similar", {"catalog": "a", "manufacturer": "Nobody", "model": "X"})[0] == 404
+
+    status, stats = _call(api, "/stats")
+    assert status == 200 and 0 < stats["responses"]["bytes"] <= server.RESPONSE_CACHE_MB * 1024 * 1024
+
+
+def test_response_cache_is_bounded_in_bytes():
+    service = server.ScoringService(registry=None)
+    assert service._responses.max_bytes == server.RESPONSE_CACHE_MB * 1024 * 1024
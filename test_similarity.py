@@ -0,0 +1,52 @@
+# test_similarity.py
+# ---------------- Finding drones by name, and their nearest neighbours ----------------
+import io
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_catalog
+from ingest import load_catalog
+from similarity import find_drone, similar_drones
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    buf = io.BytesIO()
+    generate_catalog(600, seed=5).to_excel(buf, index=False)
+    return load_catalog(buf.getvalue(), sidecar_dir=None)
+
+
+def _first_rows(scored: pd.DataFrame, positions) -> dict:
+    first = {}
+    for pos in positions:
+        first.setdefault((str(scored["Manufacturer"].iloc[pos]), str(scored["Model"].iloc[pos])), int(pos))
+    return first
+
+
+def test_find_drone_matches_first_row(catalog):
+    scored = catalog.scored
+    for pair, pos in _first_rows(scored, range(len(scored))).items():
+        assert find_drone(catalog, *pair) == pos
+    for category in ("fpv", "delivery", "All Drones"):
+        for pair, pos in _first_rows(scored, catalog.index.query(category)).items():
+            assert find_drone(catalog, *pair, category=category) == pos
+
+
+def test_find_drone_outside_category_is_missing(catalog):
+    scored = catalog.scored
+    in_fpv = _first_rows(scored, catalog.index.query("fpv"))
+    pair = next(p for p in _first_rows(scored, range(len(scored))) if p not in in_fpv)
+    with pytest.raises(KeyError):
+        find_drone(catalog, *pair, category="fpv")
+    with pytest.raises(KeyError):
+        find_drone(catalog, "Nobody", "X")
+
+
+def test_similar_drones_stay_in_category(catalog):
+    pos = int(catalog.index.query("fpv")[0])
+    drone = catalog.scored.iloc[pos]
+    out = similar_drones(catalog, drone["Manufacturer"], drone["Model"], k=4, category="fpv")
+    assert len(out) == 4 and pos not in set(catalog.scored.index.get_indexer(out.index))
+    assert set(out["Category"].astype(str)) == {"fpv"}
+    assert out["Distance"].is_monotonic_increasing
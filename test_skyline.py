@@ -0,0 +1,61 @@
+# test_skyline.py
+# ---------------- Pareto front vs. an O(n^2) brute force ----------------
+import numpy as np
+import pandas as pd
+import pytest
+
+from skyline import criteria_values, pareto_front, skyline_positions
+
+
+def brute_force_skyline(values: np.ndarray) -> np.ndarray:
+    """Rows no other row beats: >= on every column and > on one."""
+    ge = (values[None, :, :] >= values[:, None, :]).all(axis=2)
+    gt = (values[None, :, :] > values[:, None, :]).any(axis=2)
+    return np.flatnonzero(~(ge & gt).any(axis=1))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n, d = int(rng.integers(1, 400)), int(rng.integers(1, 6))
+    if seed % 2:  # few distinct values: many ties and duplicates
+        values = rng.integers(0, rng.integers(2, 20), size=(n, d)).astype(float)
+    else:
+        values = rng.normal(size=(n, d))
+    block = int(rng.integers(1, 64))
+    np.testing.assert_array_equal(skyline_positions(values, block=block), brute_force_skyline(values))
+
+
+def test_prefilter_path_matches_brute_force():
+    # More than 4 blocks of rows takes the pivot prefilter first.
+    values = np.random.default_rng(1).integers(0, 30, size=(1500, 3)).astype(float)
+    np.testing.assert_array_equal(skyline_positions(values, block=64), brute_force_skyline(values))
+
+
+@pytest.mark.parametrize("block", [1, 2, 64])
+def test_dominator_with_equal_float_sum(block):
+    # 1e16 + 1 rounds to 1e16: the sums tie although row 1 dominates row 0.
+    values = np.array([[1e16, 0, 0], [1e16, 1, 0], [0, 0, 1], [1e16, 1, 0]])
+    np.testing.assert_array_equal(skyline_positions(values, block=block), [1, 2, 3])
+    np.testing.assert_array_equal(skyline_positions(values, block=block), brute_force_skyline(values))
+
+
+def test_edge_shapes():
+    assert len(skyline_positions(np.empty((0, 3)))) == 0
+    np.testing.assert_array_equal(skyline_positions(np.empty((4, 0))), np.arange(4))
+    np.testing.assert_array_equal(skyline_positions(np.ones((5, 2))), np.arange(5))
+
+
+def test_pareto_front_minimize_and_missing_values():
+    df = pd.DataFrame({
+        "Flight_Time_(min)": [30, 20, 30, np.nan],
+        "Weight_(kg)": [2.0, 1.0, 3.0, 0.5],
+    })
+    front = pareto_front(df, ["Flight_Time_(min)", "Weight_(kg)"], minimize=("Weight_(kg)",))
+    values = criteria_values(df, ["Flight_Time_(min)", "Weight_(kg)"], minimize=("Weight_(kg)",))
+    assert list(front.index) == list(brute_force_skyline(values)) == [0, 1, 3]
+
+
+def test_unknown_criterion_is_rejected():
+    with pytest.raises(ValueError):
+        criteria_values(pd.DataFrame({"Model": ["a"]}), ["Model"])
@@ -0,0 +1,57 @@
+# warmup.py
+# ---------------- Deferred heavy initialization ----------------
+"""
+The app's first screen (the upload prompt) only needs Streamlit, so pandas, NumPy,
+the scoring modules and matplotlib are imported after a workbook arrives.
+start_warm_up() loads them on a background thread in the meantime, once per process,
+so the first upload usually finds them ready without having waited on them.
+
+    python warmup.py    # e.g. in a Dockerfile: build matplotlib's font cache into the image
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+WARM_UP = os.environ.get("DRONE_WARM_UP", "1") != "0"
+
+# What the app imports once a workbook is uploaded (pandas, NumPy and the scoring modules).
+DATA_MODULES = ("ingest", "query", "export", "sensitivity", "skyline", "similarity")
+
+_thread = None
+_lock = threading.Lock()
+
+
+def warm_up(modules=DATA_MODULES, charts: bool = True) -> dict:
+    """Import `modules` and warm matplotlib up; returns {step: seconds}."""
+    timings = {}
+    for name in modules:
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - t0
+    if charts:
+        from charts import warm_up as warm_up_charts
+
+        t0 = time.perf_counter()
+        warm_up_charts()
+        timings["charts"] = time.perf_counter() - t0
+    return timings
+
+
+def start_warm_up(**kwargs) -> threading.Thread | None:
+    """Run warm_up() on a daemon thread, at most once per process (no-op when DRONE_WARM_UP=0)."""
+    global _thread
+    if not WARM_UP:
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warm_up, kwargs=kwargs, name="drone-warm-up", daemon=True)
+            _thread.start()
+        return _thread
+
+
+if __name__ == "__main__":
+    for step, seconds in warm_up().items():
+        print(f"{step:<12} {seconds * 1000:8.1f} ms")
+    sys.exit(0)